@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import (
+    Application,
+    CommandHandler,
+    ConversationHandler,
+    MessageHandler,
+    filters,
+)
+
+from benchmarks.fake_request import FakeRequest
+from bot.handlers.fsm import Flow, FlowEngine
+from bot.keyboards.common import MAIN_MENU_BUTTON
+from bot.keyboards.main_menu import (
+    CALCULATOR_BUTTON,
+    CONTACT_BUTTON,
+    EXAMPLES_BUTTON,
+)
+
+# Состояния как в боте; обработчики — заглушки, поэтому измеряется
+# только выбор обработчика и смена состояния. До общего FSM номера
+# состояний разных сценариев не должны были совпадать.
+SIZE, STYLE, FACES, OPTIONS, EXAMPLE_STYLE, WAITING = 0, 1, 2, 3, 100, 200
+
+
+def step(next_state: int | None):
+    async def callback(update, context) -> int | None:
+        return next_state
+    return callback
+
+
+async def noop(update, context) -> None:
+    return None
+
+
+def legacy_handlers() -> list:
+    # Стек обработчиков до роутера: регулярные выражения и три
+    # ConversationHandler с allow_reentry=True
+    text = filters.TEXT & ~filters.COMMAND
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return [
+            CommandHandler('start', noop),
+            MessageHandler(filters.Regex(f'^{MAIN_MENU_BUTTON}$'), noop),
+            ConversationHandler(
+                entry_points=[MessageHandler(
+                    filters.Regex(f'^{CALCULATOR_BUTTON}$'), step(SIZE)
+                )],
+                states={
+                    SIZE: [MessageHandler(text, step(STYLE))],
+                    STYLE: [MessageHandler(text, step(FACES))],
+                    FACES: [MessageHandler(text, step(OPTIONS))],
+                    OPTIONS: [MessageHandler(text, step(None))],
+                },
+                fallbacks=[],
+                allow_reentry=True,
+            ),
+            ConversationHandler(
+                entry_points=[MessageHandler(
+                    filters.Regex(f'^{EXAMPLES_BUTTON}$'),
+                    step(EXAMPLE_STYLE)
+                )],
+                states={EXAMPLE_STYLE: [MessageHandler(text, step(-1))]},
+                fallbacks=[],
+                allow_reentry=True,
+            ),
+            ConversationHandler(
+                entry_points=[MessageHandler(
+                    filters.Regex(f'^{CONTACT_BUTTON}$'), step(WAITING)
+                )],
+                states={WAITING: [MessageHandler(text, step(-1))]},
+                fallbacks=[],
+                allow_reentry=True,
+            ),
+        ]
+
+
+def fsm_handlers() -> list:
+    return [
+        CommandHandler('start', noop),
+        FlowEngine([
+            Flow('menu', MAIN_MENU_BUTTON, noop),
+            Flow('calculator', CALCULATOR_BUTTON, step(SIZE), {
+                SIZE: step(STYLE),
+                STYLE: step(FACES),
+                FACES: step(OPTIONS),
+                OPTIONS: step(None),
+            }),
+            Flow('examples', EXAMPLES_BUTTON, step(0), {0: step(-1)}),
+            Flow('contact', CONTACT_BUTTON, step(0), {0: step(-1)}),
+        ]),
+    ]
+
+
+def make_update(update_id: int, user_id: int, text: str) -> Update:
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type='private'),
+        from_user=User(id=user_id, is_bot=False, first_name='Test'),
+        text=text,
+    ))
+
+
+def traffic(count: int, users: int, seed: int = 0) -> list[Update]:
+    # Типичные сценарии: расчёт (меню + 4 шага), примеры, связь
+    rng = random.Random(seed)
+    scripts = [
+        [CALCULATOR_BUTTON, '30×40', 'Dream Art', '2', 'Готово'],
+        [EXAMPLES_BUTTON, 'Dream Art', MAIN_MENU_BUTTON],
+        [CONTACT_BUTTON, 'Здравствуйте!'],
+    ]
+    updates: list[Update] = []
+    while len(updates) < count:
+        user_id = rng.randrange(users) + 1
+        for text in rng.choice(scripts):
+            updates.append(make_update(len(updates) + 1, user_id, text))
+    return updates[:count]
+
+
+def build_app(handlers: list) -> Application:
+    app = (
+        Application.builder()
+        .token('1:token')
+        .request(FakeRequest())
+        .get_updates_request(FakeRequest())
+        .build()
+    )
+    app.add_handlers(handlers)
+    return app
+
+
+async def bench(handlers: list, updates: list[Update]) -> float:
+    # Обновлений в секунду через Application.process_update
+    app = build_app(handlers)
+    async with app:
+        started = time.perf_counter()
+        for update in updates:
+            await app.process_update(update)
+        elapsed = time.perf_counter() - started
+    return len(updates) / elapsed
+
+
+async def state_memory(handlers: list, users: int) -> float:
+    # Байт на пользователя, которые остаются после входа в калькулятор
+    # и первого шага. Заглушки не обращаются к user_data, поэтому
+    # остаётся в основном запись о состоянии сценария.
+    updates = [
+        make_update(2 * i + j + 1, i + 1, text)
+        for i in range(users)
+        for j, text in enumerate((CALCULATOR_BUTTON, '30×40'))
+    ]
+    app = build_app(handlers)
+    async with app:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for update in updates:
+            await app.process_update(update)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    retained = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+    return retained / users
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Пропускная способность маршрутизации текстов.'
+    )
+    parser.add_argument('--updates', type=int, default=50_000)
+    parser.add_argument('--users', type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    updates = traffic(args.updates, args.users)
+    legacy = asyncio.run(bench(legacy_handlers(), updates))
+    fsm = asyncio.run(bench(fsm_handlers(), updates))
+    print(f'Regex + ConversationHandler: {legacy:10.0f} обновлений/с')
+    print(f'FlowEngine:                  {fsm:10.0f} обновлений/с')
+    print(f'Ускорение: {fsm / legacy:.1f}x')
+
+    legacy_mem = asyncio.run(state_memory(legacy_handlers(), args.users))
+    fsm_mem = asyncio.run(state_memory(fsm_handlers(), args.users))
+    print(f'Память на пользователя: {legacy_mem:.0f} Б → {fsm_mem:.0f} Б')
+
+
+if __name__ == '__main__':
+    main()
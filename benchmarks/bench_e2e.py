@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import NamedTuple
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from benchmarks.fake_request import FakeRequest
+from bot.config import CALCULATOR_MODE
+from bot.handlers.registry import register_handlers
+from bot.keyboards.common import MAIN_MENU_BUTTON
+from bot.keyboards.main_menu import (
+    CALCULATOR_BUTTON,
+    CONTACT_BUTTON,
+    EXAMPLES_BUTTON,
+)
+from bot.keyboards.registry import PreparedMarkupBot
+from bot.utils.image_catalog import image_catalog
+from bot.utils.persistence import SQLitePersistence
+from bot.utils.update_processor import ChatOrderedUpdateProcessor
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+# id пользователей не пересекаются с id бота из FakeRequest
+FIRST_USER_ID = 1000
+
+
+class Step(NamedTuple):
+    # Одно действие пользователя: обработчик, который должен его
+    # обработать (для отчёта), текст сообщения или callback_data
+    handler: str
+    text: str
+    callback: bool = False
+
+
+# Сценарии как у настоящих пользователей. Имя шага — обработчик бота,
+# по нему группируются задержки.
+REPLY_CALCULATOR = [
+    Step('start_calculator', CALCULATOR_BUTTON),
+    Step('size_chosen', '40×60'),
+    Step('style_chosen', 'Dream Art'),
+    Step('face_count_chosen', '2'),
+    Step('options_chosen', 'Багетная рама'),
+    Step('options_chosen', 'Готово'),
+]
+INLINE_CALCULATOR = [
+    Step('start_inline_calculator', CALCULATOR_BUTTON),
+    Step('inline_calculator', 'calc:size:1', callback=True),
+    Step('inline_calculator', 'calc:style:1', callback=True),
+    Step('inline_calculator', 'calc:faces:2', callback=True),
+    Step('inline_calculator', 'calc:opt:2', callback=True),
+    Step('inline_calculator', 'calc:done', callback=True),
+]
+EXAMPLES = [
+    Step('show_example_styles', EXAMPLES_BUTTON),
+    Step('send_example_images', 'Просто фото на холсте'),
+    Step('browse_examples', 'gallery:0:1', callback=True),
+    Step('start_command', MAIN_MENU_BUTTON),
+]
+CONTACT = [
+    Step('request_contact', CONTACT_BUTTON),
+    Step('forward_to_manager', 'Здравствуйте! Сколько ждать заказ?'),
+]
+
+
+def scenarios(calculator_mode: str) -> list[list[Step]]:
+    calculator = (
+        INLINE_CALCULATOR if calculator_mode == 'inline'
+        else REPLY_CALCULATOR
+    )
+    # Калькулятор — самый частый сценарий
+    return [calculator, calculator, EXAMPLES, CONTACT]
+
+
+def update_data(update_id: int, user_id: int, step: Step) -> dict:
+    # Обновление в том виде, в каком его присылает Telegram
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Test'}
+    chat = {'id': user_id, 'type': 'private'}
+    date = int(time.time())
+    if not step.callback:
+        return {'update_id': update_id, 'message': {
+            'message_id': update_id, 'date': date, 'chat': chat,
+            'from': user, 'text': step.text,
+        }}
+    # Кнопка под сообщением бота с id 1 (его возвращает FakeRequest)
+    return {'update_id': update_id, 'callback_query': {
+        'id': str(update_id), 'from': user, 'chat_instance': str(user_id),
+        'message': {'message_id': 1, 'date': date, 'chat': chat},
+        'data': step.text,
+    }}
+
+
+def traffic(
+    count: int, users: int, calculator_mode: str, seed: int = 0
+) -> list[tuple[str, dict]]:
+    # Поток обновлений: сценарии пользователей чередуются, как если бы
+    # они писали боту одновременно
+    rng = random.Random(seed)
+    pending: dict[int, list[Step]] = {}
+    stream: list[tuple[str, dict]] = []
+    while len(stream) < count:
+        user_id = FIRST_USER_ID + rng.randrange(users)
+        steps = pending.get(user_id)
+        if not steps:
+            steps = pending[user_id] = list(
+                rng.choice(scenarios(calculator_mode))
+            )
+        step = steps.pop(0)
+        stream.append(
+            (step.handler, update_data(len(stream) + 1, user_id, step))
+        )
+    return stream
+
+
+class Errors:
+    # Исключения обработчиков: бенчмарк с ошибками ничего не измеряет
+    def __init__(self) -> None:
+        self.count = 0
+        self.first: BaseException | None = None
+
+    async def __call__(
+        self, update: object, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        self.count += 1
+        if self.first is None:
+            self.first = context.error
+
+    def check(self) -> None:
+        if self.count:
+            raise RuntimeError(
+                f'Ошибок в обработчиках: {self.count}, первая: '
+                f'{self.first!r}'
+            ) from self.first
+
+
+def build_app(
+    calculator_mode: str,
+    errors: Errors,
+    api_latency: float = 0,
+    workers: int = 1,
+    persistence: SQLitePersistence | None = None,
+) -> Application:
+    # Настоящее приложение бота, но запросы к Bot API не уходят в сеть
+    bot = PreparedMarkupBot(
+        '1:token',
+        request=FakeRequest(api_latency),
+        get_updates_request=FakeRequest(),
+    )
+    builder = Application.builder().bot(bot)
+    if workers > 1:
+        builder = builder.concurrent_updates(
+            ChatOrderedUpdateProcessor(workers)
+        )
+    if persistence is not None:
+        builder = builder.persistence(persistence)
+    app = builder.build()
+    fsm = register_handlers(app, calculator_mode=calculator_mode)
+    if persistence is not None:
+        persistence.attach(fsm)
+    app.add_error_handler(errors)
+    return app
+
+
+def decode(
+    app: Application, stream: list[tuple[str, dict]]
+) -> list[tuple[str, Update]]:
+    # Разбор JSON в объекты PTB — до замеров, как это делает
+    # получение обновлений
+    return [
+        (handler, Update.de_json(data, app.bot)) for handler, data in stream
+    ]
+
+
+def percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def run_timed(
+    calculator_mode: str, stream: list[tuple[str, dict]]
+) -> tuple[float, dict[str, list[float]]]:
+    # Пропускная способность (обновлений/с) и задержки по обработчикам, мс
+    latencies: dict[str, list[float]] = {}
+    errors = Errors()
+    app = build_app(calculator_mode, errors)
+    async with app:
+        updates = decode(app, stream)
+        clock = time.perf_counter
+        started = clock()
+        for handler, update in updates:
+            before = clock()
+            await app.process_update(update)
+            latencies.setdefault(handler, []).append(
+                (clock() - before) * 1000
+            )
+        elapsed = clock() - started
+    errors.check()
+    return len(stream) / elapsed, latencies
+
+
+async def run_traced(
+    calculator_mode: str, stream: list[tuple[str, dict]]
+) -> tuple[dict[str, float], float]:
+    # Отдельный прогон под tracemalloc (он замедляет работу в разы):
+    # средний пик выделенной памяти на обновление по обработчикам, КиБ,
+    # и память, оставшаяся после прогона, байт на обновление
+    peaks: dict[str, list[int]] = {}
+    errors = Errors()
+    app = build_app(calculator_mode, errors)
+    async with app:
+        updates = decode(app, stream)
+        tracemalloc.start()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        for handler, update in updates:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await app.process_update(update)
+            peak = tracemalloc.get_traced_memory()[1]
+            peaks.setdefault(handler, []).append(peak - before)
+        retained = tracemalloc.get_traced_memory()[0] - start_memory
+        tracemalloc.stop()
+    errors.check()
+    allocations = {
+        handler: statistics.fmean(values) / 1024
+        for handler, values in peaks.items()
+    }
+    return allocations, retained / len(stream)
+
+
+def measure(
+    calculator_mode: str, updates: int, users: int, traced: int
+) -> dict:
+    image_catalog.load()
+    stream = traffic(updates, users, calculator_mode)
+    # Прогрев: кэши изображений, сводок и клавиатур
+    asyncio.run(run_timed(calculator_mode, stream[:traced]))
+    throughput, latencies = asyncio.run(run_timed(calculator_mode, stream))
+    allocations, retained = asyncio.run(
+        run_traced(calculator_mode, stream[:traced])
+    )
+    return {
+        'calculator_mode': calculator_mode,
+        'updates': updates,
+        'throughput': round(throughput, 1),
+        'retained_bytes_per_update': round(retained, 1),
+        'handlers': {
+            handler: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.5), 4),
+                'p99_ms': round(percentile(values, 0.99), 4),
+                'peak_kib': round(allocations.get(handler, 0), 2),
+            }
+            for handler, values in sorted(latencies.items())
+        },
+    }
+
+
+def compare(
+    result: dict,
+    baseline: dict,
+    tolerance: float,
+    latency_tolerance: float,
+) -> list[str]:
+    # Регрессии относительно базовой линии: падение пропускной
+    # способности или рост пика памяти больше tolerance, рост p99 больше
+    # latency_tolerance (задержки шумнее)
+    problems: list[str] = []
+    if result['throughput'] < baseline['throughput'] * (1 - tolerance):
+        problems.append(
+            f'пропускная способность {result["throughput"]:.0f} < '
+            f'{baseline["throughput"]:.0f} обновлений/с'
+        )
+    for handler, old in baseline['handlers'].items():
+        new = result['handlers'].get(handler)
+        if new is None:
+            problems.append(f'{handler}: нет в результатах')
+            continue
+        if new['p99_ms'] > old['p99_ms'] * (1 + latency_tolerance):
+            problems.append(
+                f'{handler}: p99 {new["p99_ms"]:.3f} > '
+                f'{old["p99_ms"]:.3f} мс'
+            )
+        if new['peak_kib'] > old['peak_kib'] * (1 + tolerance):
+            problems.append(
+                f'{handler}: память {new["peak_kib"]:.1f} > '
+                f'{old["peak_kib"]:.1f} КиБ'
+            )
+    return problems
+
+
+def print_report(result: dict) -> None:
+    print(
+        f'Режим калькулятора: {result["calculator_mode"]}, '
+        f'обновлений: {result["updates"]}'
+    )
+    print(f'Пропускная способность: {result["throughput"]:.0f} обновлений/с')
+    print(
+        'Остаётся в памяти: '
+        f'{result["retained_bytes_per_update"]:.0f} Б на обновление'
+    )
+    print(
+        f'{"обработчик":<26} {"n":>6} {"p50, мс":>9} {"p99, мс":>9} '
+        f'{"пик, КиБ":>9}'
+    )
+    for handler, stats in result['handlers'].items():
+        print(
+            f'{handler:<26} {stats["count"]:>6} {stats["p50_ms"]:>9.3f} '
+            f'{stats["p99_ms"]:>9.3f} {stats["peak_kib"]:>9.1f}'
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Сквозной бенчмарк обработки обновлений: настоящие обработчики '
+            'бота, Bot API без сети.'
+        )
+    )
+    parser.add_argument('--updates', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument(
+        '--traced', type=int, default=2_000,
+        help='обновлений в прогоне под tracemalloc'
+    )
+    parser.add_argument(
+        '--calculator-mode', choices=('reply', 'inline'),
+        default=CALCULATOR_MODE
+    )
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='записать результат как базовую линию'
+    )
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--latency-tolerance', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    result = measure(
+        args.calculator_mode, args.updates, args.users, args.traced
+    )
+    print_report(result)
+
+    if args.save_baseline:
+        baselines = {}
+        if args.baseline.exists():
+            baselines = json.loads(args.baseline.read_text(encoding='utf-8'))
+        baselines[args.calculator_mode] = result
+        args.baseline.write_text(
+            json.dumps(baselines, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8'
+        )
+        print(f'Базовая линия сохранена: {args.baseline}')
+        return
+
+    if not args.baseline.exists():
+        print('Базовой линии нет, сравнение пропущено')
+        return
+    baseline = json.loads(
+        args.baseline.read_text(encoding='utf-8')
+    ).get(args.calculator_mode)
+    if baseline is None:
+        print(f'В базовой линии нет режима {args.calculator_mode}')
+        return
+    problems = compare(
+        result, baseline, args.tolerance, args.latency_tolerance
+    )
+    if problems:
+        print('Регрессии относительно базовой линии:')
+        for problem in problems:
+            print(f'  • {problem}')
+        sys.exit(1)
+    print('Регрессий относительно базовой линии нет')
+
+
+if __name__ == '__main__':
+    main()
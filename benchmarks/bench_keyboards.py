@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import time
+
+from telegram.ext import ExtBot
+
+from benchmarks.fake_request import FakeRequest
+from bot.keyboards.calculator import (
+    calculator_keyboards,
+    inline_options_keyboard,
+)
+from bot.keyboards.common import main_menu_button
+from bot.keyboards.examples import gallery_keyboard, style_keyboard
+from bot.keyboards.main_menu import main_menu
+from bot.keyboards.registry import (
+    Markup,
+    PreparedMarkupBot,
+    keyboard_registry,
+)
+from bot.utils.price_store import price_store
+
+
+def keyboards() -> dict[str, Markup]:
+    # Клавиатуры, которые бот отправляет чаще всего
+    pricing = price_store.current()
+    calculator = calculator_keyboards(pricing)
+    return {
+        'main_menu': main_menu,
+        'main_menu_button': main_menu_button,
+        'size_keyboard': calculator.size,
+        'style_keyboard': style_keyboard,
+        'option_keyboard': calculator.option,
+        'inline_options': inline_options_keyboard(pricing, 0b101),
+        'gallery_keyboard': gallery_keyboard(1, 3, 12),
+    }
+
+
+def bench_serialize(markup: Markup, number: int) -> tuple[float, float]:
+    # Сериализация reply_markup на одно сообщение, мкс: как PTB
+    # (to_dict + json.dumps) и готовый JSON из реестра
+    started = time.perf_counter()
+    for _ in range(number):
+        json.dumps(markup.to_dict())
+    before = (time.perf_counter() - started) / number * 1e6
+    started = time.perf_counter()
+    for _ in range(number):
+        keyboard_registry.payload(markup)
+    after = (time.perf_counter() - started) / number * 1e6
+    return before, after
+
+
+async def bench_send(bot: ExtBot, markup: Markup, number: int) -> float:
+    # Полный send_message без сети, мкс
+    async with bot:
+        started = time.perf_counter()
+        for _ in range(number):
+            await bot.send_message(1, 'Текст', reply_markup=markup)
+    return (time.perf_counter() - started) / number * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Сериализация клавиатуры на каждое сообщение (обычный бот PTB) '
+            'и готовый JSON из реестра клавиатур (PreparedMarkupBot).'
+        )
+    )
+    parser.add_argument('--number', type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    print(
+        f'{"клавиатура":<18} {"JSON до":>8} {"после":>7} '
+        f'{"send до":>8} {"после":>7}  (мкс на сообщение)'
+    )
+    for name, markup in keyboards().items():
+        before, after = bench_serialize(markup, args.number)
+        send_before = asyncio.run(bench_send(
+            ExtBot('1:token', request=FakeRequest()), markup, args.number
+        ))
+        send_after = asyncio.run(bench_send(
+            PreparedMarkupBot('1:token', request=FakeRequest()),
+            markup, args.number
+        ))
+        print(
+            f'{name:<18} {before:8.1f} {after:7.1f} '
+            f'{send_before:8.1f} {send_after:7.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_e2e import Errors, build_app, decode, traffic
+from bot.config import CALCULATOR_MODE
+from bot.utils.image_catalog import image_catalog
+from bot.utils.persistence import SQLitePersistence
+
+
+async def run(
+    calculator_mode: str,
+    stream: list[tuple[str, dict]],
+    db_path: Path | None,
+    interval: float,
+) -> dict:
+    # Пропускная способность с учётом записи при остановке. Application
+    # пишет изменения раз в interval секунд (здесь — тем же расписанием
+    # в цикле обработки); interval=0 — запись после каждого обновления.
+    persistence = None
+    if db_path is not None:
+        persistence = SQLitePersistence(db_path, interval)
+    errors = Errors()
+    app = build_app(calculator_mode, errors, persistence=persistence)
+    clock = time.perf_counter
+    async with app:
+        updates = decode(app, stream)
+        started = clock()
+        next_write = started + interval
+        for _, update in updates:
+            await app.process_update(update)
+            if persistence is not None and clock() >= next_write:
+                await app.update_persistence()
+                next_write = clock() + interval
+        processed = clock() - started
+    # Выход из async with — последняя запись (update_persistence и flush)
+    elapsed = clock() - started
+    errors.check()
+    result = {
+        'throughput': len(stream) / elapsed,
+        'shutdown_ms': (elapsed - processed) * 1000,
+    }
+    if persistence is not None:
+        result['batches'] = persistence.batches
+        result['rows'] = persistence.rows
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Пропускная способность обработки обновлений без сохранения '
+            'состояния, с отложенной записью в SQLite и с записью после '
+            'каждого обновления.'
+        )
+    )
+    parser.add_argument('--updates', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument(
+        '--interval', type=float, default=1,
+        help='интервал отложенной записи, с'
+    )
+    parser.add_argument(
+        '--calculator-mode', choices=('reply', 'inline'),
+        default=CALCULATOR_MODE
+    )
+    args = parser.parse_args(argv)
+
+    image_catalog.load()
+    stream = traffic(args.updates, args.users, args.calculator_mode)
+    # Прогрев: кэши изображений, сводок и клавиатур
+    asyncio.run(run(args.calculator_mode, stream[:2_000], None, 0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ('без сохранения', None, 0),
+            (
+                f'раз в {args.interval:g} с',
+                Path(tmp) / 'behind.sqlite3', args.interval,
+            ),
+            ('после каждого', Path(tmp) / 'through.sqlite3', 0),
+        ]
+        for title, db_path, interval in runs:
+            result = asyncio.run(
+                run(args.calculator_mode, stream, db_path, interval)
+            )
+            line = (
+                f'{title:<16} {result["throughput"]:>8.0f} обновлений/с, '
+                f'остановка {result["shutdown_ms"]:.1f} мс'
+            )
+            if 'batches' in result:
+                line += (
+                    f', {result["rows"]} строк '
+                    f'в {result["batches"]} транзакциях'
+                )
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
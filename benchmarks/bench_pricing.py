@@ -0,0 +1,83 @@
+import argparse
+import random
+import timeit
+
+import numpy as np
+
+from bot.prices import AVAILABLE_SIZES, EXTRA_OPTIONS, STYLE_OPTIONS
+from bot.utils.calculator import calculate_total, calculate_total_reference
+from bot.utils.price_store import price_store
+
+price_table = price_store.current().table
+
+
+def random_orders(count: int, seed: int = 0) -> list[dict]:
+    # Случайные заказы из прайса
+    rng = random.Random(seed)
+    options = list(EXTRA_OPTIONS)
+    return [
+        {
+            'size': rng.choice(AVAILABLE_SIZES),
+            'style': rng.choice(STYLE_OPTIONS),
+            'faces': rng.randint(0, price_table.max_faces),
+            'options': rng.sample(options, rng.randint(0, len(options))),
+        }
+        for _ in range(count)
+    ]
+
+
+def bench(name: str, func, orders: list[dict], repeat: int) -> float:
+    # Лучшее время одного вызова в микросекундах
+    best = min(timeit.repeat(
+        lambda: [func(order) for order in orders], number=1, repeat=repeat
+    ))
+    per_call = best / len(orders) * 1e6
+    print(f'{name:<32} {per_call:8.3f} мкс/заказ')
+    return per_call
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Сравнение табличного и эталонного расчёта стоимости.'
+    )
+    parser.add_argument('--orders', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    orders = random_orders(args.orders)
+    for order in orders:
+        assert calculate_total(order) == calculate_total_reference(order)
+
+    reference = bench(
+        'calculate_total_reference', calculate_total_reference, orders,
+        args.repeat
+    )
+    table = bench('calculate_total', calculate_total, orders, args.repeat)
+    quote = bench(
+        'price_table.quote',
+        lambda order: price_table.quote(
+            order['size'], order['style'], order['faces'], order['options']
+        ),
+        orders,
+        args.repeat
+    )
+    # Пакетный расчёт: заказы уже закодированы в столбцы ndarray
+    columns = [
+        np.array([price_table.size_ids[order['size']] for order in orders]),
+        np.array([price_table.style_ids[order['style']] for order in orders]),
+        np.array([order['faces'] for order in orders]),
+        np.array([price_table.mask(order['options']) for order in orders]),
+    ]
+    best = min(timeit.repeat(
+        lambda: price_table.quote_codes(*columns), number=1,
+        repeat=args.repeat
+    ))
+    batch = best / len(orders) * 1e6
+    print(f'{"price_table.quote_codes":<32} {batch:8.3f} мкс/заказ')
+    print(f'Ускорение calculate_total: {reference / table:.1f}x')
+    print(f'Ускорение только итога (quote): {reference / quote:.1f}x')
+    print(f'Ускорение пакетного расчёта: {reference / batch:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_e2e import percentile
+from benchmarks.fake_api import FakeBotApi
+from bot.keyboards.common import MAIN_MENU_BUTTON
+
+# id пользователей не пересекаются с id бота из FakeBotApi
+FIRST_USER_ID = 1000
+# Сколько ждать запуска бота и ответов на все обновления, с
+START_TIMEOUT = 30
+FINISH_TIMEOUT = 60
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def menu_update(user_id: int) -> dict:
+    # «В главное меню»: бот отвечает ровно одним сообщением, поэтому
+    # время до ответа в чат — это время обработки обновления
+    return {'message': {
+        'message_id': 1, 'date': int(time.time()), 'text': MAIN_MENU_BUTTON,
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'User'},
+    }}
+
+
+async def wait_for(condition, timeout: float, process) -> bool:
+    # Ждать условия, пока бот работает
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        if process.returncode is not None:
+            return False
+        await asyncio.sleep(0.05)
+    return False
+
+
+async def run_mode(mode: str, args: argparse.Namespace, log: Path) -> dict:
+    # Бот отдельным процессом (как в работе) против локального Bot API
+    api = FakeBotApi(latency=args.api_latency / 1000)
+    api_port = await api.start()
+    webhook_port = free_port()
+    env = {
+        **os.environ,
+        'TELEGRAM_TOKEN': '1:bench',
+        'TELEGRAM_API_URL': f'http://127.0.0.1:{api_port}/bot',
+        'UPDATE_MODE': mode,
+        'WEBHOOK_LISTEN': '127.0.0.1',
+        'WEBHOOK_PORT': str(webhook_port),
+        'WEBHOOK_URL': f'http://127.0.0.1:{webhook_port}',
+        'WEBHOOK_SECRET': 'bench-secret',
+        'WEBHOOK_MAX_CONNECTIONS': str(args.max_connections),
+        'FILE_ID_CACHE_PATH': str(log.with_suffix('.file_ids.json')),
+        'FILE_ID_CACHE_CHAT_ID': '0',
+        'TRAFFIC_LOG_PATH': '',
+        'PERSISTENCE_PATH': str(log.with_suffix('.sqlite3')),
+        # Сравниваются режимы получения, а не лимиты отправки Telegram
+        'RATE_LIMIT_GLOBAL': '0',
+    }
+    with open(log, 'wb') as output:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'bot.fh_bot',
+            env=env, stdout=output, stderr=asyncio.subprocess.STDOUT,
+        )
+    try:
+        if mode == 'webhook':
+            ready = lambda: api.webhook is not None  # noqa: E731
+        else:
+            ready = lambda: api.calls.get('getUpdates', 0) > 0  # noqa: E731
+        if not await wait_for(ready, START_TIMEOUT, process):
+            return {'mode': mode, 'error': 'бот не запустился'}
+        # Webhook-сервер бота мог ещё не начать принимать соединения
+        await asyncio.sleep(0.5)
+
+        started = time.perf_counter()
+        interval = 1 / args.rate if args.rate > 0 else 0
+        for i in range(args.updates):
+            if interval:
+                delay = started + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            api.inject(menu_update(FIRST_USER_ID + i % args.users))
+        done = await wait_for(
+            lambda: len(api.reply_latencies) >= args.updates,
+            FINISH_TIMEOUT, process,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        if process.returncode is None:
+            process.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(process.wait(), 15)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        await api.stop()
+
+    latencies = api.reply_latencies
+    result = {
+        'mode': mode,
+        'replies': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'webhook_errors': api.webhook_errors,
+    }
+    if not done:
+        result['error'] = f'ответов {len(latencies)} из {args.updates}'
+    if latencies:
+        result.update({
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies),
+        })
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Задержка от появления обновления в Bot API до ответа бота '
+            'в режимах polling и webhook (локальный Bot API).'
+        )
+    )
+    parser.add_argument(
+        '--modes', nargs='+', choices=('polling', 'webhook'),
+        default=['polling', 'webhook']
+    )
+    parser.add_argument('--updates', type=int, default=2_000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument(
+        '--rate', type=float, default=200,
+        help='обновлений в секунду (0 — все сразу)'
+    )
+    parser.add_argument(
+        '--api-latency', type=float, default=0,
+        help='время ответа Bot API, мс'
+    )
+    parser.add_argument('--max-connections', type=int, default=40)
+    args = parser.parse_args(argv)
+    if (
+        'webhook' in args.modes
+        and importlib.util.find_spec('tornado') is None
+    ):
+        # Иначе бот упадёт при запуске, и режим webhook не измерится
+        parser.error(
+            'для режима webhook нужен tornado (python-telegram-bot'
+            '[webhooks]): pip install -r requirements.txt'
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            log = Path(tmp) / f'{mode}.log'
+            result = asyncio.run(run_mode(mode, args, log))
+            print(f'[{mode}]')
+            if 'p50' in result:
+                print(
+                    f'  ответов: {result["replies"]}, '
+                    f'{result["throughput"]:.0f} в секунду'
+                )
+                print(
+                    f'  задержка, мс: p50 {result["p50"]:.1f}, '
+                    f'p95 {result["p95"]:.1f}, p99 {result["p99"]:.1f}, '
+                    f'макс. {result["max"]:.1f}'
+                )
+            if result.get('webhook_errors'):
+                print(f'  ошибок доставки: {result["webhook_errors"]}')
+            if 'error' in result:
+                print(f'  ошибка: {result["error"]}')
+                tail = log.read_text(encoding='utf-8', errors='replace')
+                print('  ' + '\n  '.join(tail.splitlines()[-5:]))
+
+
+if __name__ == '__main__':
+    main()
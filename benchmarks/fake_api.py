@@ -0,0 +1,616 @@
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import itertools
+import json
+import logging
+import random
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import SplitResult, parse_qsl, urlsplit
+
+from bot.utils.traffic_log import read_traffic
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {
+    'id': 1, 'is_bot': True, 'first_name': 'Local', 'username': 'local_bot'
+}
+# Методы, которые отправляют или меняют сообщения: к ним применяются
+# задержка и ответ 429
+SEND_METHODS = frozenset({
+    'sendMessage', 'sendPhoto', 'sendMediaGroup', 'editMessageText',
+    'editMessageMedia', 'answerCallbackQuery',
+})
+# Наибольший запрос, который сервер примет (как у Bot API для фото)
+MAX_BODY = 50 * 1024 * 1024
+# Пауза перед повторной доставкой обновления на webhook, с
+WEBHOOK_RETRY_DELAY = 0.5
+
+
+class ApiError(Exception):
+    # Ошибка Bot API: код и описание в ответе {"ok": false, ...}
+    def __init__(
+        self, code: int, description: str, retry_after: int | None = None
+    ) -> None:
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+
+def parse_body(content_type: str, body: bytes) -> dict[str, object]:
+    # Параметры запроса: form-urlencoded (PTB без файлов), multipart
+    # (PTB с файлами) или JSON. Файлы — bytes.
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    if content_type.startswith('multipart/form-data'):
+        message = email.parser.BytesParser(
+            policy=email.policy.HTTP
+        ).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+        )
+        params: dict[str, object] = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if part.get_filename() is None:
+                params[name] = payload.decode()
+            else:
+                params[name] = payload
+        return params
+    return dict(parse_qsl(body.decode(), keep_blank_values=True))
+
+
+def json_param(params: dict, name: str, default: object = None) -> object:
+    # Сложные параметры PTB передаёт строкой JSON
+    value = params.get(name, default)
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def update_chat_id(update: dict) -> int | None:
+    # Чат, в который бот ответит на обновление
+    message = update.get('message') or (
+        update.get('callback_query') or {}
+    ).get('message')
+    if not message:
+        return None
+    return message['chat']['id']
+
+
+async def post_json(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    url: SplitResult,
+    payload: dict,
+    secret: str | None,
+) -> int:
+    # POST обновления на webhook по открытому соединению; статус ответа
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    headers = [
+        f'POST {url.path or "/"} HTTP/1.1',
+        f'Host: {url.netloc}',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+    ]
+    if secret:
+        headers.append(f'X-Telegram-Bot-Api-Secret-Token: {secret}')
+    writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('webhook закрыл соединение')
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+class FakeBotApi:
+    # Локальная замена Telegram Bot API для нагрузочных тестов.
+    # Реализует методы, которыми пользуется бот, отвечает как Telegram
+    # и умеет имитировать сеть:
+    # - latency/jitter — время ответа методов отправки, с;
+    # - retry_rate — доля запросов отправки, на которые приходит 429
+    #   с retry_after секунд;
+    # - upload_rate — общая скорость загрузки файлов, байт/с (запросы
+    #   с файлами ждут, пока «канал» не освободится).
+    # Обновления добавляются через inject (или POST /inject) и отдаются
+    # через getUpdates или, после setWebhook, отправляются POST-запросами
+    # на webhook — не больше max_connections одновременно, как у
+    # Telegram. Статистика — GET /stats, в том числе время от inject до
+    # первого ответа бота в тот же чат (точно, если на каждое обновление
+    # бот отвечает одним сообщением).
+
+    def __init__(
+        self,
+        latency: float = 0,
+        jitter: float = 0,
+        retry_rate: float = 0,
+        retry_after: int = 1,
+        upload_rate: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_rate = retry_rate
+        self.retry_after = retry_after
+        self.upload_rate = upload_rate
+        self.calls: dict[str, int] = {}
+        self.errors: dict[int, int] = {}
+        self.uploaded = 0
+        self._random = random.Random(seed)
+        self._updates: list[dict] = []
+        self._update_ids = itertools.count(1)
+        self._new_updates = asyncio.Event()
+        self._message_ids: dict[int, int] = {}
+        self._file_ids = itertools.count(1)
+        self._upload_free_at = 0.0
+        self._server: asyncio.Server | None = None
+        self.webhook: dict | None = None
+        self.webhook_errors = 0
+        self._webhook_queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._webhook_tasks: list[asyncio.Task] = []
+        # Время inject обновлений, на которые бот ещё не ответил, по чатам
+        self._awaiting: dict[int, deque[float]] = {}
+        self.reply_latencies: list[float] = []
+
+    # --- обновления ---
+
+    def inject(self, update: dict) -> int:
+        # Поставить обновление в очередь getUpdates; update_id
+        # назначается сервером
+        update = {**update, 'update_id': next(self._update_ids)}
+        chat_id = update_chat_id(update)
+        if chat_id is not None:
+            self._awaiting.setdefault(chat_id, deque()).append(
+                time.perf_counter()
+            )
+        if self.webhook is not None:
+            self._webhook_queue.put_nowait(update)
+        else:
+            self._updates.append(update)
+            self._new_updates.set()
+        return update['update_id']
+
+    def replied(self, chat_id: int) -> None:
+        awaiting = self._awaiting.get(chat_id)
+        if awaiting:
+            self.reply_latencies.append(
+                (time.perf_counter() - awaiting.popleft()) * 1000
+            )
+
+    async def get_updates(self, params: dict) -> list[dict]:
+        if self.webhook is not None:
+            raise ApiError(
+                409,
+                "Conflict: can't use getUpdates method while webhook is "
+                'active; use deleteWebhook to delete the webhook first',
+            )
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        if offset:
+            # Обновления до offset подтверждены клиентом
+            self._updates = [
+                u for u in self._updates if u['update_id'] >= offset
+            ]
+        if not self._updates and timeout > 0:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    # --- webhook ---
+
+    def set_webhook(self, params: dict) -> None:
+        url = str(params.get('url') or '')
+        if not url:
+            self.delete_webhook(params)
+            return
+        if not url.startswith(('http://', 'https://')):
+            raise ApiError(400, 'Bad Request: bad webhook: invalid URL')
+        self.stop_webhook()
+        self.webhook = {
+            'url': url,
+            'secret_token': params.get('secret_token'),
+            'max_connections': int(params.get('max_connections') or 40),
+        }
+        if params.get('drop_pending_updates') in (True, 'true', 'True'):
+            self._updates.clear()
+        for update in self._updates:
+            self._webhook_queue.put_nowait(update)
+        self._updates.clear()
+        self._webhook_tasks = [
+            asyncio.create_task(self.deliver())
+            for _ in range(self.webhook['max_connections'])
+        ]
+        logger.info(f'[API] Webhook: {url}')
+
+    def delete_webhook(self, params: dict) -> None:
+        self.stop_webhook()
+        self.webhook = None
+        # Недоставленные обновления снова доступны через getUpdates
+        while not self._webhook_queue.empty():
+            self._updates.append(self._webhook_queue.get_nowait())
+        if params.get('drop_pending_updates') in (True, 'true', 'True'):
+            self._updates.clear()
+        self._updates.sort(key=lambda update: update['update_id'])
+
+    def stop_webhook(self) -> None:
+        for task in self._webhook_tasks:
+            task.cancel()
+        self._webhook_tasks = []
+
+    async def deliver(self) -> None:
+        # Одно соединение с webhook: обновления по очереди, при ошибке —
+        # повтор того же обновления
+        assert self.webhook is not None
+        url = urlsplit(self.webhook['url'])
+        secret = self.webhook['secret_token']
+        writer: asyncio.StreamWriter | None = None
+        try:
+            while True:
+                update = await self._webhook_queue.get()
+                while True:
+                    try:
+                        if writer is None:
+                            reader, writer = await asyncio.open_connection(
+                                url.hostname, url.port or 80
+                            )
+                        status = await post_json(
+                            reader, writer, url, update, secret
+                        )
+                        if status == 200:
+                            break
+                    except (OSError, ValueError,
+                            asyncio.IncompleteReadError):
+                        if writer is not None:
+                            writer.close()
+                        writer = None
+                    self.webhook_errors += 1
+                    await asyncio.sleep(WEBHOOK_RETRY_DELAY)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    # --- ответы ---
+
+    def message(self, params: dict, **fields: object) -> dict:
+        chat_id = int(params.get('chat_id') or 0)
+        message_id = params.get('message_id')
+        if message_id is None:
+            message_id = self._message_ids.get(chat_id, 0) + 1
+            self._message_ids[chat_id] = message_id
+        result = {
+            'message_id': int(message_id),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+        }
+        result.update(fields)
+        return result
+
+    def photo(self) -> list[dict]:
+        # Telegram возвращает несколько размеров; бот берёт последний
+        file_id = f'local-{next(self._file_ids)}'
+        return [{
+            'file_id': file_id, 'file_unique_id': file_id,
+            'width': 1280, 'height': 960,
+        }]
+
+    async def call(self, method: str, params: dict) -> object:
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'setWebhook':
+            self.set_webhook(params)
+            return True
+        if method == 'deleteWebhook':
+            self.delete_webhook(params)
+            return True
+        if method == 'getWebhookInfo':
+            return {
+                'url': self.webhook['url'] if self.webhook else '',
+                'has_custom_certificate': False,
+                'pending_update_count': (
+                    len(self._updates) + self._webhook_queue.qsize()
+                ),
+            }
+        if method in ('close', 'logOut'):
+            return True
+        if method == 'getUpdates':
+            return await self.get_updates(params)
+        if method not in SEND_METHODS:
+            raise ApiError(404, 'Not Found: method not found')
+
+        limited = bool(
+            self.retry_rate and self._random.random() < self.retry_rate
+        )
+        if not limited and method != 'answerCallbackQuery':
+            # Ответ бота дошёл до Telegram в момент запроса
+            if 'chat_id' in params:
+                self.replied(int(params['chat_id']))
+        if self.latency or self.jitter:
+            await asyncio.sleep(
+                self.latency + self._random.uniform(0, self.jitter)
+            )
+        if limited:
+            raise ApiError(
+                429,
+                f'Too Many Requests: retry after {self.retry_after}',
+                self.retry_after,
+            )
+
+        if method == 'answerCallbackQuery':
+            return True
+        if 'chat_id' not in params and 'message_id' not in params:
+            raise ApiError(400, 'Bad Request: chat_id is empty')
+        if method == 'sendMessage':
+            return self.message(params, text=params.get('text', ''))
+        if method == 'editMessageText':
+            return self.message(params, text=params.get('text', ''))
+        if method == 'sendPhoto':
+            return self.message(
+                params, photo=self.photo(), caption=params.get('caption')
+            )
+        if method == 'editMessageMedia':
+            return self.message(params, photo=self.photo())
+        # sendMediaGroup
+        media = json_param(params, 'media', [])
+        if not isinstance(media, list) or not 2 <= len(media) <= 10:
+            raise ApiError(
+                400, 'Bad Request: media must include 2-10 items'
+            )
+        return [self.message(params, photo=self.photo()) for _ in media]
+
+    async def upload(self, size: int) -> None:
+        # Общий канал загрузки: запросы с файлами передаются по очереди
+        if not self.upload_rate:
+            return
+        loop = asyncio.get_running_loop()
+        start = max(loop.time(), self._upload_free_at)
+        self._upload_free_at = start + size / self.upload_rate
+        await asyncio.sleep(self._upload_free_at - loop.time())
+
+    async def respond(
+        self, path: str, content_type: str, body: bytes
+    ) -> tuple[int, object]:
+        # Статус HTTP и тело ответа для запроса к path
+        route = urlsplit(path).path
+        if route == '/stats':
+            return 200, self.stats()
+        if route == '/inject':
+            updates = json.loads(body or b'[]')
+            if isinstance(updates, dict):
+                updates = [updates]
+            return 200, {
+                'ok': True, 'result': [self.inject(u) for u in updates]
+            }
+
+        # /bot<token>/<method>
+        parts = route.strip('/').split('/')
+        if len(parts) != 2 or not parts[0].startswith('bot'):
+            return 404, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found'
+            }
+        method = parts[1]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        try:
+            params = parse_body(content_type, body)
+            if content_type.startswith('multipart/form-data'):
+                self.uploaded += len(body)
+                await self.upload(len(body))
+            result = await self.call(method, params)
+        except ApiError as e:
+            self.errors[e.code] = self.errors.get(e.code, 0) + 1
+            payload: dict = {
+                'ok': False, 'error_code': e.code,
+                'description': e.description,
+            }
+            if e.retry_after is not None:
+                payload['parameters'] = {'retry_after': e.retry_after}
+            return e.code, payload
+        except ValueError as e:
+            return 400, {
+                'ok': False, 'error_code': 400,
+                'description': f'Bad Request: {e}',
+            }
+        return 200, {'ok': True, 'result': result}
+
+    def stats(self) -> dict:
+        return {
+            'calls': dict(sorted(self.calls.items())),
+            'errors': self.errors,
+            'uploaded_bytes': self.uploaded,
+            'pending_updates': (
+                len(self._updates) + self._webhook_queue.qsize()
+            ),
+            'webhook': self.webhook['url'] if self.webhook else None,
+            'webhook_errors': self.webhook_errors,
+            'replies': len(self.reply_latencies),
+        }
+
+    # --- HTTP ---
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # HTTP/1.1 с keep-alive: httpx держит соединения открытыми
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await self.read_body(reader, headers)
+                _, path, _ = request_line.decode('latin-1').split(' ', 2)
+                status, payload = await self.respond(
+                    path, headers.get('content-type', ''), body
+                )
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}'
+                    f'\r\nContent-Type: application/json'
+                    f'\r\nContent-Length: {len(data)}\r\n\r\n'.encode()
+                    + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Остановка цикла событий при открытом long polling: задача
+            # соединения — верхнего уровня, отмену дальше не передаём
+            pass
+        except Exception:
+            logger.exception('[API] Ошибка обработки запроса')
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_body(
+        reader: asyncio.StreamReader, headers: dict[str, str]
+    ) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks: list[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            return b''.join(chunks)
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY:
+            raise ValueError(f'Слишком большой запрос: {length}')
+        return await reader.readexactly(length)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        # Запуск сервера; возвращает порт (0 — любой свободный)
+        self._server = await asyncio.start_server(
+            self.handle_connection, host, port
+        )
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.stop_webhook()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def feed_traffic(api: FakeBotApi, path: Path, speed: float) -> None:
+    # Подача записанного журнала (TRAFFIC_LOG_PATH) в getUpdates
+    # с исходными интервалами, ускоренными в speed раз (0 — сразу)
+    records = sorted(read_traffic(path), key=lambda record: record.time)
+    if not records:
+        return
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for record in records:
+        if speed > 0:
+            delay = (record.time - records[0].time) / speed - (
+                loop.time() - started
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+        api.inject(record.update)
+    logger.info(f'[API] Журнал {path} подан: {len(records)} обновлений')
+
+
+async def serve(args: argparse.Namespace) -> None:
+    api = FakeBotApi(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        retry_rate=args.retry_rate,
+        retry_after=args.retry_after,
+        upload_rate=args.upload_kbps * 1024,
+    )
+    port = await api.start(args.host, args.port)
+    logger.info(
+        f'[API] Bot API на http://{args.host}:{port}/bot '
+        f'(TELEGRAM_API_URL)'
+    )
+    tasks = []
+    if args.traffic:
+        tasks.append(asyncio.create_task(
+            feed_traffic(api, args.traffic, args.speed)
+        ))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await api.stop()
+        logger.info(f'[API] Статистика: {api.stats()}')
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Локальный Bot API для нагрузочных тестов бота.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='время ответа методов отправки, мс'
+    )
+    parser.add_argument(
+        '--jitter', type=float, default=0,
+        help='случайная добавка к задержке, мс'
+    )
+    parser.add_argument(
+        '--retry-rate', type=float, default=0,
+        help='доля запросов отправки с ответом 429'
+    )
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument(
+        '--upload-kbps', type=float, default=0,
+        help='скорость загрузки файлов, КиБ/с (0 — без ограничения)'
+    )
+    parser.add_argument(
+        '--traffic', type=Path,
+        help='журнал обновлений для getUpdates (TRAFFIC_LOG_PATH)'
+    )
+    parser.add_argument('--speed', type=float, default=1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO,
+    )
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
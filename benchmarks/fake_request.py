@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from telegram.request import BaseRequest, RequestData
+
+BOT_USER = {
+    'id': 1, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'
+}
+MESSAGE = {
+    'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'}
+}
+
+
+class FakeRequest(BaseRequest):
+    # Отвечает сразу, без сети: время запроса — только работа PTB.
+    # getMe возвращает бота, sendMediaGroup — по сообщению на фото,
+    # answerCallbackQuery — True, остальные методы — отправленное
+    # сообщение. latency — имитация времени ответа Telegram, с.
+
+    def __init__(self, latency: float = 0) -> None:
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        # Тело последнего запроса
+        self.payload = b''
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout=None,
+        write_timeout=None,
+        connect_timeout=None,
+        pool_timeout=None,
+    ) -> tuple[int, bytes]:
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result: object = MESSAGE
+        if request_data is not None:
+            # Тело запроса собирается, как перед отправкой в сеть, чтобы
+            # сериализация параметров входила в измеряемое время
+            self.payload = request_data.json_payload
+            if endpoint == 'sendMediaGroup':
+                media = request_data.parameters.get('media') or []
+                result = [MESSAGE] * len(media)
+        if endpoint == 'getMe':
+            result = BOT_USER
+        elif endpoint == 'answerCallbackQuery':
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from benchmarks.bench_e2e import Errors, build_app, percentile
+from bot.config import CALCULATOR_MODE, UPDATE_WORKERS
+from bot.utils.image_catalog import image_catalog
+from bot.utils.traffic_log import Record, read_traffic
+from bot.utils.update_processor import ChatOrderedUpdateProcessor
+
+# Группа обработчика, который отмечает окончание обработки обновления:
+# после всех обработчиков бота
+DONE_GROUP = 1000
+
+
+class Tracker:
+    # Время постановки обновления в очередь и окончания его обработки
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.queued: dict[int, float] = {}
+        self.latencies: list[float] = []
+        self.finished = asyncio.Event()
+
+    async def done(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        queued = self.queued.pop(update.update_id, None)
+        if queued is not None:
+            self.latencies.append((time.perf_counter() - queued) * 1000)
+        if len(self.latencies) >= self.total:
+            self.finished.set()
+
+
+async def replay(
+    app: Application, records: list[Record], speed: float
+) -> tuple[Tracker, float]:
+    # Подача обновлений в очередь приложения с исходными интервалами,
+    # ускоренными в speed раз (0 — без пауз). Возвращает замеры и общее
+    # время воспроизведения, с.
+    tracker = Tracker(len(records))
+    app.add_handler(TypeHandler(Update, tracker.done), group=DONE_GROUP)
+    async with app:
+        await app.start()
+        updates = [Update.de_json(r.update, app.bot) for r in records]
+        first = records[0].time
+        started = time.perf_counter()
+        for record, update in zip(records, updates):
+            if speed > 0:
+                delay = (record.time - first) / speed - (
+                    time.perf_counter() - started
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tracker.queued[update.update_id] = time.perf_counter()
+            await app.update_queue.put(update)
+        await tracker.finished.wait()
+        elapsed = time.perf_counter() - started
+        await app.stop()
+    return tracker, elapsed
+
+
+def renumber(records: list[Record]) -> list[Record]:
+    # update_id должны быть уникальны: журнал мог быть дописан после
+    # перезапуска бота
+    return [
+        Record(record.time, {**record.update, 'update_id': number})
+        for number, record in enumerate(records, 1)
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Воспроизведение журнала обновлений (TRAFFIC_LOG_PATH) '
+            'на приложении бота без обращения к Telegram.'
+        )
+    )
+    parser.add_argument('log', type=Path, help='журнал .jsonl или .jsonl.gz')
+    parser.add_argument(
+        '--speed', type=float, default=1,
+        help='ускорение относительно записи; 0 — максимальная скорость'
+    )
+    parser.add_argument(
+        '--api-latency', type=float, default=0,
+        help='время ответа Bot API, мс'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=UPDATE_WORKERS,
+        help='одновременно обрабатываемых чатов (1 — последовательно)'
+    )
+    parser.add_argument(
+        '--calculator-mode', choices=('reply', 'inline'),
+        default=CALCULATOR_MODE
+    )
+    args = parser.parse_args(argv)
+
+    records = renumber(
+        sorted(read_traffic(args.log), key=lambda record: record.time)
+    )
+    if not records:
+        parser.error(f'В журнале {args.log} нет обновлений')
+
+    image_catalog.load()
+    errors = Errors()
+    app = build_app(
+        args.calculator_mode, errors, args.api_latency / 1000, args.workers
+    )
+    tracker, elapsed = asyncio.run(replay(app, records, args.speed))
+
+    latencies = tracker.latencies
+    span = records[-1].time - records[0].time
+    print(
+        f'Обновлений: {len(records)}, в записи {span:.1f} с, '
+        f'воспроизведено за {elapsed:.1f} с'
+    )
+    print(f'Пропускная способность: {len(records) / elapsed:.0f} обновлений/с')
+    print(
+        f'Задержка, мс: p50 {percentile(latencies, 0.5):.2f}, '
+        f'p95 {percentile(latencies, 0.95):.2f}, '
+        f'p99 {percentile(latencies, 0.99):.2f}, '
+        f'макс. {max(latencies):.2f}'
+    )
+    print(
+        f'Ошибок: {errors.count} '
+        f'({errors.count / len(records):.2%} обновлений)'
+    )
+    if errors.first is not None:
+        print(f'Первая ошибка: {errors.first!r}')
+    processor = app.update_processor
+    if isinstance(processor, ChatOrderedUpdateProcessor):
+        stats = processor.stats()
+        print(
+            f'Очередь: макс. {stats["max_waiting"]} обновлений; '
+            f'ожидание своего чата, мс: p50 {stats["chat_wait_p50"]}, '
+            f'p99 {stats["chat_wait_p99"]}; обработчика, мс: '
+            f'p50 {stats["worker_wait_p50"]}, p99 {stats["worker_wait_p99"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 
 from dotenv import load_dotenv
+from telegram.constants import MediaGroupLimit
 
 # Загружаем переменные из .env
 env_path = Path(__file__).resolve().parent.parent / ".env"
@@ -16,6 +17,142 @@ DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 BASE_DIR = Path(__file__).resolve().parent.parent
 IMAGE_DIR = BASE_DIR / 'data' / 'images'
 
+# Оптимизированные копии примеров (python -m bot.tools.optimize_images)
+OPTIMIZED_IMAGE_DIR = Path(
+    os.getenv('OPTIMIZED_IMAGE_DIR', BASE_DIR / 'data' / 'optimized')
+)
+# Метка полного набора оптимизированных копий
+OPTIMIZED_READY = OPTIMIZED_IMAGE_DIR / '.complete'
+
+# Бандл примеров (python -m bot.tools.pack_images). Если файл есть,
+# изображения отдаются из него, а не из папок.
+ASSET_BUNDLE_PATH = Path(
+    os.getenv('ASSET_BUNDLE_PATH', BASE_DIR / 'data' / 'examples.bundle')
+)
+
+# Коллажи-превью стилей (python -m bot.tools.build_collages)
+COLLAGE_DIR = Path(os.getenv('COLLAGE_DIR', BASE_DIR / 'data' / 'collages'))
+
+# Прогрев кэша file_id при старте: служебный чат, куда загружаются все
+# примеры (0 — прогрев выключен), число одновременных загрузок и
+# максимальная частота загрузок в секунду
+FILE_ID_CACHE_CHAT_ID = int(os.getenv('FILE_ID_CACHE_CHAT_ID', '0'))
+PREWARM_CONCURRENCY = int(os.getenv('PREWARM_CONCURRENCY', '4'))
+PREWARM_RATE = float(os.getenv('PREWARM_RATE', '1'))
+
+# Индекс примеров: сколько изображений хранить на стиль, сколько
+# отправлять первым альбомом (остальные — в галерее; в альбоме Telegram
+# от 2 до 10 фото, значение вне этих границ ограничивается) и как часто
+# проверять папки на изменения (в секундах)
+EXAMPLES_LIMIT = int(os.getenv('EXAMPLES_LIMIT', '100'))
+EXAMPLES_ALBUM_SIZE = max(
+    int(MediaGroupLimit.MIN_MEDIA_LENGTH),
+    min(
+        int(MediaGroupLimit.MAX_MEDIA_LENGTH),
+        int(os.getenv('EXAMPLES_ALBUM_SIZE', '5')),
+    ),
+)
+CATALOG_REFRESH_INTERVAL = float(os.getenv('CATALOG_REFRESH_INTERVAL', '60'))
+
+# Объём памяти под кэш содержимого изображений (в мегабайтах)
+IMAGE_CACHE_MB = int(os.getenv('IMAGE_CACHE_MB', '64'))
+
+# Файл прайса и интервал проверки его изменений (в секундах).
+# Прайс также перечитывается по сигналу SIGHUP.
+PRICES_PATH = Path(os.getenv('PRICES_PATH', BASE_DIR / 'data' / 'prices.json'))
+PRICES_REFRESH_INTERVAL = float(os.getenv('PRICES_REFRESH_INTERVAL', '30'))
+
+# Режим калькулятора: reply — пошаговый диалог с обычными клавиатурами,
+# inline — одно сообщение с inline-кнопками, которое редактируется
+CALCULATOR_MODE = os.getenv('CALCULATOR_MODE', 'reply').lower()
+
+# Число готовых сводок заказа в кэше
+SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', '1024'))
+
+# Адрес Bot API (по умолчанию — Telegram). Для нагрузочных тестов —
+# локальный сервер: python -m benchmarks.fake_api, адрес
+# http://127.0.0.1:8081/bot
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
+# Получение обновлений: polling — запросы getUpdates, webhook — Telegram
+# сам присылает обновления на встроенный HTTP-сервер бота (нужен пакет
+# tornado). Переключение в любую сторону — сменой UPDATE_MODE и
+# перезапуском: webhook устанавливается или удаляется при старте, а
+# накопившиеся обновления сохраняются.
+UPDATE_MODE = os.getenv('UPDATE_MODE', 'polling').lower()
+# Адрес и порт встроенного сервера, путь webhook, внешний адрес, по
+# которому сервер доступен Telegram (без пути), секрет для заголовка
+# X-Telegram-Bot-Api-Secret-Token и число одновременных соединений
+# Telegram с webhook (1–100)
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram').strip('/')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# Сколько обновлений разных чатов обрабатывать одновременно.
+# Обновления одного чата всегда обрабатываются по очереди;
+# 1 — все обновления строго последовательно.
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', '8'))
+
+# Пулы соединений с Bot API: обычные вызовы, загрузки файлов (отдельно,
+# чтобы долгие загрузки фото не занимали соединения для ответов) и
+# long polling. Размеры пулов, сколько соединений держать открытыми и
+# сколько секунд, тайм-ауты в секундах (pool — ожидание свободного
+# соединения) и версия HTTP (2 — нужен пакет httpx[http2]).
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '64'))
+HTTP_POOL_KEEPALIVE = int(os.getenv('HTTP_POOL_KEEPALIVE', '16'))
+HTTP_MEDIA_POOL_SIZE = int(os.getenv('HTTP_MEDIA_POOL_SIZE', '8'))
+HTTP_POLLING_POOL_SIZE = int(os.getenv('HTTP_POLLING_POOL_SIZE', '1'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '5'))
+HTTP_WRITE_TIMEOUT = float(os.getenv('HTTP_WRITE_TIMEOUT', '5'))
+HTTP_MEDIA_WRITE_TIMEOUT = float(
+    os.getenv('HTTP_MEDIA_WRITE_TIMEOUT', '30')
+)
+HTTP_POOL_TIMEOUT = float(os.getenv('HTTP_POOL_TIMEOUT', '3'))
+HTTP_VERSION = os.getenv('HTTP_VERSION', '1.1')
+
+# Ограничение исходящих сообщений: не больше RATE_LIMIT_GLOBAL в секунду
+# всего и RATE_LIMIT_CHAT в секунду в один чат (подряд — до
+# RATE_LIMIT_CHAT_BURST), число повторов после RetryAfter.
+# RATE_LIMIT_GLOBAL=0 — без ограничения.
+RATE_LIMIT_GLOBAL = float(os.getenv('RATE_LIMIT_GLOBAL', '30'))
+RATE_LIMIT_CHAT = float(os.getenv('RATE_LIMIT_CHAT', '1'))
+RATE_LIMIT_CHAT_BURST = float(os.getenv('RATE_LIMIT_CHAT_BURST', '3'))
+RATE_LIMIT_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', '3'))
+
+# Журнал входящих обновлений для воспроизведения нагрузки
+# (benchmarks/replay.py). Пусто — запись выключена; .gz — сжатый журнал.
+# Накопленные строки дописываются в файл раз в
+# TRAFFIC_LOG_FLUSH_INTERVAL секунд.
+TRAFFIC_LOG_PATH = os.getenv('TRAFFIC_LOG_PATH', '')
+TRAFFIC_LOG_FLUSH_INTERVAL = float(
+    os.getenv('TRAFFIC_LOG_FLUSH_INTERVAL', '1')
+)
+
+# Хранилище незавершённых заказов и шагов сценариев (SQLite), чтобы они
+# переживали перезапуск. Пусто — состояние только в памяти. Изменения
+# записываются пачкой раз в PERSISTENCE_INTERVAL секунд и при остановке.
+PERSISTENCE_PATH = os.getenv(
+    'PERSISTENCE_PATH', str(BASE_DIR / 'data' / 'state.sqlite3')
+)
+PERSISTENCE_INTERVAL = float(os.getenv('PERSISTENCE_INTERVAL', '10'))
+
+# Кэш Telegram file_id для загруженных изображений
+FILE_ID_CACHE_PATH = Path(
+    os.getenv('FILE_ID_CACHE_PATH', BASE_DIR / 'data' / 'file_ids.json')
+)
+
 # Проверка, если токен не найден — ошибка
 if not TELEGRAM_TOKEN:
     raise ValueError("TELEGRAM_TOKEN не найден в .env файле.")
+
+if UPDATE_WORKERS < 1:
+    raise ValueError('UPDATE_WORKERS должно быть не меньше 1.')
+if UPDATE_MODE not in ('polling', 'webhook'):
+    raise ValueError(f'Неизвестный UPDATE_MODE: {UPDATE_MODE}')
+if UPDATE_MODE == 'webhook' and not WEBHOOK_URL:
+    raise ValueError('Для UPDATE_MODE=webhook нужен WEBHOOK_URL.')
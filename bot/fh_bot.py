@@ -1,10 +1,73 @@
+import asyncio
 import logging
+import signal
 import sys
+import time
+from pathlib import Path
 
-from telegram.ext import ApplicationBuilder
+from telegram import Update
+from telegram.ext import Application, ApplicationBuilder, TypeHandler
 
-from bot.config import TELEGRAM_TOKEN
+from bot.config import (
+    ADMIN_ID,
+    CATALOG_REFRESH_INTERVAL,
+    FILE_ID_CACHE_CHAT_ID,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MEDIA_POOL_SIZE,
+    HTTP_MEDIA_WRITE_TIMEOUT,
+    HTTP_POLLING_POOL_SIZE,
+    HTTP_POOL_KEEPALIVE,
+    HTTP_POOL_SIZE,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_VERSION,
+    HTTP_WRITE_TIMEOUT,
+    PERSISTENCE_INTERVAL,
+    PERSISTENCE_PATH,
+    PREWARM_CONCURRENCY,
+    PREWARM_RATE,
+    PRICES_REFRESH_INTERVAL,
+    RATE_LIMIT_CHAT,
+    RATE_LIMIT_CHAT_BURST,
+    RATE_LIMIT_GLOBAL,
+    RATE_LIMIT_RETRIES,
+    TELEGRAM_API_URL,
+    TELEGRAM_TOKEN,
+    TRAFFIC_LOG_FLUSH_INTERVAL,
+    TRAFFIC_LOG_PATH,
+    UPDATE_MODE,
+    UPDATE_WORKERS,
+    WEBHOOK_LISTEN,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from bot.handlers.examples import prewarm_examples
 from bot.handlers.registry import register_handlers
+from bot.keyboards.common import MAIN_MENU_BUTTON
+from bot.keyboards.main_menu import (
+    CALCULATOR_BUTTON,
+    CONTACT_BUTTON,
+    EXAMPLES_BUTTON,
+)
+from bot.keyboards.registry import PreparedMarkupBot, keyboard_registry
+from bot.utils.file_id_cache import file_id_cache
+from bot.utils.http_pools import MeteredRequest, PoolConfig, RoutedRequest
+from bot.utils.image_cache import image_cache
+from bot.utils.image_catalog import image_catalog
+from bot.utils.persistence import SQLitePersistence
+from bot.utils.price_store import price_store
+from bot.utils.rate_limiter import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    OutboundRateLimiter,
+)
+from bot.utils.summary_cache import summary_cache
+from bot.utils.traffic_log import TrafficRecorder
+from bot.utils.update_processor import ChatOrderedUpdateProcessor
 
 # Настройка логгирования
 logging.basicConfig(
@@ -14,13 +77,191 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Фоновые задачи, которые живут всё время работы бота
+background_tasks: list[asyncio.Task] = []
+# Запись входящих обновлений (TRAFFIC_LOG_PATH)
+traffic_recorder: TrafficRecorder | None = None
+
+
+def examples_changed() -> None:
+    # Файлы примеров изменились: сбросить кэш содержимого и сверить
+    # file_id с файлами (в пуле потоков)
+    image_cache.clear()
+    file_id_cache.schedule_revalidate()
+
+
+async def post_init(app: Application) -> None:
+    # Прогрев кэша file_id и запуск фоновых задач перед началом
+    # получения обновлений
+    if FILE_ID_CACHE_CHAT_ID:
+        logger.info('Прогрев кэша file_id...')
+        started = time.monotonic()
+        uploaded, failed = await prewarm_examples(
+            app.bot, FILE_ID_CACHE_CHAT_ID, PREWARM_CONCURRENCY, PREWARM_RATE
+        )
+        logger.info(
+            f'Прогрев завершён за {time.monotonic() - started:.1f} с: '
+            f'загружено {uploaded}, ошибок {failed}, '
+            f'всего в кэше {len(file_id_cache)}'
+        )
+
+    background_tasks.append(
+        asyncio.create_task(image_catalog.watch(
+            CATALOG_REFRESH_INTERVAL, on_change=examples_changed
+        ))
+    )
+    background_tasks.append(
+        asyncio.create_task(price_store.watch(PRICES_REFRESH_INTERVAL))
+    )
+    # Прайс перечитывается в потоке: сводки вытесненной версии
+    # удаляются в цикле событий
+    loop = asyncio.get_running_loop()
+    price_store.on_evict = lambda version: loop.call_soon_threadsafe(
+        summary_cache.drop_version, version
+    )
+    # SIGHUP — перечитать прайс, не дожидаясь проверки по расписанию
+    if hasattr(signal, 'SIGHUP'):
+        loop.add_signal_handler(
+            signal.SIGHUP, price_store.request_reload
+        )
+
+
+async def post_stop(app: Application) -> None:
+    # Остановка фоновых задач
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await file_id_cache.flush()
+    logger.info(f'Статистика кэша изображений: {image_cache.stats()}')
+    logger.info(f'Статистика кэша сводок: {summary_cache.stats()}')
+    logger.info(f'Статистика клавиатур: {keyboard_registry.stats()}')
+    if traffic_recorder is not None:
+        await traffic_recorder.close()
+
+
+def recorded_texts() -> set[str]:
+    # Тексты кнопок, которые журнал обновлений сохраняет как есть
+    pricing = price_store.current()
+    return {
+        MAIN_MENU_BUTTON, CALCULATOR_BUTTON, EXAMPLES_BUTTON,
+        CONTACT_BUTTON, 'Готово', *pricing.sizes, *pricing.styles,
+        *pricing.extra_options,
+    }
+
+
+def build_requests() -> tuple[RoutedRequest, MeteredRequest]:
+    # Пулы соединений: обычные вызовы и загрузки файлов, long polling
+    def pool(name: str, size: int, **timeouts: float) -> MeteredRequest:
+        return MeteredRequest(name, PoolConfig(
+            size=size,
+            keepalive=min(size, HTTP_POOL_KEEPALIVE),
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            connect_timeout=HTTP_CONNECT_TIMEOUT,
+            pool_timeout=HTTP_POOL_TIMEOUT,
+            http_version=HTTP_VERSION,
+            **timeouts,
+        ))
+
+    regular = pool(
+        'regular', HTTP_POOL_SIZE,
+        read_timeout=HTTP_READ_TIMEOUT, write_timeout=HTTP_WRITE_TIMEOUT,
+    )
+    media = pool(
+        'media', HTTP_MEDIA_POOL_SIZE,
+        read_timeout=HTTP_READ_TIMEOUT,
+        write_timeout=HTTP_MEDIA_WRITE_TIMEOUT,
+    )
+    polling = pool(
+        'polling', HTTP_POLLING_POOL_SIZE,
+        read_timeout=HTTP_READ_TIMEOUT, write_timeout=HTTP_WRITE_TIMEOUT,
+    )
+    return RoutedRequest(regular, media), polling
+
+
+def run(app: Application) -> None:
+    # Получение обновлений в режиме UPDATE_MODE. Webhook-сервер работает
+    # в том же цикле событий, что и обработчики.
+    if UPDATE_MODE == 'webhook':
+        logger.info(
+            f'Webhook {WEBHOOK_URL}/{WEBHOOK_PATH}, сервер '
+            f'{WEBHOOK_LISTEN}:{WEBHOOK_PORT}'
+        )
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f'{WEBHOOK_URL}/{WEBHOOK_PATH}',
+            secret_token=WEBHOOK_SECRET or None,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+    else:
+        app.run_polling()
+
 
 def main():
+    global traffic_recorder
     logger.info('Запуск бота...')
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
-    register_handlers(app)
+    file_id_cache.load()
+    image_catalog.load()
+    price_store.load()
+    request, polling_request = build_requests()
+    rate_limiter = None
+    if RATE_LIMIT_GLOBAL > 0:
+        # Сообщения менеджеру — в первую очередь, прогрев кэша — в
+        # последнюю
+        rate_limiter = OutboundRateLimiter(
+            RATE_LIMIT_GLOBAL,
+            RATE_LIMIT_CHAT,
+            RATE_LIMIT_CHAT_BURST,
+            RATE_LIMIT_RETRIES,
+            {ADMIN_ID: PRIORITY_HIGH, FILE_ID_CACHE_CHAT_ID: PRIORITY_LOW},
+        )
+    if TELEGRAM_API_URL:
+        logger.info(f'Bot API: {TELEGRAM_API_URL}')
+    # Бот собирается здесь, а не в ApplicationBuilder: клавиатуры
+    # отправляются готовым JSON (PreparedMarkupBot)
+    bot = PreparedMarkupBot(
+        TELEGRAM_TOKEN,
+        base_url=TELEGRAM_API_URL or 'https://api.telegram.org/bot',
+        request=request,
+        get_updates_request=polling_request,
+        rate_limiter=rate_limiter,
+    )
+    builder = (
+        ApplicationBuilder()
+        .bot(bot)
+        .post_init(post_init)
+        .post_stop(post_stop)
+    )
+    if UPDATE_WORKERS > 1:
+        # Разные чаты — параллельно, один чат — по очереди
+        builder = builder.concurrent_updates(
+            ChatOrderedUpdateProcessor(UPDATE_WORKERS)
+        )
+    persistence = None
+    if PERSISTENCE_PATH:
+        persistence = SQLitePersistence(
+            Path(PERSISTENCE_PATH), PERSISTENCE_INTERVAL
+        )
+        builder = builder.persistence(persistence)
+    app = builder.build()
+    fsm = register_handlers(app)
+    if persistence is not None:
+        persistence.attach(fsm)
+    if TRAFFIC_LOG_PATH:
+        # Группа -1 обрабатывается раньше остальных и не мешает им
+        traffic_recorder = TrafficRecorder(
+            Path(TRAFFIC_LOG_PATH),
+            recorded_texts(),
+            len(str(price_store.current().max_faces)),
+            TRAFFIC_LOG_FLUSH_INTERVAL,
+        )
+        app.add_handler(
+            TypeHandler(Update, traffic_recorder.record), group=-1
+        )
     logger.info('Бот успешно запущен. Ожидаем команды.')
-    app.run_polling()
+    run(app)
 
 
 if __name__ == '__main__':
@@ -1,13 +1,11 @@
 import logging
 from typing import cast
 
-from telegram import Message, ReplyKeyboardRemove, Update
+from telegram import Message, Update
 from telegram.ext import ContextTypes, ConversationHandler
 
-from bot.keyboards.calculator import (
-    option_keyboard, size_keyboard, style_keyboard
-)
-from bot.prices import AVAILABLE_SIZES, EXTRA_OPTIONS, STYLE_OPTIONS
+from bot.keyboards.calculator import calculator_keyboards
+from bot.keyboards.common import remove_keyboard
 from bot.states import (
     CHOOSING_FACE_COUNT,
     CHOOSING_OPTIONS,
@@ -16,10 +14,54 @@ from bot.states import (
 )
 from bot.utils.calculator import format_summary
 from bot.utils.decorators import ensure_message
+from bot.utils.price_store import price_store
+from bot.utils.pricing import PricingSnapshot
 
 logger = logging.getLogger(__name__)
 
 
+# Поля заказа в user_data
+ORDER_KEYS = ('size', 'style', 'faces', 'options')
+
+STALE_ORDER_TEXT = (
+    '⚠️ Прайс обновился, а начатый расчёт устарел. Начнём заново.'
+)
+
+
+def pinned_pricing(user_data: dict) -> PricingSnapshot | None:
+    # Прайс заказа. Заказ без версии закрепляется за текущим прайсом.
+    # None — версия заказа вытеснена из истории: цены выбранного уже
+    # неизвестны, расчёт нужно начать заново (restart_order).
+    version = user_data.get('pricing_version')
+    if version is None:
+        pricing = price_store.current()
+        user_data['pricing_version'] = pricing.version
+        return pricing
+    pricing = price_store.find(version)
+    if pricing is None:
+        logger.info(f'[CALC] Версия прайса заказа вытеснена: {version}')
+    return pricing
+
+
+def restart_order(user_data: dict) -> PricingSnapshot:
+    # Сброс заказа и закрепление за текущим прайсом
+    for key in ORDER_KEYS:
+        user_data.pop(key, None)
+    pricing = price_store.current()
+    user_data['pricing_version'] = pricing.version
+    return pricing
+
+
+async def restart_stale_order(message: Message, user_data: dict) -> int:
+    # Расчёт по вытесненному прайсу: сообщение и снова выбор размера
+    pricing = restart_order(user_data)
+    await message.reply_text(
+        f'{STALE_ORDER_TEXT}\n\n📐 Выберите размер холста:',
+        reply_markup=calculator_keyboards(pricing).size
+    )
+    return CHOOSING_SIZE
+
+
 @ensure_message
 async def start_calculator(
     update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -27,10 +69,14 @@ async def start_calculator(
     # Запуск калькулятора.
     assert update.message is not None
     message: Message = update.message
+    # Заказ считается по прайсу, действующему на момент начала
+    pricing = price_store.current()
+    user_data = cast(dict, context.user_data)
+    user_data['pricing_version'] = pricing.version
 
     await message.reply_text(
         '📐 Выберите размер холста:',
-        reply_markup=size_keyboard
+        reply_markup=calculator_keyboards(pricing).size
     )
     return CHOOSING_SIZE
 
@@ -43,20 +89,23 @@ async def size_chosen(
     assert update.message is not None
     message: Message = update.message
     size = message.text
+    user_data = cast(dict, context.user_data)
+    pricing = pinned_pricing(user_data)
+    if pricing is None:
+        return await restart_stale_order(message, user_data)
 
-    if size not in AVAILABLE_SIZES:
+    if size not in pricing.sizes:
         await message.reply_text(
             'Пожалуйста, выберите размер из предложенных.'
         )
         return CHOOSING_SIZE
 
-    user_data = cast(dict, context.user_data)
     user_data['size'] = size
     logger.info(f'Пользователь выбрал размер: {size}')
 
     await message.reply_text(
         f'✅ Выбран размер - {size}.\n Какой стиль портрета Вас интересует:',
-        reply_markup=style_keyboard
+        reply_markup=calculator_keyboards(pricing).style
     )
     return CHOOSING_STYLE
 
@@ -69,30 +118,32 @@ async def style_chosen(
     assert update.message is not None
     message: Message = update.message
     style = message.text
+    user_data = cast(dict, context.user_data)
+    pricing = pinned_pricing(user_data)
+    if pricing is None:
+        return await restart_stale_order(message, user_data)
 
-    if style not in STYLE_OPTIONS:
+    if style not in pricing.styles:
         await message.reply_text(
             'Пожалуйста, выберите стиль из списка.'
         )
         return CHOOSING_STYLE
 
-    user_data = cast(dict, context.user_data)
     user_data['style'] = style
     logger.info(f'Выбран стиль: {style}')
 
-    if style != 'Просто фото на холсте':
+    if style in pricing.drawing_styles:
         await message.reply_text(
             '👤 Сколько лиц будет на портрете?\n'
-            '(Пожалуйста, введите число от 1 до 10.)'
+            f'(Пожалуйста, введите число от 1 до {pricing.max_faces}.)'
         )
         return CHOOSING_FACE_COUNT
     else:
-        user_data = cast(dict, context.user_data)
         user_data['faces'] = 0
         await message.reply_text(
             '✅ Стиль выбран.\n\nВам потребуется что-то дополнительно?'
             '\nКогда закончите выбор, нажмите "Готово".',
-            reply_markup=option_keyboard
+            reply_markup=calculator_keyboards(pricing).option
         )
         return CHOOSING_OPTIONS
 
@@ -105,25 +156,28 @@ async def face_count_chosen(
     assert update.message is not None
     message: Message = update.message
     text = message.text or ''
+    user_data = cast(dict, context.user_data)
+    pricing = pinned_pricing(user_data)
+    if pricing is None:
+        return await restart_stale_order(message, user_data)
 
     try:
         count = int(text)
-        if count < 1 or count > 10:
+        if count < 1 or count > pricing.max_faces:
             raise ValueError
     except ValueError:
         await message.reply_text(
-            'Пожалуйста, введите число от 1 до 10.'
+            f'Пожалуйста, введите число от 1 до {pricing.max_faces}.'
         )
         return CHOOSING_FACE_COUNT
 
-    user_data = cast(dict, context.user_data)
     user_data['faces'] = count
     logger.info(f'Выбрано лиц: {count}')
 
     await message.reply_text(
         '✅ Кол-во лиц сохранено.\n\nВам потребуется что-то дополнительно?'
         '\nКогда закончите выбор, нажмите "Готово".',
-        reply_markup=option_keyboard
+        reply_markup=calculator_keyboards(pricing).option
     )
     return CHOOSING_OPTIONS
 
@@ -137,18 +191,21 @@ async def options_chosen(
     message: Message = update.message
     selected = message.text or ''
     user_data = cast(dict, context.user_data)
+    pricing = pinned_pricing(user_data)
+    if pricing is None:
+        return await restart_stale_order(message, user_data)
 
     if selected == 'Готово':
         user_data.setdefault('options', [])
         logger.info(f'Итоговые данные: {context.user_data}')
         await message.reply_text(
             '✅ Выбор опций завершён.',
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=remove_keyboard
         )
         await summarize_order(update, context)  # сразу расчёт
         return ConversationHandler.END
 
-    if selected not in EXTRA_OPTIONS:
+    if selected not in pricing.extra_options:
         await message.reply_text(
             'Пожалуйста, выберите одну из доступных опций или '
             'нажмите "Готово".'
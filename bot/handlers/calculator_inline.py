@@ -0,0 +1,221 @@
+import logging
+from typing import cast
+
+from telegram import InlineKeyboardMarkup, Message, Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from bot.handlers.calculator import (
+    STALE_ORDER_TEXT,
+    pinned_pricing,
+    restart_order,
+)
+from bot.keyboards.calculator import (
+    inline_faces_keyboard,
+    inline_options_keyboard,
+    inline_size_keyboard,
+    inline_style_keyboard,
+    new_order_keyboard,
+)
+from bot.utils.calculator import calculate_total, format_summary
+from bot.utils.decorators import ensure_message
+from bot.utils.price_store import price_store
+from bot.utils.pricing import PricingSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Калькулятор в одном сообщении: каждый шаг редактирует это сообщение,
+# а не отправляет новое. Заказ хранится в user_data в тех же ключах,
+# что и у пошагового калькулятора, плюс шаг и id сообщения калькулятора.
+STEP_SIZE = 'size'
+STEP_STYLE = 'style'
+STEP_FACES = 'faces'
+STEP_OPTIONS = 'options'
+STEP_DONE = 'done'
+
+PROMPTS = {
+    STEP_SIZE: '📐 Выберите размер холста:',
+    STEP_STYLE: 'Какой стиль портрета Вас интересует?',
+    STEP_FACES: '👤 Сколько лиц будет на портрете?',
+    STEP_OPTIONS: (
+        'Вам потребуется что-то дополнительно?\n'
+        'Отметьте опции и нажмите "Готово".'
+    ),
+}
+
+
+def reset_order(user_data: dict) -> PricingSnapshot:
+    pricing = restart_order(user_data)
+    user_data['calc_step'] = STEP_SIZE
+    return pricing
+
+
+def render_step(
+    user_data: dict, pricing: PricingSnapshot
+) -> tuple[str, InlineKeyboardMarkup]:
+    # Текст и клавиатура текущего шага: выбранное и текущая сумма,
+    # затем вопрос шага
+    step = user_data.get('calc_step', STEP_SIZE)
+    if step == STEP_DONE:
+        return format_summary(user_data), new_order_keyboard
+
+    # В сводке только выбранное: до выбора числа лиц строки «Лиц» нет
+    size = user_data.get('size')
+    style = user_data.get('style')
+    faces_chosen = (
+        style not in pricing.drawing_styles or 'faces' in user_data
+    )
+    total = 0
+    lines: list[str] = []
+    if size and style and faces_chosen:
+        total, lines = calculate_total(user_data)
+    elif size:
+        total = pricing.base_prices.get(size, 0)
+        lines = [f'• Размер: {size} — {total} ₽']
+        if style:
+            lines.append(f'• Стиль: {style}')
+
+    if step == STEP_SIZE:
+        keyboard = inline_size_keyboard(pricing)
+    elif step == STEP_STYLE:
+        keyboard = inline_style_keyboard(pricing)
+    elif step == STEP_FACES:
+        keyboard = inline_faces_keyboard(pricing)
+    else:
+        mask = pricing.table.mask(user_data.get('options', [])) or 0
+        keyboard = inline_options_keyboard(pricing, mask)
+
+    text = PROMPTS[step]
+    if lines:
+        text = (
+            '🧾 Ваш заказ:\n' + '\n'.join(lines)
+            + f'\n💰 Сейчас: {total} ₽\n\n' + text
+        )
+    return text, keyboard
+
+
+def apply_action(
+    user_data: dict, pricing: PricingSnapshot, action: str, arg: str
+) -> bool:
+    # Изменение заказа по нажатой кнопке. False — кнопка не подходит
+    # к текущему шагу или индекс вне прайса.
+    step = user_data.get('calc_step', STEP_SIZE)
+    try:
+        index = int(arg) if arg else -1
+    except ValueError:
+        return False
+
+    if action == 'size' and step == STEP_SIZE:
+        if not 0 <= index < len(pricing.sizes):
+            return False
+        user_data['size'] = pricing.sizes[index]
+        user_data['calc_step'] = STEP_STYLE
+    elif action == 'style' and step == STEP_STYLE:
+        if not 0 <= index < len(pricing.styles):
+            return False
+        style = pricing.styles[index]
+        user_data['style'] = style
+        user_data.setdefault('options', [])
+        if style in pricing.drawing_styles:
+            # Число лиц выбирается заново (и после возврата к стилю)
+            user_data.pop('faces', None)
+            user_data['calc_step'] = STEP_FACES
+        else:
+            user_data['faces'] = 0
+            user_data['calc_step'] = STEP_OPTIONS
+    elif action == 'faces' and step == STEP_FACES:
+        if not 1 <= index <= pricing.max_faces:
+            return False
+        user_data['faces'] = index
+        user_data['calc_step'] = STEP_OPTIONS
+    elif action == 'opt' and step == STEP_OPTIONS:
+        if not 0 <= index < len(pricing.table.options):
+            return False
+        option = pricing.table.options[index]
+        options: list[str] = user_data.setdefault('options', [])
+        if option in options:
+            options.remove(option)
+        else:
+            options.append(option)
+    elif action == 'done' and step == STEP_OPTIONS:
+        user_data['calc_step'] = STEP_DONE
+        logger.info(f'[CALC] Итоговые данные: {user_data}')
+    elif action == 'back' and step in (STEP_STYLE, STEP_FACES, STEP_OPTIONS):
+        if step == STEP_STYLE:
+            user_data['calc_step'] = STEP_SIZE
+        elif (
+            step == STEP_OPTIONS
+            and user_data.get('style') in pricing.drawing_styles
+        ):
+            user_data['calc_step'] = STEP_FACES
+        else:
+            user_data['calc_step'] = STEP_STYLE
+    elif action == 'new' and step == STEP_DONE:
+        reset_order(user_data)
+    else:
+        return False
+    return True
+
+
+@ensure_message
+async def start_inline_calculator(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    # Запуск калькулятора: одно сообщение на весь расчёт
+    assert update.message is not None
+    message: Message = update.message
+    user_data = cast(dict, context.user_data)
+    pricing = reset_order(user_data)
+
+    text, keyboard = render_step(user_data, pricing)
+    sent = await message.reply_text(text, reply_markup=keyboard)
+    user_data['calc_message_id'] = sent.message_id
+
+
+async def inline_calculator(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    # Нажатие кнопки калькулятора (callback_data calc:...)
+    query = update.callback_query
+    if query is None or query.data is None:
+        return
+    user_data = cast(dict, context.user_data)
+
+    if (
+        query.message is None
+        or query.message.message_id != user_data.get('calc_message_id')
+    ):
+        await query.answer(
+            'Этот расчёт устарел. Откройте калькулятор из меню заново.'
+        )
+        return
+
+    parts = query.data.split(':')
+    action = parts[1] if len(parts) > 1 else ''
+    arg = parts[2] if len(parts) > 2 else ''
+    pricing = pinned_pricing(user_data)
+    if pricing is None:
+        # Кнопка расчёта по вытесненному прайсу не применяется:
+        # расчёт начинается заново с уведомлением
+        await query.answer(STALE_ORDER_TEXT, show_alert=True)
+        pricing = reset_order(user_data)
+    else:
+        if not apply_action(user_data, pricing, action, arg):
+            await query.answer()
+            return
+        # Новый расчёт ведётся по текущему прайсу
+        if user_data['pricing_version'] != pricing.version:
+            pricing = price_store.current()
+
+    # Изменённое сообщение — ответ на нажатие, поэтому answerCallbackQuery
+    # вызывается только когда сообщение не меняется: один запрос к
+    # Bot API на нажатие
+    text, keyboard = render_step(user_data, pricing)
+    try:
+        await query.edit_message_text(text, reply_markup=keyboard)
+    except BadRequest as e:
+        # Повторное нажатие до обновления сообщения: текст не изменился
+        if 'not modified' not in str(e):
+            raise
+        logger.debug(f'[CALC] Сообщение не изменено: {e}')
+        await query.answer()
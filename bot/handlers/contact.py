@@ -10,7 +10,7 @@ from bot.utils.decorators import ensure_message
 
 logger = logging.getLogger(__name__)
 
-WAITING_FOR_MESSAGE = 200
+WAITING_FOR_MESSAGE = 0  # состояние сценария contact (bot.handlers.fsm)
 
 
 def is_within_working_hours() -> bool:
@@ -1,17 +1,184 @@
+import asyncio
+import hashlib
 import logging
+from pathlib import Path
+from typing import Sequence
 
-from telegram import InputFile, Message, Update
+from telegram import (
+    Bot, InlineKeyboardMarkup, InputMediaPhoto, Message, Update
+)
 from telegram.ext import ContextTypes, ConversationHandler
 
-from bot.config import IMAGE_DIR
+from bot.config import EXAMPLES_ALBUM_SIZE
 from bot.keyboards.common import main_menu_button
-from bot.keyboards.examples import style_keyboard
+from bot.keyboards.examples import (
+    gallery_button, gallery_keyboard, preview_keyboard, style_keyboard
+)
 from bot.prices import STYLE_OPTIONS
+from bot.utils.asset_bundle import asset_bundle
 from bot.utils.decorators import ensure_message
+from bot.utils.file_id_cache import file_id_cache
+from bot.utils.image_cache import image_cache
+from bot.utils.image_catalog import image_catalog
 
 logger = logging.getLogger(__name__)
 
-CHOOSING_EXAMPLE_STYLE = 100  # уникальное состояние FSM
+CHOOSING_EXAMPLE_STYLE = 0  # состояние сценария examples (bot.handlers.fsm)
+
+
+async def load_photo(img_path: Path) -> str | bytes:
+    # Источник фото: file_id из кэша или содержимое файла для загрузки
+    found = asset_bundle.find(img_path)
+    if found is not None:
+        entry, view = found
+        file_id = file_id_cache.get(img_path, entry.sha256)
+        # InputFile принимает только bytes, поэтому данные из mmap
+        # копируются один раз — непосредственно перед загрузкой
+        return file_id or bytes(view)
+
+    file_id = file_id_cache.get(img_path)
+    if file_id:
+        return file_id
+    return await image_cache.get(img_path)
+
+
+def remember_file_id(
+    img_path: Path, photo: str | bytes, sent: Message
+) -> None:
+    # Запоминаем file_id, присвоенный Telegram загруженному фото.
+    # Хэш — из индекса бандла или по только что отправленным байтам,
+    # без повторного чтения файла; запись на диск — отложенная.
+    if not sent.photo or isinstance(photo, str):
+        return
+    found = asset_bundle.find(img_path)
+    if found is not None:
+        sha256 = found[0].sha256
+    else:
+        sha256 = hashlib.sha256(photo).hexdigest()
+    file_id_cache.put(img_path, sent.photo[-1].file_id, sha256)
+    file_id_cache.schedule_save()
+
+
+async def prewarm_examples(
+    bot: Bot, chat_id: int, concurrency: int, rate: float
+) -> tuple[int, int]:
+    # Загрузка всех примеров в служебный чат, чтобы заполнить кэш file_id
+    # до первого пользователя. Не больше concurrency загрузок одновременно
+    # и не чаще rate загрузок в секунду. Возвращает (загружено, ошибок).
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = 1 / rate if rate > 0 else 0
+    next_slot = loop.time()
+    uploaded = failed = 0
+
+    async def upload(img_path: Path) -> None:
+        nonlocal next_slot, uploaded, failed
+        async with semaphore:
+            try:
+                photo = await load_photo(img_path)
+                if isinstance(photo, str):
+                    return  # уже в кэше
+                now = loop.time()
+                delay = next_slot - now
+                next_slot = max(now, next_slot) + interval
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                sent = await bot.send_photo(
+                    chat_id,
+                    photo,
+                    filename=img_path.name,
+                    disable_notification=True
+                )
+            except Exception as e:
+                logger.exception(f'[PREWARM] Ошибка загрузки {img_path}: {e}')
+                failed += 1
+                return
+            remember_file_id(img_path, photo, sent)
+            uploaded += 1
+
+    await asyncio.gather(*(upload(path) for path in image_catalog.all_paths()))
+    return uploaded, failed
+
+
+async def send_photo(
+    message: Message,
+    img_path: Path,
+    caption: str | None = None,
+    reply_markup: InlineKeyboardMarkup | None = None,
+) -> None:
+    # Отправка одного фото с сообщением об ошибке вместо исключения
+    try:
+        photo = await load_photo(img_path)
+        sent = await message.reply_photo(
+            photo,
+            caption=caption,
+            filename=img_path.name,
+            reply_markup=reply_markup
+        )
+        remember_file_id(img_path, photo, sent)
+        logger.info(f'[EXAMPLES] Отправлено изображение: {img_path}')
+    except Exception as e:
+        logger.exception(f'[EXAMPLES] Ошибка при отправке {img_path}: {e}')
+        await message.reply_text(f'⚠️ Не удалось отправить: {img_path.name}')
+
+
+async def send_album(
+    message: Message, images: Sequence[Path], caption: str | None
+) -> None:
+    # Отправка изображений одним альбомом (sendMediaGroup).
+    # Подпись прикрепляется к альбому. Файлы, которые не удалось прочитать,
+    # и весь альбом при ошибке отправки уходят по одному через send_photo.
+    album_paths: list[Path] = []
+    photos: list[str | bytes] = []
+    media: list[InputMediaPhoto] = []
+    failed: list[Path] = []
+    for img_path in images:
+        try:
+            photo = await load_photo(img_path)
+            media.append(InputMediaPhoto(photo, filename=img_path.name))
+            album_paths.append(img_path)
+            photos.append(photo)
+        except Exception as e:
+            logger.exception(f'[EXAMPLES] Ошибка чтения {img_path}: {e}')
+            failed.append(img_path)
+
+    if len(media) == 1:
+        failed.insert(0, album_paths[0])
+    elif media:
+        try:
+            sent = await message.reply_media_group(media, caption=caption)
+            for img_path, photo, sent_message in zip(
+                album_paths, photos, sent
+            ):
+                remember_file_id(img_path, photo, sent_message)
+            logger.info(
+                f'[EXAMPLES] Отправлен альбом из {len(media)} изображений'
+            )
+            caption = None
+        except Exception as e:
+            logger.exception(f'[EXAMPLES] Ошибка при отправке альбома: {e}')
+            failed = album_paths + failed
+
+    for img_path in failed:
+        await send_photo(message, img_path, caption)
+        caption = None
+
+
+async def send_examples(
+    message: Message, style_index: int, images: Sequence[Path]
+) -> None:
+    # Первый альбом примеров и, если их больше, кнопка галереи
+    style = STYLE_OPTIONS[style_index]
+    await send_album(
+        message,
+        images[:EXAMPLES_ALBUM_SIZE],
+        f'🖼 Примеры работ в стиле «{style}»:'
+    )
+    if len(images) > EXAMPLES_ALBUM_SIZE:
+        await message.reply_text(
+            f'Показаны {EXAMPLES_ALBUM_SIZE} из {len(images)} примеров.',
+            reply_markup=gallery_button(style_index, len(images))
+        )
 
 
 # Старт обработчика "Примеры работ"
@@ -43,10 +210,10 @@ async def send_example_images(
         await message.reply_text('Пожалуйста, выберите стиль из списка.')
         return CHOOSING_EXAMPLE_STYLE
 
-    style_path = IMAGE_DIR / selected_style
-    logger.info(f'[EXAMPLES] Путь к папке стиля: {style_path}')
+    images = image_catalog.get(selected_style)
 
-    if not style_path.exists():
+    if images is None:
+        style_path = image_catalog.root / selected_style
         logger.error(f'[EXAMPLES] Папка не найдена: {style_path}')
         await message.reply_text(
             f'❗️ Папка для стиля не найдена:\n{style_path}',
@@ -54,11 +221,6 @@ async def send_example_images(
         )
         return ConversationHandler.END
 
-    images = [f for f in style_path.iterdir() if f.suffix.lower() in (
-        '.jpg', '.jpeg', '.png'
-    )]
-    images = images[:5]
-
     if not images:
         await message.reply_text(
             'Извините, пока нет примеров для этого стиля.',
@@ -66,20 +228,124 @@ async def send_example_images(
         )
         return ConversationHandler.END
 
-    await message.reply_text(f'🖼 Примеры работ в стиле «{selected_style}»:')
-    for img_path in images:
-        try:
-            with open(img_path, 'rb') as file:
-                await message.reply_photo(InputFile(file))
-            logger.info(f'[EXAMPLES] Отправлено изображение: {img_path}')
-        except Exception as e:
-            logger.exception(f'[EXAMPLES] Ошибка при отправке {img_path}: {e}')
-            await message.reply_text(
-                f'⚠️ Не удалось отправить: {img_path.name}'
+    style_index = STYLE_OPTIONS.index(selected_style)
+    caption = f'🖼 Примеры работ в стиле «{selected_style}»:'
+    collage = image_catalog.collage(selected_style)
+    if collage is not None:
+        # Сначала одно лёгкое превью, фото — по кнопке
+        await send_photo(
+            message,
+            collage,
+            caption,
+            reply_markup=preview_keyboard(
+                style_index, min(len(images), EXAMPLES_ALBUM_SIZE),
+                len(images)
             )
+        )
+    else:
+        await send_examples(message, style_index, images)
 
     await message.reply_text(
         'Вы можете вернуться в главное меню:',
         reply_markup=main_menu_button
     )
     return ConversationHandler.END
+
+
+# Альбом примеров по кнопке под коллажем
+async def show_example_album(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    query = update.callback_query
+    if query is None or query.data is None or query.message is None:
+        return
+
+    try:
+        _, style_part = query.data.split(':')
+        style_index = int(style_part)
+        style = STYLE_OPTIONS[style_index]
+    except (ValueError, IndexError):
+        await query.answer()
+        return
+
+    images = image_catalog.get(style)
+    if not images:
+        await query.answer('Примеры для этого стиля недоступны.')
+        return
+
+    await query.answer()
+    await send_examples(query.message, style_index, images)
+
+
+# Галерея примеров: одно фото на странице, листание редактирует сообщение
+async def browse_examples(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    query = update.callback_query
+    if query is None or query.data is None:
+        return
+
+    try:
+        _, style_part, index_part = query.data.split(':')
+        style_index = int(style_part)
+        style = STYLE_OPTIONS[style_index]
+        index = int(index_part)
+    except (ValueError, IndexError):
+        await query.answer()
+        return
+
+    images = image_catalog.get(style)
+    if not images:
+        await query.answer('Примеры для этого стиля недоступны.')
+        return
+
+    await query.answer()
+    index %= len(images)
+    img_path = images[index]
+    caption = f'🖼 «{style}» — {index + 1} из {len(images)}'
+    keyboard = gallery_keyboard(style_index, index, len(images))
+
+    try:
+        photo = await load_photo(img_path)
+        if query.message is not None and query.message.photo:
+            media = InputMediaPhoto(
+                photo, caption=caption, filename=img_path.name
+            )
+            sent = await query.edit_message_media(
+                media, reply_markup=keyboard
+            )
+        else:
+            assert query.message is not None
+            sent = await query.message.reply_photo(
+                photo,
+                caption=caption,
+                filename=img_path.name,
+                reply_markup=keyboard
+            )
+    except Exception as e:
+        logger.exception(f'[EXAMPLES] Ошибка галереи {img_path}: {e}')
+        return
+
+    if isinstance(sent, Message):
+        remember_file_id(img_path, photo, sent)
+    logger.info(f'[EXAMPLES] Галерея: {style}, {index + 1}/{len(images)}')
+
+
+# Перестроение индекса примеров по команде администратора
+@ensure_message
+async def reload_examples(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    assert update.message is not None
+    message: Message = update.message
+
+    await asyncio.to_thread(image_catalog.load)
+    image_cache.clear()
+    file_id_cache.schedule_revalidate()
+    lines = [
+        f'• {style}: ' + ('папка не найдена' if count is None else str(count))
+        for style, count in image_catalog.counts().items()
+    ]
+    await message.reply_text(
+        '🔄 Индекс примеров обновлён:\n' + '\n'.join(lines)
+    )
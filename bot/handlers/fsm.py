@@ -0,0 +1,202 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Mapping, Sequence
+
+from telegram import MessageEntity, Update
+from telegram.ext import (
+    Application,
+    BaseHandler,
+    ContextTypes,
+    ConversationHandler,
+)
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[
+    [Update, ContextTypes.DEFAULT_TYPE], Awaitable[int | None]
+]
+
+# Код состояния: номер сценария в старших битах, номер состояния
+# внутри сценария — в младших
+STATE_BITS = 8
+STATE_MASK = (1 << STATE_BITS) - 1
+
+
+@dataclass(frozen=True)
+class Flow:
+    # Описание сценария: кнопка меню, которая его запускает, обработчик
+    # запуска и таблица «состояние → обработчик текста». Номера состояний
+    # локальны для сценария: разные сценарии могут использовать одни
+    # и те же номера.
+    name: str
+    entry_text: str
+    entry: Callback
+    states: Mapping[int, Callback] = field(default_factory=dict)
+
+
+# Результат check_update: пользователь, сценарий, обработчик и признак
+# запуска сценария кнопкой меню
+Match = tuple[int, int, Callback, bool]
+
+
+class FlowEngine(BaseHandler[Update, ContextTypes.DEFAULT_TYPE]):
+    # Единый конечный автомат для всех сценариев бота.
+    # Состояние пользователя — одно целое число (код сценария и
+    # состояния) в словаре по id пользователя. Обработчик для текста
+    # находится по словарю кнопок меню или по коду состояния в списке
+    # обработчиков — без перебора фильтров и сценариев.
+    #
+    # Семантика как у ConversationHandler(allow_reentry=True):
+    # - кнопка меню всегда запускает свой сценарий заново, даже посреди
+    #   другого; незавершённый сценарий при этом сбрасывается;
+    # - обработчик возвращает следующее состояние своего сценария,
+    #   ConversationHandler.END завершает сценарий, None оставляет
+    #   текущее состояние (для обработчика запуска — сценария нет).
+    # Команды и изменённые сообщения не обрабатываются.
+
+    __slots__ = (
+        'flows', 'flow_ids', 'entries', 'handlers', 'codes', 'records',
+        'on_change',
+    )
+
+    def __init__(self, flows: Sequence[Flow]) -> None:
+        super().__init__(self.dispatch)
+        if len(flows) >= 1 << (31 - STATE_BITS):
+            raise ValueError('Слишком много сценариев')
+        self.flows = tuple(flows)
+        # Имя сценария → номер сценария
+        self.flow_ids = {flow.name: i for i, flow in enumerate(self.flows)}
+        if len(self.flow_ids) != len(self.flows):
+            raise ValueError('Имена сценариев должны быть уникальны')
+        # Кнопка меню → (номер сценария, обработчик запуска)
+        self.entries: dict[str, tuple[int, Callback]] = {}
+        # Код состояния → обработчик
+        self.handlers: dict[int, Callback] = {}
+        # Номер сценария → {локальное состояние → код}
+        self.codes: list[dict[int, int]] = []
+        # id пользователя → код состояния
+        self.records: dict[int, int] = {}
+        # Вызывается при смене состояния пользователя (код или None —
+        # сценарий завершён); так состояния сохраняются между запусками
+        self.on_change: Callable[[int, int | None], None] | None = None
+
+        for flow_id, flow in enumerate(self.flows):
+            if flow.entry_text in self.entries:
+                raise ValueError(
+                    f'Кнопка {flow.entry_text!r} уже занята сценарием '
+                    f'{self.flows[self.entries[flow.entry_text][0]].name}'
+                )
+            if len(flow.states) > STATE_MASK:
+                raise ValueError(f'Слишком много состояний: {flow.name}')
+            self.entries[flow.entry_text] = (flow_id, flow.entry)
+            codes: dict[int, int] = {}
+            for index, (state, handler) in enumerate(flow.states.items()):
+                code = (flow_id << STATE_BITS) | index
+                codes[state] = code
+                self.handlers[code] = handler
+            self.codes.append(codes)
+
+    def decode(self, code: int) -> tuple[str, int] | None:
+        # Код состояния → (имя сценария, локальное состояние). Коды
+        # зависят от порядка сценариев, поэтому вне процесса (в базе)
+        # хранится эта пара, а не код.
+        flow_id = code >> STATE_BITS
+        if flow_id >= len(self.codes):
+            return None
+        for state, state_code in self.codes[flow_id].items():
+            if state_code == code:
+                return self.flows[flow_id].name, state
+        return None
+
+    def encode(self, flow: str, state: int) -> int | None:
+        # Код состояния по имени сценария и локальному состоянию; None,
+        # если такого сценария или состояния больше нет
+        flow_id = self.flow_ids.get(flow)
+        if flow_id is None:
+            return None
+        return self.codes[flow_id].get(state)
+
+    def state_of(self, user_id: int) -> tuple[str, int] | None:
+        # Сценарий и локальное состояние пользователя (для отладки и тестов)
+        code = self.records.get(user_id)
+        if code is None:
+            return None
+        return self.decode(code)
+
+    def check_update(self, update: object) -> Match | None:
+        if not isinstance(update, Update):
+            return None
+        message = update.message
+        if message is None or message.text is None:
+            return None
+        entities = message.entities
+        if (
+            entities
+            and entities[0].type == MessageEntity.BOT_COMMAND
+            and entities[0].offset == 0
+        ):
+            return None
+        if message.from_user is None:
+            return None
+        user_id = message.from_user.id
+
+        entry = self.entries.get(message.text)
+        if entry is not None:
+            return user_id, entry[0], entry[1], True
+
+        code = self.records.get(user_id)
+        if code is None:
+            return None
+        return user_id, code >> STATE_BITS, self.handlers[code], False
+
+    async def handle_update(
+        self,
+        update: Update,
+        application: Application[Any, Any, Any, Any, Any, Any],
+        check_result: object,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> int | None:
+        return await self._run(
+            check_result, update, context  # type: ignore[arg-type]
+        )
+
+    async def dispatch(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> int | None:
+        # Обработка без Application: проверка и вызов сразу
+        match = self.check_update(update)
+        if match is None:
+            return None
+        return await self._run(match, update, context)
+
+    async def _run(
+        self,
+        match: Match,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> int | None:
+        user_id, flow_id, handler, entry = match
+        new_state = await handler(update, context)
+        if new_state is None and not entry:
+            return None
+        if new_state is None or new_state == ConversationHandler.END:
+            self._set(user_id, None)
+            return new_state
+
+        code = self.codes[flow_id].get(new_state)
+        if code is None:
+            logger.error(
+                f'[FSM] Сценарий {self.flows[flow_id].name}: '
+                f'неизвестное состояние {new_state}, сценарий завершён'
+            )
+        self._set(user_id, code)
+        return new_state
+
+    def _set(self, user_id: int, code: int | None) -> None:
+        previous = self.records.get(user_id)
+        if code is None:
+            self.records.pop(user_id, None)
+        else:
+            self.records[user_id] = code
+        if code != previous and self.on_change is not None:
+            self.on_change(user_id, code)
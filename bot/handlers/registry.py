@@ -1,10 +1,6 @@
-from telegram.ext import (
-    CommandHandler,
-    ConversationHandler,
-    MessageHandler,
-    filters,
-)
+from telegram.ext import CallbackQueryHandler, CommandHandler, filters
 
+from bot.config import ADMIN_ID, CALCULATOR_MODE
 from bot.handlers.calculator import (
     CHOOSING_FACE_COUNT,
     CHOOSING_OPTIONS,
@@ -16,6 +12,10 @@ from bot.handlers.calculator import (
     start_calculator,
     style_chosen,
 )
+from bot.handlers.calculator_inline import (
+    inline_calculator,
+    start_inline_calculator,
+)
 from bot.handlers.contact import (
     WAITING_FOR_MESSAGE,
     forward_to_manager,
@@ -23,71 +23,86 @@ from bot.handlers.contact import (
 )
 from bot.handlers.examples import (
     CHOOSING_EXAMPLE_STYLE,
+    browse_examples,
+    reload_examples,
     send_example_images,
+    show_example_album,
     show_example_styles,
 )
+from bot.handlers.fsm import Flow, FlowEngine
 from bot.handlers.start import start_command
+from bot.keyboards.common import MAIN_MENU_BUTTON
+from bot.keyboards.main_menu import (
+    CALCULATOR_BUTTON,
+    CONTACT_BUTTON,
+    EXAMPLES_BUTTON,
+)
+
+# Пошаговый калькулятор
+CALCULATOR_STATES = {
+    CHOOSING_SIZE: size_chosen,
+    CHOOSING_STYLE: style_chosen,
+    CHOOSING_FACE_COUNT: face_count_chosen,
+    CHOOSING_OPTIONS: options_chosen,
+}
+# Примеры работ
+EXAMPLES_STATES = {CHOOSING_EXAMPLE_STYLE: send_example_images}
+# Связь с менеджером
+CONTACT_STATES = {WAITING_FOR_MESSAGE: forward_to_manager}
+
 
+def build_flows(calculator_mode: str = CALCULATOR_MODE) -> list[Flow]:
+    # Все сценарии бота: кнопка запуска и таблица состояний.
+    # Номера состояний локальны для сценария, коды в движке
+    # назначаются автоматически.
+    if calculator_mode == 'inline':
+        # Inline-калькулятор ведётся кнопками, текстовых шагов нет
+        calculator = Flow(
+            'calculator', CALCULATOR_BUTTON, start_inline_calculator
+        )
+    else:
+        calculator = Flow(
+            'calculator', CALCULATOR_BUTTON, start_calculator,
+            CALCULATOR_STATES,
+        )
+    return [
+        Flow('menu', MAIN_MENU_BUTTON, start_command),
+        calculator,
+        Flow(
+            'examples', EXAMPLES_BUTTON, show_example_styles,
+            EXAMPLES_STATES,
+        ),
+        Flow('contact', CONTACT_BUTTON, request_contact, CONTACT_STATES),
+    ]
 
-def register_handlers(app):
+
+def build_fsm(calculator_mode: str = CALCULATOR_MODE) -> FlowEngine:
+    return FlowEngine(build_flows(calculator_mode))
+
+
+def register_handlers(
+    app, calculator_mode: str = CALCULATOR_MODE
+) -> FlowEngine:
+    # Возвращает конечный автомат сценариев (для сохранения состояний)
     # Команды
     app.add_handler(CommandHandler('start', start_command))
-    app.add_handler(MessageHandler(
-        filters.Regex('^🔙 В главное меню$'), start_command
+    app.add_handler(CommandHandler(
+        'reload_examples', reload_examples, filters.User(user_id=ADMIN_ID)
     ))
 
-    # FSM калькулятор
-    calculator_conv = ConversationHandler(
-        entry_points=[MessageHandler(
-            filters.Regex('^📄 Калькулятор стоимости$'), start_calculator
-        )],
-        states={
-            CHOOSING_SIZE: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, size_chosen)
-            ],
-            CHOOSING_STYLE: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, style_chosen)
-            ],
-            CHOOSING_FACE_COUNT: [
-                MessageHandler(
-                    filters.TEXT & ~filters.COMMAND, face_count_chosen
-                )
-            ],
-            CHOOSING_OPTIONS: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, options_chosen)
-            ],
-        },
-        fallbacks=[],
-        allow_reentry=True
-    )
-    app.add_handler(calculator_conv)
+    # Текстовые сообщения: кнопки меню и шаги сценариев
+    fsm = build_fsm(calculator_mode)
+    app.add_handler(fsm)
 
-    # FSM примеры работ
-    examples_conv = ConversationHandler(
-        entry_points=[MessageHandler(
-            filters.Regex('^🖼 Примеры работ$'), show_example_styles
-        )],
-        states={
-            CHOOSING_EXAMPLE_STYLE: [MessageHandler(
-                filters.TEXT & ~filters.COMMAND, send_example_images
-            )]
-        },
-        fallbacks=[],
-        allow_reentry=True
+    # Inline-кнопки
+    if calculator_mode == 'inline':
+        app.add_handler(
+            CallbackQueryHandler(inline_calculator, pattern='^calc:')
+        )
+    app.add_handler(
+        CallbackQueryHandler(show_example_album, pattern='^album:')
     )
-    app.add_handler(examples_conv)
-
-    # FSM связь с менеджером
-    contact_conv = ConversationHandler(
-        entry_points=[MessageHandler(
-            filters.Regex('^👤 Связаться с менеджером$'), request_contact
-        )],
-        states={
-            WAITING_FOR_MESSAGE: [MessageHandler(
-                    filters.TEXT & ~filters.COMMAND, forward_to_manager
-                )]
-        },
-        fallbacks=[],
-        allow_reentry=True
+    app.add_handler(
+        CallbackQueryHandler(browse_examples, pattern='^gallery:')
     )
-    app.add_handler(contact_conv)
+    return fsm
@@ -1,22 +1,107 @@
-from telegram import ReplyKeyboardMarkup
+from functools import lru_cache
+from typing import NamedTuple
 
-from bot.prices import AVAILABLE_SIZES, EXTRA_OPTIONS, STYLE_OPTIONS
+from telegram import (
+    InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+)
+
+from bot.keyboards.registry import keyboard_registry
 from bot.utils.helpers import chunked
+from bot.utils.pricing import PricingSnapshot
 
-# Клавиатуры для выборо размеров
-size_keyboard = ReplyKeyboardMarkup(
-    chunked(AVAILABLE_SIZES, 2),
-    resize_keyboard=True,
-    one_time_keyboard=True
-)
-# Клавиатура для выбора стиля
-style_keyboard = ReplyKeyboardMarkup(
-    chunked(STYLE_OPTIONS, 2),
-    resize_keyboard=True,
-    one_time_keyboard=True
-)
-# Клавиатура для выбора дополнительных опций
-option_keyboard = ReplyKeyboardMarkup(
-    chunked(list(EXTRA_OPTIONS.keys()), 2) + [['Готово']],
-    resize_keyboard=True
-)
+
+class CalculatorKeyboards(NamedTuple):
+    size: ReplyKeyboardMarkup
+    style: ReplyKeyboardMarkup
+    option: ReplyKeyboardMarkup
+
+
+@lru_cache(maxsize=8)
+def calculator_keyboards(pricing: PricingSnapshot) -> CalculatorKeyboards:
+    # Клавиатуры калькулятора собираются и сериализуются один раз на
+    # версию прайса
+    return CalculatorKeyboards(
+        # Клавиатуры для выборо размеров
+        size=keyboard_registry.prepare(ReplyKeyboardMarkup(
+            chunked(list(pricing.sizes), 2),
+            resize_keyboard=True,
+            one_time_keyboard=True
+        )),
+        # Клавиатура для выбора стиля
+        style=keyboard_registry.prepare(ReplyKeyboardMarkup(
+            chunked(list(pricing.styles), 2),
+            resize_keyboard=True,
+            one_time_keyboard=True
+        )),
+        # Клавиатура для выбора дополнительных опций
+        option=keyboard_registry.prepare(ReplyKeyboardMarkup(
+            chunked(list(pricing.extra_options), 2) + [['Готово']],
+            resize_keyboard=True
+        )),
+    )
+
+
+# Inline-клавиатуры калькулятора в одном сообщении (CALCULATOR_MODE=inline).
+# callback_data: calc:<действие>[:<индекс>], индексы — позиции в прайсе
+# заказа.
+BACK_BUTTON = InlineKeyboardButton('⬅️ Назад', callback_data='calc:back')
+new_order_keyboard = keyboard_registry.prepare(InlineKeyboardMarkup([[
+    InlineKeyboardButton('🔁 Новый расчёт', callback_data='calc:new')
+]]), pin=True)
+
+
+@lru_cache(maxsize=8)
+def inline_size_keyboard(pricing: PricingSnapshot) -> InlineKeyboardMarkup:
+    # Размеры с базовой ценой
+    buttons = [
+        InlineKeyboardButton(
+            f'{size} — {pricing.base_prices[size]} ₽',
+            callback_data=f'calc:size:{i}'
+        )
+        for i, size in enumerate(pricing.sizes)
+    ]
+    return keyboard_registry.prepare(
+        InlineKeyboardMarkup(chunked(buttons, 2))
+    )
+
+
+@lru_cache(maxsize=8)
+def inline_style_keyboard(pricing: PricingSnapshot) -> InlineKeyboardMarkup:
+    buttons = [
+        InlineKeyboardButton(style, callback_data=f'calc:style:{i}')
+        for i, style in enumerate(pricing.styles)
+    ]
+    return keyboard_registry.prepare(
+        InlineKeyboardMarkup(chunked(buttons, 2) + [[BACK_BUTTON]])
+    )
+
+
+@lru_cache(maxsize=8)
+def inline_faces_keyboard(pricing: PricingSnapshot) -> InlineKeyboardMarkup:
+    buttons = [
+        InlineKeyboardButton(str(faces), callback_data=f'calc:faces:{faces}')
+        for faces in range(1, pricing.max_faces + 1)
+    ]
+    return keyboard_registry.prepare(
+        InlineKeyboardMarkup(chunked(buttons, 5) + [[BACK_BUTTON]])
+    )
+
+
+@lru_cache(maxsize=256)
+def inline_options_keyboard(
+    pricing: PricingSnapshot, mask: int
+) -> InlineKeyboardMarkup:
+    # Опции-переключатели; выбранные (биты mask) отмечены галочкой
+    buttons = [
+        InlineKeyboardButton(
+            f'{"✅" if mask & (1 << i) else "▫️"} {opt} — {price} ₽',
+            callback_data=f'calc:opt:{i}'
+        )
+        for i, (opt, price) in enumerate(pricing.extra_options.items())
+    ]
+    return keyboard_registry.prepare(InlineKeyboardMarkup(
+        [[button] for button in buttons]
+        + [[BACK_BUTTON, InlineKeyboardButton(
+            'Готово', callback_data='calc:done'
+        )]]
+    ))
@@ -1,8 +1,15 @@
-from telegram import ReplyKeyboardMarkup
+from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove
 
-# Клавиатура перехода в главное меню
-main_menu_button = ReplyKeyboardMarkup(
-    [['🔙 В главное меню']],
+from bot.keyboards.registry import keyboard_registry
+
+# Кнопка перехода в главное меню
+MAIN_MENU_BUTTON = '🔙 В главное меню'
+main_menu_button = keyboard_registry.prepare(ReplyKeyboardMarkup(
+    [[MAIN_MENU_BUTTON]],
     resize_keyboard=True,
     one_time_keyboard=True
+), pin=True)
+# Скрытие обычной клавиатуры
+remove_keyboard = keyboard_registry.prepare(
+    ReplyKeyboardRemove(), pin=True
 )
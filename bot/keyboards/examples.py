@@ -1,11 +1,65 @@
-from telegram import ReplyKeyboardMarkup
+from functools import lru_cache
 
+from telegram import (
+    InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+)
+
+from bot.keyboards.registry import keyboard_registry
 from bot.prices import STYLE_OPTIONS
 from bot.utils.helpers import chunked
 
 # Клавиатура для выбора стиля дизайна
-style_keyboard = ReplyKeyboardMarkup(
+style_keyboard = keyboard_registry.prepare(ReplyKeyboardMarkup(
     keyboard=chunked(STYLE_OPTIONS, 2),  # по 2 кнопки в строке
     resize_keyboard=True,
     one_time_keyboard=True
-)
+), pin=True)
+
+# Inline-клавиатуры примеров зависят от стиля, позиции и числа
+# изображений, поэтому кэшируются по этим значениям: после изменения
+# каталога меняется total, и клавиатуры собираются заново.
+
+
+@lru_cache(maxsize=64)
+def gallery_button(style_index: int, total: int) -> InlineKeyboardMarkup:
+    # Кнопка открытия галереи всех примеров стиля
+    return keyboard_registry.prepare(InlineKeyboardMarkup([[
+        InlineKeyboardButton(
+            f'📖 Листать все примеры ({total})',
+            callback_data=f'gallery:{style_index}:0'
+        )
+    ]]))
+
+
+@lru_cache(maxsize=64)
+def preview_keyboard(
+    style_index: int, album_size: int, total: int
+) -> InlineKeyboardMarkup:
+    # Кнопки под коллажем: альбом первых фото и галерея всех примеров
+    rows = [[InlineKeyboardButton(
+        f'📷 Показать фото ({album_size})',
+        callback_data=f'album:{style_index}'
+    )]]
+    if total > album_size:
+        rows.append(gallery_button(style_index, total).inline_keyboard[0])
+    return keyboard_registry.prepare(InlineKeyboardMarkup(rows))
+
+
+@lru_cache(maxsize=1024)
+def gallery_keyboard(
+    style_index: int, index: int, total: int
+) -> InlineKeyboardMarkup:
+    # Навигация по галерее: предыдущее / позиция / следующее (по кругу)
+    prev_index = (index - 1) % total
+    next_index = (index + 1) % total
+    return keyboard_registry.prepare(InlineKeyboardMarkup([[
+        InlineKeyboardButton(
+            '◀️', callback_data=f'gallery:{style_index}:{prev_index}'
+        ),
+        InlineKeyboardButton(
+            f'{index + 1} / {total}', callback_data='gallery:noop'
+        ),
+        InlineKeyboardButton(
+            '▶️', callback_data=f'gallery:{style_index}:{next_index}'
+        ),
+    ]]))
@@ -1,11 +1,18 @@
 from telegram import ReplyKeyboardMarkup
 
+from bot.keyboards.registry import keyboard_registry
+
+# Кнопки главного меню
+CALCULATOR_BUTTON = '📄 Калькулятор стоимости'
+EXAMPLES_BUTTON = '🖼 Примеры работ'
+CONTACT_BUTTON = '👤 Связаться с менеджером'
+
 # Клавиатура главного меню
-main_menu = ReplyKeyboardMarkup(
+main_menu = keyboard_registry.prepare(ReplyKeyboardMarkup(
     [
-        ['📄 Калькулятор стоимости'],
-        ['🖼 Примеры работ'],
-        ['👤 Связаться с менеджером']
+        [CALCULATOR_BUTTON],
+        [EXAMPLES_BUTTON],
+        [CONTACT_BUTTON]
     ],
     resize_keyboard=True
-)
\ No newline at end of file
+), pin=True)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import json
+from collections import OrderedDict
+from typing import TypeVar
+
+from telegram import (
+    InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
+)
+from telegram.ext import ExtBot
+
+Markup = InlineKeyboardMarkup | ReplyKeyboardMarkup | ReplyKeyboardRemove
+M = TypeVar('M', bound=Markup)
+
+
+class KeyboardRegistry:
+    # JSON клавиатур, сериализованных один раз при сборке. Ключ — id
+    # объекта: клавиатуры PTB заморожены, поэтому содержимое под id не
+    # меняется, а ссылка на клавиатуру хранится рядом с JSON, и id не
+    # переиспользуется. Клавиатуры калькулятора собираются на снимок
+    # прайса, клавиатуры примеров — на число изображений каталога: после
+    # изменения прайса или каталога регистрируются новые объекты, а
+    # старые вытесняются по LRU. Клавиатуры уровня модуля закреплены.
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._pinned: dict[int, tuple[Markup, str]] = {}
+        self._items: OrderedDict[int, tuple[Markup, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._pinned) + len(self._items)
+
+    def prepare(self, markup: M, pin: bool = False) -> M:
+        # Та же строка, что PTB собрал бы сам (RequestParameter.json_value)
+        entry = (markup, json.dumps(markup.to_dict()))
+        if pin:
+            self._pinned[id(markup)] = entry
+            return markup
+        if len(self._items) >= self.max_items:
+            self._items.popitem(last=False)
+            self.evictions += 1
+        self._items[id(markup)] = entry
+        return markup
+
+    def payload(self, markup: object) -> str | None:
+        key = id(markup)
+        entry = self._pinned.get(key)
+        if entry is None:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+        if entry is None or entry[0] is not markup:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def stats(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {
+            'items': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 3) if requests else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+# Больше суммы размеров lru_cache клавиатур: живая клавиатура из кэша
+# не вытесняется из реестра
+keyboard_registry = KeyboardRegistry(2048)
+
+
+class PreparedMarkupBot(ExtBot):
+    # Бот, который отправляет готовый JSON зарегистрированных клавиатур.
+    # _insert_defaults — место, где PTB подготавливает параметры каждого
+    # запроса перед сериализацией. Строковые параметры PTB передаёт как
+    # есть, поэтому для такой клавиатуры to_dict() и json.dumps не
+    # выполняются. Незарегистрированные клавиатуры отправляются обычно.
+
+    __slots__ = ()
+
+    def _insert_defaults(self, data: dict[str, object]) -> None:
+        super()._insert_defaults(data)
+        markup = data.get('reply_markup')
+        if markup is not None:
+            payload = keyboard_registry.payload(markup)
+            if payload is not None:
+                data['reply_markup'] = payload
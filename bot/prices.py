@@ -1,3 +1,7 @@
+# Встроенный прайс. Бот работает с прайсом из файла PRICES_PATH
+# (см. bot.utils.price_store), а эти значения используются, пока
+# файла нет.
+
 # Базовые цены (Просто фото на холсте)
 BASE_PRICES = {
     '30×40': 1545,
@@ -29,3 +33,21 @@ EXTRA_OPTIONS = {
     'Багетная рама': 840,
     'Фактурный гель': 350
 }
+
+# Стоимость отрисовки: первое лицо и каждое следующее
+DRAWING_FIRST_FACE = 1200
+DRAWING_EXTRA_FACE = 600
+
+# Встроенный прайс в формате файла PRICES_PATH
+DEFAULT_PRICING = {
+    'sizes': AVAILABLE_SIZES,
+    'base_prices': BASE_PRICES,
+    'styles': STYLE_OPTIONS,
+    'drawing_styles': DRAWING_STYLES,
+    'extra_options': EXTRA_OPTIONS,
+    'drawing_price': {
+        'first_face': DRAWING_FIRST_FACE,
+        'extra_face': DRAWING_EXTRA_FACE,
+    },
+    'max_faces': 10,
+}
@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from bot.config import COLLAGE_DIR
+from bot.prices import STYLE_OPTIONS
+from bot.tools.optimize_images import (
+    MANIFEST_NAME,
+    load_manifest,
+    save_manifest,
+)
+from bot.utils.file_id_cache import file_sha256
+from bot.utils.image_catalog import IMAGE_SUFFIXES, examples_root
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE = 320
+DEFAULT_COLUMNS = 3
+DEFAULT_MAX_TILES = 6
+DEFAULT_QUALITY = 80
+BACKGROUND = (255, 255, 255)
+
+
+@dataclass
+class CollageStats:
+    built: int = 0
+    skipped: int = 0
+    removed: int = 0
+    failed: int = 0
+
+
+def style_sources(style_dir: Path, max_tiles: int) -> list[Path]:
+    # Изображения стиля в порядке каталога, не больше max_tiles
+    if not style_dir.is_dir():
+        return []
+    return sorted(
+        path for path in style_dir.iterdir()
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    )[:max_tiles]
+
+
+def sources_key(sources: list[Path]) -> str:
+    # Отпечаток набора исходников: имена и содержимое
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(path.name.encode('utf-8'))
+        digest.update(file_sha256(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def build_collage(
+    sources: list[Path],
+    dst: Path,
+    tile: int = DEFAULT_TILE,
+    columns: int = DEFAULT_COLUMNS,
+    quality: int = DEFAULT_QUALITY,
+) -> None:
+    # Сетка квадратных превью. Выполняется в дочернем процессе.
+    columns = min(columns, len(sources))
+    rows = math.ceil(len(sources) / columns)
+    sheet = Image.new('RGB', (columns * tile, rows * tile), BACKGROUND)
+    for position, src in enumerate(sources):
+        with Image.open(src) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            thumb = ImageOps.fit(
+                image, (tile, tile), Image.Resampling.LANCZOS
+            )
+        row, column = divmod(position, columns)
+        sheet.paste(thumb, (column * tile, row * tile))
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dst.with_suffix('.tmp')
+    try:
+        sheet.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, dst)
+
+
+def run(
+    src_root: Path,
+    dst_root: Path,
+    styles: list[str],
+    max_tiles: int = DEFAULT_MAX_TILES,
+    workers: int | None = None,
+    force: bool = False,
+) -> CollageStats:
+    # Сборка коллажей. Коллаж стиля пересобирается, только если
+    # изменился набор его исходных изображений; если пересобрать не
+    # удалось, остаётся прежний.
+    dst_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = dst_root / MANIFEST_NAME
+    old_manifest = load_manifest(manifest_path)
+    manifest: dict[str, dict] = {}
+    stats = CollageStats()
+
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for style in styles:
+            sources = style_sources(src_root / style, max_tiles)
+            if not sources:
+                continue
+            entry = {'sources': sources_key(sources), 'output': f'{style}.jpg'}
+            if (
+                not force
+                and old_manifest.get(style) == entry
+                and (dst_root / entry['output']).exists()
+            ):
+                manifest[style] = entry
+                stats.skipped += 1
+                continue
+            future = pool.submit(
+                build_collage, sources, dst_root / entry['output']
+            )
+            jobs[future] = (style, entry)
+
+        for future, (style, entry) in jobs.items():
+            try:
+                future.result()
+            except Exception:
+                logger.exception(f'Не удалось собрать коллаж: {style}')
+                stats.failed += 1
+                # Прежний коллаж остаётся, пока новый не соберётся
+                previous = old_manifest.get(style)
+                if (
+                    previous is not None
+                    and (dst_root / previous['output']).exists()
+                ):
+                    manifest[style] = previous
+                continue
+            manifest[style] = entry
+            stats.built += 1
+
+    # Коллажи стилей, для которых не осталось изображений
+    for style, entry in old_manifest.items():
+        if style not in manifest:
+            (dst_root / entry['output']).unlink(missing_ok=True)
+            stats.removed += 1
+
+    save_manifest(manifest_path, manifest)
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Сборка коллажей-превью примеров работ по стилям.'
+    )
+    parser.add_argument('--src', type=Path, default=None)
+    parser.add_argument('--dst', type=Path, default=COLLAGE_DIR)
+    parser.add_argument('--max-tiles', type=int, default=DEFAULT_MAX_TILES)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument(
+        '--force', action='store_true', help='пересобрать все коллажи'
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stats = run(
+        args.src or examples_root(), args.dst, STYLE_OPTIONS,
+        args.max_tiles, args.workers, args.force
+    )
+    logger.info(
+        f'Собрано: {stats.built}, без изменений: {stats.skipped}, '
+        f'удалено: {stats.removed}, ошибок: {stats.failed}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from bot.config import IMAGE_DIR, OPTIMIZED_IMAGE_DIR
+from bot.utils.file_id_cache import file_sha256
+from bot.utils.image_catalog import IMAGE_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+# Метка полного набора: бот переключается на оптимизированные копии,
+# только если она есть (см. image_catalog.examples_root)
+READY_NAME = '.complete'
+
+# Telegram пережимает фото до 1280 px по большей стороне,
+# поэтому загружать больший размер бессмысленно.
+DEFAULT_MAX_SIDE = 1280
+DEFAULT_QUALITY = 85
+
+
+@dataclass
+class OptimizeStats:
+    processed: int = 0
+    skipped: int = 0
+    removed: int = 0
+    failed: int = 0
+    # Не обработаны и без прежнего результата
+    missing: int = 0
+    source_bytes: int = 0
+    output_bytes: int = 0
+
+
+def optimize_image(src: Path, dst: Path, max_side: int, quality: int) -> str:
+    # Уменьшение и пережатие одного изображения без метаданных.
+    # Выполняется в дочернем процессе, возвращает хэш результата.
+    with Image.open(src) as image:
+        # Поворот по EXIF применяем до удаления метаданных
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dst.with_suffix('.tmp')
+        try:
+            image.save(
+                tmp_path,
+                'JPEG',
+                quality=quality,
+                optimize=True,
+                progressive=True,
+            )
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    os.replace(tmp_path, dst)
+    return file_sha256(dst)
+
+
+def collect_sources(src_root: Path) -> list[Path]:
+    # Все изображения стилей: <src_root>/<стиль>/<файл>
+    return sorted(
+        path
+        for style_dir in src_root.iterdir() if style_dir.is_dir()
+        for path in style_dir.iterdir()
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    )
+
+
+def output_name(key: str, taken: set[str]) -> str:
+    # Имя результата: исходник с расширением .jpg. Если оно уже занято
+    # (a.jpg и a.png в одной папке), сохраняется и исходное расширение.
+    output = Path(key).with_suffix('.jpg').as_posix()
+    if output in taken:
+        output = f'{key}.jpg'
+        logger.warning(f'Совпадение имён, результат сохранён как {output}')
+    taken.add(output)
+    return output
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(path: Path, manifest: dict[str, dict]) -> None:
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run(
+    src_root: Path,
+    dst_root: Path,
+    max_side: int = DEFAULT_MAX_SIDE,
+    quality: int = DEFAULT_QUALITY,
+    workers: int | None = None,
+    force: bool = False,
+) -> OptimizeStats:
+    # Оптимизация всех изображений. Повторно обрабатываются только файлы,
+    # у которых изменился хэш исходника или параметры сжатия.
+    # Если файл не удалось обработать, остаётся его прежний результат;
+    # если прежнего нет, метка полного набора снимается и бот продолжает
+    # отдавать исходники.
+    dst_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = dst_root / MANIFEST_NAME
+    ready_path = dst_root / READY_NAME
+    old_manifest = load_manifest(manifest_path)
+    manifest: dict[str, dict] = {}
+    stats = OptimizeStats()
+
+    jobs = {}
+    outputs: set[str] = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for src in collect_sources(src_root):
+            key = src.relative_to(src_root).as_posix()
+            output = output_name(key, outputs)
+            entry = {
+                'source_sha256': file_sha256(src),
+                'output': output,
+                'max_side': max_side,
+                'quality': quality,
+            }
+            previous = old_manifest.get(key)
+            if (
+                not force
+                and previous is not None
+                and all(previous.get(k) == v for k, v in entry.items())
+                and (dst_root / output).exists()
+            ):
+                manifest[key] = previous
+                stats.skipped += 1
+                continue
+
+            future = pool.submit(
+                optimize_image, src, dst_root / output, max_side, quality
+            )
+            jobs[future] = (key, src, entry)
+
+        for future, (key, src, entry) in jobs.items():
+            try:
+                entry['output_sha256'] = future.result()
+            except Exception:
+                logger.exception(f'Не удалось обработать {src}')
+                stats.failed += 1
+                previous = old_manifest.get(key)
+                if (
+                    previous is not None
+                    and (dst_root / previous['output']).exists()
+                ):
+                    manifest[key] = previous
+                else:
+                    stats.missing += 1
+                continue
+            manifest[key] = entry
+            stats.processed += 1
+
+    # Удаляем результаты для исходников, которых больше нет
+    live_outputs = {entry['output'] for entry in manifest.values()}
+    for key, entry in old_manifest.items():
+        if key not in manifest and entry['output'] not in live_outputs:
+            (dst_root / entry['output']).unlink(missing_ok=True)
+            stats.removed += 1
+
+    for key, entry in manifest.items():
+        stats.source_bytes += (src_root / key).stat().st_size
+        stats.output_bytes += (dst_root / entry['output']).stat().st_size
+
+    save_manifest(manifest_path, manifest)
+    if stats.missing:
+        ready_path.unlink(missing_ok=True)
+    else:
+        ready_path.touch()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Оптимизация примеров работ для отправки в Telegram.'
+    )
+    parser.add_argument('--src', type=Path, default=IMAGE_DIR)
+    parser.add_argument('--dst', type=Path, default=OPTIMIZED_IMAGE_DIR)
+    parser.add_argument('--max-side', type=int, default=DEFAULT_MAX_SIDE)
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument(
+        '--force', action='store_true', help='обработать все файлы заново'
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stats = run(
+        args.src, args.dst, args.max_side, args.quality, args.workers,
+        args.force
+    )
+    logger.info(
+        f'Обработано: {stats.processed}, без изменений: {stats.skipped}, '
+        f'удалено: {stats.removed}, ошибок: {stats.failed}'
+    )
+    if stats.missing:
+        logger.warning(
+            f'Без результата: {stats.missing}; бот отдаёт исходники, '
+            f'пока все файлы не обработаны'
+        )
+    logger.info(
+        f'Размер: {stats.source_bytes / 2**20:.1f} МБ -> '
+        f'{stats.output_bytes / 2**20:.1f} МБ'
+    )
+
+
+if __name__ == '__main__':
+    main()
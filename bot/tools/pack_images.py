@@ -0,0 +1,73 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict
+from pathlib import Path
+
+from bot.config import ASSET_BUNDLE_PATH
+from bot.tools.optimize_images import collect_sources
+from bot.utils.asset_bundle import HEADER, MAGIC, BundleEntry
+from bot.utils.image_catalog import examples_root
+
+logger = logging.getLogger(__name__)
+
+
+def pack(src_root: Path, out_path: Path) -> list[BundleEntry]:
+    # Упаковка всех изображений <src_root>/<стиль>/<файл> в один файл
+    entries: list[BundleEntry] = []
+    blobs: list[bytes] = []
+    offset = 0
+    for src in collect_sources(src_root):
+        data = src.read_bytes()
+        entries.append(BundleEntry(
+            style=src.parent.name,
+            name=src.name,
+            offset=offset,
+            length=len(data),
+            sha256=hashlib.sha256(data).hexdigest(),
+        ))
+        blobs.append(data)
+        offset += len(data)
+
+    index = json.dumps(
+        [asdict(entry) for entry in entries], ensure_ascii=False
+    ).encode('utf-8')
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(index)))
+        file.write(index)
+        for data in blobs:
+            file.write(data)
+    # Атомарная подмена: работающий бот переоткроет бандл по mtime
+    os.replace(tmp_path, out_path)
+    return entries
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Упаковка примеров работ в один бандл.'
+    )
+    parser.add_argument(
+        '--src', type=Path, default=None,
+        help='папка со стилями (по умолчанию оптимизированные копии, '
+             'если они собраны)'
+    )
+    parser.add_argument('--out', type=Path, default=ASSET_BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    src_root = args.src or examples_root()
+    entries = pack(src_root, args.out)
+    total = sum(entry.length for entry in entries)
+    logger.info(
+        f'Упаковано {len(entries)} изображений из {src_root} '
+        f'({total / 2**20:.1f} МБ) в {args.out}'
+    )
+
+
+if __name__ == '__main__':
+    main()
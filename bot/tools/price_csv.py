@@ -0,0 +1,240 @@
+import argparse
+import csv
+import logging
+import sys
+from array import array
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import combinations, islice
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO, TypeVar
+
+from bot.utils.calculator import calculate_total_reference
+from bot.utils.price_store import price_store
+from bot.utils.pricing import PricingSnapshot, load_pricing
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('size', 'style', 'faces', 'options')
+TOTAL_FIELD = 'total'
+OPTION_SEPARATOR = ';'
+DEFAULT_CHUNK_SIZE = 10_000
+
+T = TypeVar('T')
+
+
+@dataclass
+class QuoteStats:
+    rows: int = 0
+    table: int = 0
+    reference: int = 0
+    failed: int = 0
+
+
+def parse_options(value: str | None) -> list[str]:
+    # Опции в ячейке CSV перечислены через точку с запятой
+    if not value:
+        return []
+    return [
+        opt.strip() for opt in value.split(OPTION_SEPARATOR) if opt.strip()
+    ]
+
+
+def read_chunks(rows: Iterable[T], size: int) -> Iterator[list[T]]:
+    # Строки порциями по size штук, без чтения всего файла
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def price_rows(
+    rows: list[dict],
+    pricing: PricingSnapshot,
+    stats: QuoteStats | None = None,
+) -> list[int | None]:
+    # Итоги для порции строк. Заказы из таблицы кодируются по столбцам
+    # и считаются одним вызовом quote_codes (NumPy), остальные —
+    # эталонным расчётом.
+    # None — строка с некорректным числом лиц.
+    stats = stats or QuoteStats()
+    price_table = pricing.table
+    totals: list[int | None] = [None] * len(rows)
+    positions: list[int] = []
+    size_ids, style_ids, faces_col, masks = (
+        array('i'), array('i'), array('i'), array('i')
+    )
+
+    for position, row in enumerate(rows):
+        stats.rows += 1
+        try:
+            faces = int(row.get('faces') or 0)
+        except ValueError:
+            stats.failed += 1
+            continue
+        size = row.get('size') or ''
+        style = row.get('style') or ''
+        options = parse_options(row.get('options'))
+
+        size_id = price_table.size_ids.get(size)
+        style_id = price_table.style_ids.get(style)
+        mask = price_table.mask(options)
+        if (
+            size_id is None or style_id is None or mask is None
+            or not 0 <= faces <= price_table.max_faces
+        ):
+            totals[position], _ = calculate_total_reference({
+                'size': size, 'style': style,
+                'faces': faces, 'options': options,
+            }, pricing)
+            stats.reference += 1
+            continue
+
+        positions.append(position)
+        size_ids.append(size_id)
+        style_ids.append(style_id)
+        faces_col.append(faces)
+        masks.append(mask)
+
+    quoted = price_table.quote_codes(size_ids, style_ids, faces_col, masks)
+    for position, total in zip(positions, quoted.tolist()):
+        totals[position] = total
+    stats.table += len(positions)
+    return totals
+
+
+def quote_csv(
+    src: TextIO,
+    dst: TextIO,
+    pricing: PricingSnapshot,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> QuoteStats:
+    # Потоковый расчёт: CSV читается и пишется порциями, исходные
+    # столбцы сохраняются, к ним добавляется столбец total
+    reader = csv.DictReader(src)
+    fieldnames = list(reader.fieldnames or FIELDS)
+    if TOTAL_FIELD not in fieldnames:
+        fieldnames.append(TOTAL_FIELD)
+    writer = csv.DictWriter(dst, fieldnames=fieldnames)
+    writer.writeheader()
+
+    stats = QuoteStats()
+    for chunk in read_chunks(reader, chunk_size):
+        totals = price_rows(chunk, pricing, stats)
+        for row, total in zip(chunk, totals):
+            row[TOTAL_FIELD] = '' if total is None else total
+        writer.writerows(chunk)
+    return stats
+
+
+def price_list_orders(
+    pricing: PricingSnapshot,
+) -> Iterator[tuple[str, str, int, tuple[str, ...]]]:
+    # Все допустимые заказы: для стилей с отрисовкой 1..max_faces лиц,
+    # для остальных — без лиц; опции в порядке прайса
+    price_table = pricing.table
+    option_sets = [
+        combo
+        for count in range(len(price_table.options) + 1)
+        for combo in combinations(price_table.options, count)
+    ]
+    for size in price_table.sizes:
+        for style in price_table.styles:
+            faces_range = (
+                range(1, price_table.max_faces + 1)
+                if style in pricing.drawing_styles else (0,)
+            )
+            for faces in faces_range:
+                for options in option_sets:
+                    yield size, style, faces, options
+
+
+def price_list_rows(
+    pricing: PricingSnapshot, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[dict]:
+    # Строки прайс-листа. Заказы перебираются лениво и считаются
+    # порциями по chunk_size через quote_codes.
+    price_table = pricing.table
+    for chunk in read_chunks(price_list_orders(pricing), chunk_size):
+        totals = price_table.quote_codes(
+            [price_table.size_ids[size] for size, _, _, _ in chunk],
+            [price_table.style_ids[style] for _, style, _, _ in chunk],
+            [faces for _, _, faces, _ in chunk],
+            [price_table.mask(options) for _, _, _, options in chunk],
+        )
+        for (size, style, faces, options), total in zip(
+            chunk, totals.tolist()
+        ):
+            yield {
+                'size': size,
+                'style': style,
+                'faces': faces,
+                'options': OPTION_SEPARATOR.join(options),
+                TOTAL_FIELD: total,
+            }
+
+
+def write_price_list(dst: TextIO, pricing: PricingSnapshot) -> int:
+    # Полный прайс-лист в CSV; возвращает число строк
+    writer = csv.DictWriter(dst, fieldnames=[*FIELDS, TOTAL_FIELD])
+    writer.writeheader()
+    count = 0
+    for row in price_list_rows(pricing):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def open_csv(path: str, mode: str, stack: ExitStack) -> TextIO:
+    # '-' — стандартный ввод/вывод
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    return stack.enter_context(
+        Path(path).open(mode, encoding='utf-8', newline='')
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Пакетный расчёт стоимости заказов и выгрузка прайса.'
+    )
+    parser.add_argument(
+        'input', nargs='?', default='-',
+        help='CSV со столбцами size, style, faces, options ("-" — stdin)'
+    )
+    parser.add_argument('-o', '--output', default='-')
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE
+    )
+    parser.add_argument(
+        '--price-list', action='store_true',
+        help='выгрузить полный прайс-лист вместо расчёта заказов'
+    )
+    parser.add_argument(
+        '--prices', type=Path, default=None,
+        help='файл прайса (по умолчанию PRICES_PATH)'
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.prices:
+        pricing = load_pricing(args.prices)
+    else:
+        price_store.load()
+        pricing = price_store.current()
+    logger.info(f'Прайс версии {pricing.version}')
+    with ExitStack() as stack:
+        dst = open_csv(args.output, 'w', stack)
+        if args.price_list:
+            count = write_price_list(dst, pricing)
+            logger.info(f'Строк в прайс-листе: {count}')
+            return
+        src = open_csv(args.input, 'r', stack)
+        stats = quote_csv(src, dst, pricing, args.chunk_size)
+    logger.info(
+        f'Строк: {stats.rows}, по таблице: {stats.table}, '
+        f'эталонным расчётом: {stats.reference}, ошибок: {stats.failed}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import json
+import logging
+import mmap
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+from bot.config import ASSET_BUNDLE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Формат файла: заголовок (сигнатура + длина индекса), индекс в JSON,
+# затем содержимое изображений подряд. Смещения в индексе отсчитываются
+# от начала блока данных.
+MAGIC = b'FHB1'
+HEADER = struct.Struct('<4sI')
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    style: str
+    name: str
+    offset: int
+    length: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class BundleState:
+    mapped: mmap.mmap
+    data_start: int
+    entries: dict[str, tuple[BundleEntry, ...]]
+
+
+class AssetBundle:
+    # Упакованные примеры работ, отображённые в память (mmap).
+    # Страницы файла разделяются всеми процессами бота через page cache,
+    # а чтение изображения — это срез memoryview без системных вызовов.
+    # Индекс и отображение хранятся вместе и подменяются одним
+    # присваиванием, поэтому переоткрытие безопасно из другого потока.
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._state: BundleState | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._state is not None
+
+    def open(self) -> None:
+        # (Пере)открытие бандла. Старое отображение не закрываем явно:
+        # на него могут ссылаться срезы, отданные на загрузку.
+        with open(self.path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError(f'Неизвестный формат бандла: {self.path}')
+        index_start = HEADER.size
+        index = json.loads(mapped[index_start:index_start + index_length])
+
+        entries: dict[str, list[BundleEntry]] = {}
+        for item in index:
+            entry = BundleEntry(**item)
+            entries.setdefault(entry.style, []).append(entry)
+
+        self._state = BundleState(
+            mapped=mapped,
+            data_start=index_start + index_length,
+            entries={style: tuple(items) for style, items in entries.items()},
+        )
+        logger.info(f'[BUNDLE] Открыт {self.path}: {len(index)} изображений')
+
+    def close(self) -> None:
+        self._state = None
+
+    def entries(self, style: str) -> tuple[BundleEntry, ...] | None:
+        if self._state is None:
+            return None
+        return self._state.entries.get(style)
+
+    def path_for(self, entry: BundleEntry) -> Path:
+        # Виртуальный путь изображения, под которым оно хранится в каталоге
+        return self.path / entry.style / entry.name
+
+    def find(self, img_path: Path) -> tuple[BundleEntry, memoryview] | None:
+        # Запись бандла и срез её данных (без копирования) по виртуальному
+        # пути изображения
+        state = self._state
+        if state is None or img_path.parent.parent != self.path:
+            return None
+        for entry in state.entries.get(img_path.parent.name, ()):
+            if entry.name == img_path.name:
+                start = state.data_start + entry.offset
+                view = memoryview(state.mapped)[start:start + entry.length]
+                return entry, view
+        return None
+
+
+asset_bundle = AssetBundle(ASSET_BUNDLE_PATH)
@@ -1,15 +1,37 @@
-from bot.prices import BASE_PRICES, DRAWING_STYLES, EXTRA_OPTIONS
+from functools import lru_cache
+from typing import Iterable, NamedTuple
 
+from bot.utils.price_store import price_store
+from bot.utils.pricing import PricingSnapshot
+from bot.utils.summary_cache import summary_cache
 
-def calc_drawing_price(faces: int) -> int:
+
+class SummaryLines(NamedTuple):
+    # Готовые строки сводки для значений из прайса
+    sizes: dict[str, str]
+    styles: dict[str, str]
+    faces: list[str]
+    options: dict[str, str]
+
+
+def order_pricing(data: dict) -> PricingSnapshot:
+    # Прайс, по которому считается заказ: версия, с которой он начался
+    return price_store.get(data.get('pricing_version'))
+
+
+def calc_drawing_price(
+    faces: int, pricing: PricingSnapshot | None = None
+) -> int:
     # Расчёт стоимости отрисовки по числу лиц
-    if faces <= 0:
-        return 0
-    return 1200 + (faces - 1) * 600
+    return (pricing or price_store.current()).drawing_price(faces)
 
 
-def calculate_total(data: dict) -> tuple[int, list[str]]:
-    # Расчёт общей стоимости заказа
+def calculate_total_reference(
+    data: dict, pricing: PricingSnapshot | None = None
+) -> tuple[int, list[str]]:
+    # Эталонный расчёт стоимости заказа обходом прайса. Используется
+    # для заказов вне таблицы прайса и для проверки её значений.
+    pricing = pricing or order_pricing(data)
     size: str = data.get('size', '')
     style: str = data.get('style', '')
     faces: int = data.get('faces', 0)
@@ -19,13 +41,13 @@ def calculate_total(data: dict) -> tuple[int, list[str]]:
     lines: list[str] = []
 
     # Базовая цена
-    base_price: int = BASE_PRICES.get(size, 0)
+    base_price: int = pricing.base_prices.get(size, 0)
     total += base_price
     lines.append(f'• Размер: {size} — {base_price} ₽')
 
     # Отрисовка
-    if style in DRAWING_STYLES:
-        draw_price: int = calc_drawing_price(faces)
+    if style in pricing.drawing_styles:
+        draw_price: int = pricing.drawing_price(faces)
         total += draw_price
         lines.append(f'• Стиль: {style}')
         lines.append(f'• Лиц: {faces} — {draw_price} ₽')
@@ -34,14 +56,116 @@ def calculate_total(data: dict) -> tuple[int, list[str]]:
 
     # Доп. опции
     for opt in options:
-        price: int = EXTRA_OPTIONS.get(opt, 0)
+        price: int = pricing.extra_options.get(opt, 0)
         total += price
         lines.append(f'• {opt} — {price} ₽')
 
     return total, lines
 
 
-def format_summary(data: dict) -> str:
+@lru_cache(maxsize=8)
+def summary_lines(pricing: PricingSnapshot) -> SummaryLines:
+    # Строки сводки собираются один раз на версию прайса
+    return SummaryLines(
+        sizes={
+            size: f'• Размер: {size} — {price} ₽'
+            for size, price in pricing.base_prices.items()
+        },
+        styles={style: f'• Стиль: {style}' for style in pricing.styles},
+        faces=[
+            f'• Лиц: {faces} — {pricing.drawing_price(faces)} ₽'
+            for faces in range(pricing.max_faces + 1)
+        ],
+        options={
+            opt: f'• {opt} — {price} ₽'
+            for opt, price in pricing.extra_options.items()
+        },
+    )
+
+
+def quote(
+    size: str,
+    style: str,
+    faces: int,
+    options: Iterable[str],
+    pricing: PricingSnapshot | None = None,
+) -> int:
+    # Итоговая стоимость заказа по таблице (с откатом на эталонный расчёт)
+    pricing = pricing or price_store.current()
+    options = list(options)
+    total = pricing.table.quote(size, style, faces, options)
+    if total is None:
+        total, _ = calculate_total_reference({
+            'size': size, 'style': style, 'faces': faces, 'options': options
+        }, pricing)
+    return total
+
+
+@lru_cache(maxsize=8)
+def order_rows(
+    pricing: PricingSnapshot,
+) -> dict[tuple, tuple[int, tuple[str, ...]]]:
+    # Итог и строки сводки уже посчитанных заказов из таблицы прайса.
+    # Ключ — значения заказа с опциями в порядке выбора; число ключей
+    # ограничено таблицей (заказы вне её сюда не попадают).
+    return {}
+
+
+def calculate_total(data: dict) -> tuple[int, list[str]]:
+    # Расчёт общей стоимости заказа: повторный заказ — одно обращение
+    # к словарю, новый — итог из таблицы и готовые строки сводки
+    pricing = order_pricing(data)
+    size: str = data.get('size', '')
+    style: str = data.get('style', '')
+    faces: int = data.get('faces', 0)
+    options: list[str] = data.get('options', [])
+
+    rows = order_rows(pricing)
+    key = (size, style, faces, *options)
+    row = rows.get(key)
+    if row is None:
+        total = pricing.table.quote(size, style, faces, options)
+        if total is None:
+            return calculate_total_reference(data, pricing)
+        lines = summary_lines(pricing)
+        result = [lines.sizes[size], lines.styles[style]]
+        if style in pricing.drawing_styles:
+            result.append(lines.faces[faces])
+        result.extend(lines.options[opt] for opt in options)
+        row = rows[key] = (total, tuple(result))
+    return row[0], list(row[1])
+
+
+def render_summary(data: dict) -> str:
     # Форматирование итогового сообщения
     total, lines = calculate_total(data)
     return '🧾 Ваш заказ:\n' + '\n'.join(lines) + f'\n\n💰 Итого: {total} ₽'
+
+
+def format_summary(data: dict) -> str:
+    # Сводка заказа из кэша. Заказ нормализуется: опции — множество
+    # (выводятся в порядке прайса), лица — только для стилей с отрисовкой.
+    # Ключ — позиция заказа в таблице; заказы вне таблицы не кэшируются.
+    pricing = order_pricing(data)
+    size: str = data.get('size', '')
+    style: str = data.get('style', '')
+    faces: int = (
+        data.get('faces', 0) if style in pricing.drawing_styles else 0
+    )
+    options: list[str] = data.get('options', [])
+
+    key = pricing.table.encode(size, style, faces, options)
+    if key is None:
+        return render_summary(data)
+
+    selected = set(options)
+    normalized = {
+        'size': size,
+        'style': style,
+        'faces': faces,
+        'options': [opt for opt in pricing.table.options if opt in selected],
+        'pricing_version': pricing.version,
+    }
+    return summary_cache.get(
+        pricing.version, key, lambda: render_summary(normalized)
+    )
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from bot.config import FILE_ID_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: Path) -> str:
+    # Хэш содержимого файла (читаем блоками, чтобы не держать файл целиком)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileIdCache:
+    # Кэш Telegram file_id, привязанный к пути и хэшу содержимого файла.
+    # В цикле событий кэш не обращается к диску: хэш передаёт вызывающий
+    # (из бандла или по только что загруженным байтам), запись на диск
+    # откладывается и выполняется в пуле потоков (schedule_save).
+    # Изменённые файлы находит revalidate — при загрузке и после каждого
+    # изменения каталога, включая перезапись файла под тем же именем
+    # (ImageCatalog сверяет mtime и размер файлов). Пока mtime и размер
+    # записи совпадают с файлом, хэш не пересчитывается; при расхождении
+    # хэша file_id сбрасывается, чтобы изображение загрузилось заново.
+
+    def __init__(self, path: Path, save_delay: float = 5) -> None:
+        self.path = path
+        self.save_delay = save_delay
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self._save_handle: asyncio.TimerHandle | None = None
+        self._save_task: asyncio.Task[None] | None = None
+        self._revalidate_task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> None:
+        # Загрузка кэша с диска при старте бота (до запуска цикла событий)
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                self._entries = json.load(file)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError):
+            logger.exception(f'Не удалось прочитать кэш file_id: {self.path}')
+            self._entries = {}
+        self._dirty = False
+        self.revalidate()
+        logger.info(f'Загружено file_id из кэша: {len(self._entries)}')
+
+    def _snapshot(self) -> dict[str, dict] | None:
+        # Копия записей для сохранения в другом потоке
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return {key: dict(entry) for key, entry in self._entries.items()}
+
+    def _write(self, entries: dict[str, dict]) -> None:
+        # Атомарная запись на диск
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(entries, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def save(self) -> None:
+        # Синхронная запись (только если были изменения) — для утилит
+        # и тестов; обработчики используют schedule_save
+        entries = self._snapshot()
+        if entries is not None:
+            self._write(entries)
+
+    def schedule_save(self) -> None:
+        # Отложенная запись: изменения за save_delay секунд уходят на
+        # диск одной записью в пуле потоков
+        if self._save_handle is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._save_handle = loop.call_later(
+            self.save_delay, self._start_save
+        )
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_in_thread())
+        else:
+            # Предыдущая запись ещё идёт — повторим позже
+            self.schedule_save()
+
+    async def _save_in_thread(self) -> None:
+        entries = self._snapshot()
+        if entries is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, entries)
+        except OSError:
+            logger.exception(f'Не удалось сохранить кэш file_id: {self.path}')
+            self._dirty = True
+
+    async def flush(self) -> None:
+        # Запись всех изменений при остановке бота
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._save_task is not None:
+            await self._save_task
+        await self._save_in_thread()
+
+    def revalidate(self) -> None:
+        # Сверка записей с файлами на диске. Выполняется при загрузке
+        # и в пуле потоков (schedule_revalidate) — не в цикле событий.
+        # Изображения из бандла на диске не найдутся: их хэш сверяет get.
+        for key, entry in list(self._entries.items()):
+            img_path = Path(key)
+            try:
+                stat = img_path.stat()
+            except OSError:
+                continue
+            if (
+                entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['size'] == stat.st_size
+            ):
+                continue
+
+            # Метаданные изменились — проверяем содержимое
+            if file_sha256(img_path) != entry['sha256']:
+                logger.info(
+                    f'Изображение изменилось, сброс file_id: {img_path}'
+                )
+                self._entries.pop(key, None)
+            else:
+                entry['mtime_ns'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+            self._dirty = True
+
+    def schedule_revalidate(self) -> None:
+        # Сверка с файлами в пуле потоков после изменения примеров
+        if self._revalidate_task is None or self._revalidate_task.done():
+            self._revalidate_task = asyncio.create_task(
+                asyncio.to_thread(self.revalidate)
+            )
+
+    def get(self, img_path: Path, sha256: str | None = None) -> str | None:
+        # Возвращает file_id без обращения к диску. Если известен хэш
+        # содержимого (бандл), запись с другим хэшем сбрасывается.
+        key = str(img_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if sha256 is None or entry['sha256'] == sha256:
+            return entry['file_id']
+        del self._entries[key]
+        self._dirty = True
+        return None
+
+    def put(self, img_path: Path, file_id: str, sha256: str) -> None:
+        # Сохраняет file_id вместе с хэшем загруженного содержимого.
+        # mtime и размер файла заполнит revalidate.
+        self._entries[str(img_path)] = {
+            'file_id': file_id,
+            'sha256': sha256,
+            'mtime_ns': None,
+            'size': None,
+        }
+        self._dirty = True
+
+
+file_id_cache = FileIdCache(FILE_ID_CACHE_PATH)
@@ -1,3 +1,14 @@
+from pathlib import Path
+
+
 def chunked(lst, n):
     # Разбивает список на подсписки по n элементов.
     return [lst[i:i + n] for i in range(0, len(lst), n)]
+
+
+def mtime_ns(path: Path) -> int | None:
+    # mtime файла или папки в наносекундах; None, если пути нет
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
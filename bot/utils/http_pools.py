@@ -0,0 +1,240 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from telegram.error import NetworkError, TimedOut
+from telegram.request import BaseRequest, RequestData
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    # Пул соединений с Bot API: число соединений, сколько из них держать
+    # открытыми и сколько секунд (keep-alive), тайм-ауты в секундах
+    # (pool — ожидание свободного соединения) и версия HTTP
+    size: int
+    keepalive: int
+    keepalive_expiry: float = 30
+    connect_timeout: float = 5
+    read_timeout: float = 5
+    write_timeout: float = 5
+    pool_timeout: float = 1
+    http_version: str = '1.1'
+
+
+class MeteredRequest(BaseRequest):
+    # Пул соединений с Bot API на httpx с настраиваемым keep-alive
+    # и счётчиками загрузки: сколько запросов выполняется сейчас
+    # и максимум, сколько запросов застали все соединения занятыми
+    # и ждали освобождения, сколько не дождались (pool timeout).
+    # Реализует только публичный интерфейс BaseRequest: HTTPXRequest
+    # в PTB 20.7 не принимает лимиты keep-alive.
+
+    __slots__ = (
+        'name', 'config', '_client', 'in_flight', 'peak', 'requests',
+        'waited', 'pool_timeouts', 'busy_time',
+    )
+
+    def __init__(self, name: str, config: PoolConfig) -> None:
+        if config.http_version not in ('1.1', '2', '2.0'):
+            raise ValueError(
+                f'Неизвестная версия HTTP: {config.http_version}'
+            )
+        self.name = name
+        self.config = config
+        self._client = self._build_client()
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self.waited = 0
+        self.pool_timeouts = 0
+        self.busy_time = 0.0
+
+    def _build_client(self) -> httpx.AsyncClient:
+        # Не больше keepalive открытых соединений и не дольше
+        # keepalive_expiry секунд
+        config = self.config
+        http1 = config.http_version == '1.1'
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.write_timeout,
+                pool=config.pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=config.size,
+                max_keepalive_connections=config.keepalive,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http1=http1,
+            http2=not http1,
+        )
+
+    @property
+    def read_timeout(self) -> float | None:
+        return self.config.read_timeout
+
+    async def initialize(self) -> None:
+        if self._client.is_closed:
+            self._client = self._build_client()
+
+    async def post(
+        self,
+        url: str,
+        request_data: RequestData | None = None,
+        read_timeout: Any = BaseRequest.DEFAULT_NONE,
+        write_timeout: Any = BaseRequest.DEFAULT_NONE,
+        connect_timeout: Any = BaseRequest.DEFAULT_NONE,
+        pool_timeout: Any = BaseRequest.DEFAULT_NONE,
+    ) -> Any:
+        # Для загрузок файлов без явного write_timeout BaseRequest
+        # подставляет 20 с; здесь действует write_timeout пула
+        return await super().post(
+            url, request_data, read_timeout,
+            self._or_default(write_timeout, self.config.write_timeout),
+            connect_timeout, pool_timeout,
+        )
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout: Any = BaseRequest.DEFAULT_NONE,
+        write_timeout: Any = BaseRequest.DEFAULT_NONE,
+        connect_timeout: Any = BaseRequest.DEFAULT_NONE,
+        pool_timeout: Any = BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        if self._client.is_closed:
+            raise RuntimeError(f'Пул {self.name} не инициализирован')
+        # Тайм-ауты, не заданные в вызове, — из настроек пула
+        config = self.config
+        timeout = httpx.Timeout(
+            connect=self._or_default(connect_timeout, config.connect_timeout),
+            read=self._or_default(read_timeout, config.read_timeout),
+            write=self._or_default(write_timeout, config.write_timeout),
+            pool=self._or_default(pool_timeout, config.pool_timeout),
+        )
+
+        self.requests += 1
+        if self.in_flight >= config.size:
+            self.waited += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        started = time.perf_counter()
+        try:
+            response = await self._client.request(
+                method=method,
+                url=url,
+                headers={'User-Agent': self.USER_AGENT},
+                timeout=timeout,
+                files=request_data.multipart_data if request_data else None,
+                data=request_data.json_parameters if request_data else None,
+            )
+        except httpx.PoolTimeout as e:
+            self.pool_timeouts += 1
+            logger.warning(
+                f'[HTTP] Пул {self.name}: все {config.size} '
+                f'соединений заняты'
+            )
+            raise TimedOut(
+                'Pool timeout: все соединения пула заняты, '
+                'запрос не отправлен'
+            ) from e
+        except httpx.TimeoutException as e:
+            raise TimedOut from e
+        except httpx.HTTPError as e:
+            raise NetworkError(f'httpx.{e.__class__.__name__}: {e}') from e
+        finally:
+            self.in_flight -= 1
+            self.busy_time += time.perf_counter() - started
+        return response.status_code, response.content
+
+    @staticmethod
+    def _or_default(value: Any, default: float) -> Any:
+        return default if value is BaseRequest.DEFAULT_NONE else value
+
+    async def shutdown(self) -> None:
+        if self._client.is_closed:
+            return
+        logger.info(f'[HTTP] Пул {self.name}: {self.stats()}')
+        await self._client.aclose()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            'size': self.config.size,
+            'in_flight': self.in_flight,
+            'peak': self.peak,
+            'requests': self.requests,
+            'waited': self.waited,
+            'pool_timeouts': self.pool_timeouts,
+            'avg_ms': round(
+                self.busy_time / self.requests * 1000
+                if self.requests else 0, 2
+            ),
+        }
+
+
+class RoutedRequest(BaseRequest):
+    # Обычные вызовы и загрузки файлов в разных пулах: долгие загрузки
+    # фото не занимают соединения, нужные ответам на сообщения
+
+    __slots__ = ('regular', 'media')
+
+    def __init__(self, regular: MeteredRequest, media: MeteredRequest):
+        self.regular = regular
+        self.media = media
+
+    def pool_for(self, request_data: RequestData | None) -> MeteredRequest:
+        if request_data is not None and request_data.multipart_data:
+            return self.media
+        return self.regular
+
+    @property
+    def read_timeout(self) -> float | None:
+        return self.regular.read_timeout
+
+    async def initialize(self) -> None:
+        await self.regular.initialize()
+        await self.media.initialize()
+
+    async def shutdown(self) -> None:
+        await self.regular.shutdown()
+        await self.media.shutdown()
+
+    async def post(
+        self,
+        url: str,
+        request_data: RequestData | None = None,
+        read_timeout: Any = BaseRequest.DEFAULT_NONE,
+        write_timeout: Any = BaseRequest.DEFAULT_NONE,
+        connect_timeout: Any = BaseRequest.DEFAULT_NONE,
+        pool_timeout: Any = BaseRequest.DEFAULT_NONE,
+    ) -> Any:
+        # Разбор ответа и ошибок Telegram — в выбранном пуле
+        return await self.pool_for(request_data).post(
+            url, request_data, read_timeout, write_timeout,
+            connect_timeout, pool_timeout,
+        )
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout: Any = BaseRequest.DEFAULT_NONE,
+        write_timeout: Any = BaseRequest.DEFAULT_NONE,
+        connect_timeout: Any = BaseRequest.DEFAULT_NONE,
+        pool_timeout: Any = BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        return await self.pool_for(request_data).do_request(
+            url, method, request_data, read_timeout, write_timeout,
+            connect_timeout, pool_timeout,
+        )
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {'regular': self.regular.stats(), 'media': self.media.stats()}
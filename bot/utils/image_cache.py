@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+from bot.config import IMAGE_CACHE_MB
+
+logger = logging.getLogger(__name__)
+
+
+class ImageBytesCache:
+    # LRU-кэш содержимого изображений с ограничением по объёму памяти.
+    # Чтение с диска выполняется в пуле потоков, поэтому не блокирует
+    # цикл событий. Одновременные запросы одного файла читают его один раз.
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[Path, bytes] = OrderedDict()
+        self._pending: dict[Path, asyncio.Future[bytes]] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def get(self, path: Path) -> bytes:
+        data = self._items.get(path)
+        if data is not None:
+            self._items.move_to_end(path)
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        pending = self._pending.get(path)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, path.read_bytes)
+        self._pending[path] = future
+        try:
+            data = await future
+        finally:
+            del self._pending[path]
+        self._store(path, data)
+        return data
+
+    def _store(self, path: Path, data: bytes) -> None:
+        # Файлы больше всего бюджета не кэшируем
+        if len(data) > self.max_bytes or path in self._items:
+            return
+        while self.size + len(data) > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+        self._items[path] = data
+        self.size += len(data)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'items': len(self._items),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+image_cache = ImageBytesCache(IMAGE_CACHE_MB * 2**20)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+from bot.config import (
+    COLLAGE_DIR,
+    EXAMPLES_LIMIT,
+    IMAGE_DIR,
+    OPTIMIZED_IMAGE_DIR,
+    OPTIMIZED_READY,
+)
+from bot.prices import STYLE_OPTIONS
+from bot.utils.asset_bundle import AssetBundle, asset_bundle
+from bot.utils.helpers import mtime_ns
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+
+def examples_root() -> Path:
+    # Оптимизированные копии, если собраны все, иначе исходники
+    if OPTIMIZED_READY.exists():
+        return OPTIMIZED_IMAGE_DIR
+    return IMAGE_DIR
+
+
+class ImageCatalog:
+    # Индекс «стиль → изображения», который строится при старте бота.
+    # Обработчики получают список одним обращением к словарю и не
+    # обращаются к файловой системе. Индекс перестраивается при изменении
+    # папок, файлов изображений или бандла (см. watch) или по команде
+    # администратора.
+    # Если файл бандла существует, изображения берутся из него, а пути
+    # в индексе — виртуальные (<бандл>/<стиль>/<файл>). Коллажи-превью
+    # (python -m bot.tools.build_collages) индексируются вместе с ними.
+
+    def __init__(
+        self,
+        styles: list[str],
+        limit: int | None = None,
+        bundle: AssetBundle | None = None,
+        collage_dir: Path | None = None,
+    ) -> None:
+        self.styles = styles
+        self.limit = limit
+        self.bundle = bundle
+        self.collage_dir = collage_dir
+        self.root: Path = IMAGE_DIR
+        # None — папка стиля отсутствует
+        self._images: dict[str, tuple[Path, ...] | None] = {}
+        self._collages: dict[str, Path] = {}
+        self._signature: tuple = ()
+
+    def _current_signature(self, root: Path) -> tuple:
+        # Отпечаток состояния: корень, mtime папок и бандла, mtime и
+        # размер каждого изображения. Перезапись файла под тем же именем
+        # не меняет mtime папки, поэтому файлы сверяются по отдельности.
+        bundle_mtime = mtime_ns(self.bundle.path) if self.bundle else None
+        collage_mtime = (
+            mtime_ns(self.collage_dir) if self.collage_dir else None
+        )
+        folders = [root / style for style in self.styles]
+        if bundle_mtime is not None:
+            # Изображения берутся из бандла, файлы папок не важны
+            files: tuple = ()
+        else:
+            files = tuple(self._file_stats(folder) for folder in folders)
+        if self.collage_dir is not None:
+            files += (self._file_stats(self.collage_dir),)
+        return (root, mtime_ns(root), bundle_mtime, collage_mtime) + tuple(
+            mtime_ns(folder) for folder in folders
+        ) + files
+
+    @staticmethod
+    def _file_stats(folder: Path) -> tuple[tuple[str, int, int], ...]:
+        # (имя, mtime, размер) изображений папки
+        stats = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if Path(entry.name).suffix.lower() not in IMAGE_SUFFIXES:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    stats.append(
+                        (entry.name, stat.st_mtime_ns, stat.st_size)
+                    )
+        except OSError:
+            return ()
+        return tuple(sorted(stats))
+
+    def _scan(self, style_path: Path) -> tuple[Path, ...] | None:
+        if not style_path.is_dir():
+            return None
+        images = sorted(
+            path for path in style_path.iterdir()
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        )
+        return tuple(images[:self.limit])
+
+    def _from_bundle(self, style: str) -> tuple[Path, ...] | None:
+        assert self.bundle is not None
+        entries = self.bundle.entries(style)
+        if entries is None:
+            return None
+        return tuple(
+            self.bundle.path_for(entry) for entry in entries[:self.limit]
+        )
+
+    def _scan_collages(self) -> dict[str, Path]:
+        if self.collage_dir is None:
+            return {}
+        paths = {
+            style: self.collage_dir / f'{style}.jpg' for style in self.styles
+        }
+        return {style: path for style, path in paths.items() if path.is_file()}
+
+    def load(self) -> None:
+        # Полное перестроение индекса. Новый словарь подменяется целиком,
+        # поэтому может выполняться в отдельном потоке.
+        root = examples_root()
+        signature = self._current_signature(root)
+        if self.bundle is not None and self.bundle.path.exists():
+            self.bundle.open()
+            root = self.bundle.path
+            images = {style: self._from_bundle(style) for style in self.styles}
+        else:
+            if self.bundle is not None:
+                self.bundle.close()
+            images = {
+                style: self._scan(root / style) for style in self.styles
+            }
+        self._images = images
+        self._collages = self._scan_collages()
+        self.root = root
+        self._signature = signature
+        logger.info(f'[CATALOG] Индекс примеров построен: {root}')
+        for style, count in self.counts().items():
+            if count is None:
+                logger.error(f'[CATALOG] Папка не найдена: {root / style}')
+            else:
+                logger.info(f'[CATALOG] {style}: {count} изображений')
+
+    def refresh(self) -> bool:
+        # Перестроение индекса, только если папки или файлы изменились
+        if self._current_signature(examples_root()) == self._signature:
+            return False
+        self.load()
+        return True
+
+    async def watch(
+        self,
+        interval: float,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
+        # Фоновая проверка изменений без блокировки цикла событий
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception('[CATALOG] Ошибка обновления индекса')
+                continue
+            if changed and on_change is not None:
+                on_change()
+
+    def get(self, style: str) -> tuple[Path, ...] | None:
+        # Изображения стиля; None, если папки стиля нет
+        return self._images.get(style)
+
+    def collage(self, style: str) -> Path | None:
+        # Коллаж-превью стиля, если он собран
+        return self._collages.get(style)
+
+    def all_paths(self) -> list[Path]:
+        # Все изображения и коллажи каталога (для прогрева file_id)
+        paths = [
+            path for images in self._images.values() if images
+            for path in images
+        ]
+        return paths + list(self._collages.values())
+
+    def counts(self) -> dict[str, int | None]:
+        return {
+            style: None if images is None else len(images)
+            for style, images in self._images.items()
+        }
+
+
+image_catalog = ImageCatalog(
+    STYLE_OPTIONS, EXAMPLES_LIMIT, asset_bundle, COLLAGE_DIR
+)
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from bot.handlers.fsm import FlowEngine
+
+logger = logging.getLogger(__name__)
+
+ConversationKey = tuple[int | str, ...]
+ConversationDict = dict[ConversationKey, object]
+
+# Состояние сценария FlowEngine: имя сценария и локальное состояние
+FlowState = tuple[str, int]
+
+# Состояния сценариев FlowEngine хранятся парой (сценарий, локальное
+# состояние): код состояния зависит от порядка сценариев и после их
+# изменения указал бы на другой шаг. Прежние записи кодами
+# (conversations, name = 'fsm') удаляются.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state INTEGER NOT NULL,
+    PRIMARY KEY (name, key)
+);
+CREATE TABLE IF NOT EXISTS flow_states (
+    user_id INTEGER PRIMARY KEY,
+    flow TEXT NOT NULL,
+    state INTEGER NOT NULL
+);
+DELETE FROM conversations WHERE name = 'fsm';
+'''
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False)
+    # WAL: чтение не ждёт записи; NORMAL — без fsync на каждую
+    # транзакцию (после сбоя питания теряются последние секунды)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
+
+
+class SQLitePersistence(BasePersistence[dict, dict, dict]):
+    # Незавершённые заказы (user_data) и шаги сценариев переживают
+    # перезапуск бота.
+    #
+    # Запись отложенная: Application раз в update_interval секунд
+    # передаёт данные пользователей, обработанных за это время, а здесь
+    # они копятся и записываются одной транзакцией в отдельном потоке.
+    # При остановке всё накопленное записывается (flush), ошибка этой
+    # записи передаётся вызывающему.
+    #
+    # user_data пользователя читается из базы (в пуле потоков) при первом
+    # его обновлении после запуска, а не вся таблица при старте.
+    # Состояния сценариев (по строке на пользователя посреди сценария)
+    # загружаются сразу: FlowEngine выбирает обработчик до чтения
+    # user_data.
+
+    __slots__ = (
+        'path', '_writer', '_reader', '_read_lock', '_loaded', '_loading',
+        '_users', '_states', '_flows', '_engine', '_write_task',
+        '_write_lock', 'batches', 'rows',
+    )
+
+    def __init__(self, path: Path, update_interval: float = 10) -> None:
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=False, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self.path = path
+        self._writer = connect(path)
+        self._writer.executescript(SCHEMA)
+        self._reader = connect(path)
+        # Соединение для чтения используется из пула потоков
+        self._read_lock = threading.Lock()
+        # Пользователи, чьи user_data уже прочитаны из базы, и чтения,
+        # которые ещё идут
+        self._loaded: set[int] = set()
+        self._loading: dict[int, asyncio.Future[None]] = {}
+        # Ожидают записи: user_data (None — удалить), состояния
+        # ConversationHandler и FlowEngine (None — сценарий завершён)
+        self._users: dict[int, dict | None] = {}
+        self._states: dict[tuple[str, str], int | None] = {}
+        self._flows: dict[int, FlowState | None] = {}
+        self._engine: FlowEngine | None = None
+        self._write_task: asyncio.Task[None] | None = None
+        self._write_lock = asyncio.Lock()
+        # Записано транзакций и строк
+        self.batches = 0
+        self.rows = 0
+
+    def attach(self, engine: FlowEngine) -> None:
+        # Восстановить состояния сценариев и сохранять их изменения.
+        # Состояния сценариев и шагов, которых больше нет (сценарии
+        # изменились с прошлого запуска), отбрасываются.
+        restored = 0
+        for user_id, flow, state in self._load_flows():
+            code = engine.encode(flow, state)
+            if code is not None:
+                engine.records[user_id] = code
+                restored += 1
+        self._engine = engine
+        engine.on_change = self._state_changed
+        logger.info(f'[PERSIST] Восстановлено сценариев: {restored}')
+
+    def _state_changed(self, user_id: int, code: int | None) -> None:
+        # Запишется вместе с user_data: обновление, изменившее состояние,
+        # отмечает пользователя для ближайшей записи
+        assert self._engine is not None
+        self._flows[user_id] = (
+            None if code is None else self._engine.decode(code)
+        )
+
+    def _load_flows(self) -> list[tuple[int, str, int]]:
+        with self._read_lock:
+            return self._reader.execute(
+                'SELECT user_id, flow, state FROM flow_states'
+            ).fetchall()
+
+    def _load_conversations(self, name: str) -> ConversationDict:
+        with self._read_lock:
+            rows = self._reader.execute(
+                'SELECT key, state FROM conversations WHERE name = ?',
+                (name,),
+            ).fetchall()
+        return {tuple(json.loads(key)): state for key, state in rows}
+
+    def _load_user(self, user_id: int) -> dict | None:
+        with self._read_lock:
+            row = self._reader.execute(
+                'SELECT data FROM user_data WHERE user_id = ?', (user_id,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    async def get_user_data(self) -> dict[int, dict]:
+        # Загружаются по одному в refresh_user_data
+        return {}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> ConversationDict:
+        return self._load_conversations(name)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        # Чтение в пуле потоков. Другие обновления того же пользователя
+        # (например, из другого чата) ждут его завершения.
+        if user_id in self._loaded:
+            return
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return
+
+        pending = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = pending
+        try:
+            data = await asyncio.to_thread(self._load_user, user_id)
+            if data is not None:
+                user_data.update(data)
+            self._loaded.add(user_id)
+        finally:
+            del self._loading[user_id]
+            pending.set_result(None)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._users[user_id] = data
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._users[user_id] = None
+        self._schedule_write()
+
+    async def update_conversation(
+        self, name: str, key: ConversationKey, new_state: object | None
+    ) -> None:
+        self._states[(name, json.dumps(list(key)))] = (
+            new_state  # type: ignore[assignment]
+        )
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    def _schedule_write(self) -> None:
+        # Application передаёт все изменения за интервал разом; запись
+        # начинается, когда они уже накоплены, — одна транзакция на всех
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self, raise_errors: bool = False) -> None:
+        # Ошибка записи (база заблокирована, диск заполнен) не теряет
+        # изменения: пакет возвращается в очередь и запишется со
+        # следующим. Фоновая запись только логирует ошибку, flush
+        # передаёт её вызывающему.
+        async with self._write_lock:
+            while self._users or self._states or self._flows:
+                users, self._users = self._users, {}
+                states, self._states = self._states, {}
+                flows, self._flows = self._flows, {}
+                try:
+                    await asyncio.to_thread(
+                        self._write, users, states, flows
+                    )
+                except sqlite3.Error:
+                    self._requeue(users, states, flows)
+                    logger.exception(
+                        f'[PERSIST] Не удалось записать изменения '
+                        f'({len(users) + len(states) + len(flows)} '
+                        f'строк), повтор со следующей записью'
+                    )
+                    if raise_errors:
+                        raise
+                    return
+
+    def _requeue(
+        self,
+        users: dict[int, dict | None],
+        states: dict[tuple[str, str], int | None],
+        flows: dict[int, FlowState | None],
+    ) -> None:
+        # Изменения, пришедшие во время записи, новее — их не затираем
+        for user_id, data in users.items():
+            self._users.setdefault(user_id, data)
+        for key, state in states.items():
+            self._states.setdefault(key, state)
+        for user_id, flow in flows.items():
+            self._flows.setdefault(user_id, flow)
+
+    def _write(
+        self,
+        users: dict[int, dict | None],
+        states: dict[tuple[str, str], int | None],
+        flows: dict[int, FlowState | None],
+    ) -> None:
+        with self._writer:
+            self._writer.executemany(
+                'INSERT OR REPLACE INTO user_data VALUES (?, ?)',
+                [
+                    (user_id, json.dumps(data, ensure_ascii=False))
+                    for user_id, data in users.items() if data is not None
+                ],
+            )
+            self._writer.executemany(
+                'DELETE FROM user_data WHERE user_id = ?',
+                [
+                    (user_id,)
+                    for user_id, data in users.items() if data is None
+                ],
+            )
+            self._writer.executemany(
+                'INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)',
+                [
+                    (name, key, state)
+                    for (name, key), state in states.items()
+                    if state is not None
+                ],
+            )
+            self._writer.executemany(
+                'DELETE FROM conversations WHERE name = ? AND key = ?',
+                [key for key, state in states.items() if state is None],
+            )
+            self._writer.executemany(
+                'INSERT OR REPLACE INTO flow_states VALUES (?, ?, ?)',
+                [
+                    (user_id, *flow)
+                    for user_id, flow in flows.items() if flow is not None
+                ],
+            )
+            self._writer.executemany(
+                'DELETE FROM flow_states WHERE user_id = ?',
+                [
+                    (user_id,)
+                    for user_id, flow in flows.items() if flow is None
+                ],
+            )
+        self.batches += 1
+        self.rows += len(users) + len(states) + len(flows)
+
+    async def flush(self) -> None:
+        # Последний вызов перед остановкой (Application.shutdown): запись
+        # всего накопленного и закрытие соединений
+        try:
+            await self._write_pending(raise_errors=True)
+        finally:
+            self._writer.close()
+            with self._read_lock:
+                self._reader.close()
+        logger.info(
+            f'[PERSIST] Записано: {self.rows} строк '
+            f'за {self.batches} транзакций'
+        )
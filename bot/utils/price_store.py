@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from bot.config import PRICES_PATH
+from bot.prices import DEFAULT_PRICING
+from bot.utils.helpers import mtime_ns
+from bot.utils.pricing import PricingSnapshot, compile_pricing, load_pricing
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних версий прайса держать для незавершённых заказов
+KEEP_VERSIONS = 8
+
+
+class PriceStore:
+    # Текущий прайс и несколько предыдущих версий. Новый снимок
+    # собирается целиком (в потоке, см. watch) и подменяется одним
+    # присваиванием, поэтому обработчики всегда видят согласованный прайс.
+    # Заказ запоминает версию, с которой начался (см. get), и
+    # досчитывается по ней даже после смены прайса.
+
+    def __init__(self, path: Path, keep: int = KEEP_VERSIONS) -> None:
+        self.path = path
+        self.keep = keep
+        self._versions: OrderedDict[str, PricingSnapshot] = OrderedDict()
+        # Вызывается с версией, вытесненной из истории (из потока load)
+        self.on_evict: Callable[[str], object] | None = None
+        self._current = compile_pricing(DEFAULT_PRICING)
+        self._remember(self._current)
+        self._mtime: int | None = None
+        self._reload_requested = asyncio.Event()
+
+    def current(self) -> PricingSnapshot:
+        return self._current
+
+    def get(self, version: str | None) -> PricingSnapshot:
+        # Снимок версии заказа; текущий, если версия неизвестна
+        # или уже вытеснена
+        current = self._current
+        if version is None or version == current.version:
+            return current
+        return self._versions.get(version, current)
+
+    def find(self, version: str) -> PricingSnapshot | None:
+        # Снимок версии; None, если версия уже вытеснена из истории
+        return self._versions.get(version)
+
+    def _remember(self, snapshot: PricingSnapshot) -> None:
+        self._versions[snapshot.version] = snapshot
+        self._versions.move_to_end(snapshot.version)
+        while len(self._versions) > self.keep:
+            version, _ = self._versions.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(version)
+
+    def load(self) -> bool:
+        # Чтение файла прайса. При ошибке остаётся прежний прайс.
+        # True — версия прайса сменилась.
+        self._mtime = mtime_ns(self.path)
+        if self._mtime is None:
+            logger.warning(
+                f'[PRICES] Файл {self.path} не найден, '
+                f'используется прайс {self._current.version}'
+            )
+            return False
+        try:
+            snapshot = load_pricing(self.path)
+        except (OSError, ValueError) as e:
+            logger.error(f'[PRICES] Прайс {self.path} не загружен: {e}')
+            return False
+
+        previous = self._current
+        if snapshot.version == previous.version:
+            return False
+        self._remember(snapshot)
+        self._current = snapshot
+        logger.info(
+            f'[PRICES] Прайс обновлён: {previous.version} → '
+            f'{snapshot.version}'
+        )
+        return True
+
+    def refresh(self) -> bool:
+        # Перечитать файл, только если изменился его mtime
+        if mtime_ns(self.path) == self._mtime:
+            return False
+        return self.load()
+
+    def request_reload(self) -> None:
+        # Внеочередная перезагрузка (обработчик SIGHUP)
+        self._reload_requested.set()
+
+    async def watch(self, interval: float) -> None:
+        # Фоновая проверка файла прайса без блокировки цикла событий.
+        # По request_reload файл перечитывается сразу и без учёта mtime.
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._reload_requested.wait(), interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            forced = self._reload_requested.is_set()
+            self._reload_requested.clear()
+            try:
+                await asyncio.to_thread(
+                    self.load if forced else self.refresh
+                )
+            except Exception:
+                logger.exception('[PRICES] Ошибка обновления прайса')
+
+
+price_store = PriceStore(PRICES_PATH)
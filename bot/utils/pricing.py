@@ -0,0 +1,251 @@
+import hashlib
+import json
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Mapping, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+# Максимальное число лиц на портрете
+MAX_FACES = 10
+# Максимальное число доп. опций (таблица растёт как 2 ** опций)
+MAX_OPTIONS = 10
+
+
+class PriceTable:
+    # Предрасчитанные итоги для всех допустимых заказов.
+    # Размер, стиль и опции кодируются целыми числами (опции — битовой
+    # маской), а итог заказа — один элемент массива:
+    # totals[((size * styles + style) * faces + faces_count) * masks + mask]
+    # Для 4 размеров, 6 стилей, 0–10 лиц и 4 опций это 4224 значения.
+    # totals_array — тот же массив для NumPy (без копирования): пакетный
+    # расчёт quote_codes.
+
+    def __init__(
+        self,
+        base_prices: Mapping[str, int],
+        sizes: Sequence[str],
+        styles: Sequence[str],
+        drawing_styles: Sequence[str],
+        extra_options: Mapping[str, int],
+        drawing_price: Callable[[int], int],
+        max_faces: int = MAX_FACES,
+    ) -> None:
+        self.sizes = tuple(sizes)
+        self.styles = tuple(styles)
+        self.options = tuple(extra_options)
+        self.max_faces = max_faces
+
+        self.size_ids = {size: i for i, size in enumerate(self.sizes)}
+        self.style_ids = {style: i for i, style in enumerate(self.styles)}
+        self.option_bits = {opt: 1 << i for i, opt in enumerate(self.options)}
+
+        self._faces = max_faces + 1
+        self._masks = 1 << len(self.options)
+
+        base = [base_prices.get(size, 0) for size in self.sizes]
+        drawing = [style in drawing_styles for style in self.styles]
+        faces_price = [drawing_price(faces) for faces in range(self._faces)]
+        mask_price = [
+            sum(
+                price for i, price in enumerate(extra_options.values())
+                if mask & (1 << i)
+            )
+            for mask in range(self._masks)
+        ]
+
+        self.totals = array('q', (
+            base[size] + (faces_price[faces] if drawing[style] else 0)
+            + mask_price[mask]
+            for size in range(len(self.sizes))
+            for style in range(len(self.styles))
+            for faces in range(self._faces)
+            for mask in range(self._masks)
+        ))
+
+        self.totals_array = np.frombuffer(self.totals, dtype=np.int64)
+        self.totals_array.flags.writeable = False
+
+        # Версия прайса: меняется при изменении любой цены или названия
+        digest = hashlib.sha256(self.totals.tobytes())
+        for name in (*self.sizes, *self.styles, *self.options):
+            digest.update(name.encode('utf-8') + b'\0')
+        self.version = digest.hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def index(self, size_id: int, style_id: int, faces: int, mask: int) -> int:
+        # Позиция заказа в таблице по числовым кодам
+        return (
+            ((size_id * len(self.styles) + style_id) * self._faces + faces)
+            * self._masks + mask
+        )
+
+    def mask(self, options: Iterable[str]) -> int | None:
+        # Битовая маска опций; None для неизвестных или повторяющихся
+        mask = 0
+        for opt in options:
+            bit = self.option_bits.get(opt)
+            if bit is None or mask & bit:
+                return None
+            mask |= bit
+        return mask
+
+    def encode(
+        self, size: str, style: str, faces: int, options: Iterable[str]
+    ) -> int | None:
+        # Позиция заказа в таблице или None, если заказ вне таблицы
+        # (неизвестные значения, повторяющиеся опции, лица вне 0..max)
+        size_id = self.size_ids.get(size)
+        style_id = self.style_ids.get(style)
+        if size_id is None or style_id is None:
+            return None
+        if not 0 <= faces <= self.max_faces:
+            return None
+        mask = self.mask(options)
+        if mask is None:
+            return None
+        return self.index(size_id, style_id, faces, mask)
+
+    def quote(
+        self, size: str, style: str, faces: int, options: Iterable[str]
+    ) -> int | None:
+        # Итог заказа одним обращением к массиву
+        position = self.encode(size, style, faces, options)
+        if position is None:
+            return None
+        return self.totals[position]
+
+    def quote_codes(
+        self,
+        size_ids: ArrayLike,
+        style_ids: ArrayLike,
+        faces: ArrayLike,
+        masks: ArrayLike,
+    ) -> NDArray[np.int64]:
+        # Итоги для столбцов уже закодированных заказов (см. index) за
+        # один векторный проход: позиции считаются формулой index над
+        # целыми столбцами, итоги выбираются индексированием totals_array.
+        columns = [
+            np.asarray(column, dtype=np.intp)
+            for column in (size_ids, style_ids, faces, masks)
+        ]
+        limits = (
+            len(self.sizes), len(self.styles), self._faces, self._masks
+        )
+        length = len(columns[0])
+        for column, limit in zip(columns, limits):
+            if column.ndim != 1 or len(column) != length:
+                raise ValueError('Столбцы должны быть одной длины')
+            if length and not (0 <= column.min() and column.max() < limit):
+                raise ValueError(f'Код вне диапазона 0..{limit - 1}')
+
+        size, style, face, mask = columns
+        positions = (
+            ((size * len(self.styles) + style) * self._faces + face)
+            * self._masks + mask
+        )
+        return self.totals_array[positions]
+
+
+@dataclass(frozen=True, eq=False)
+class PricingSnapshot:
+    # Неизменяемый скомпилированный прайс: значения для проверки ввода,
+    # клавиатур и сводок плюс таблица итогов. Снимки сравниваются
+    # по идентичности, поэтому служат ключами кэшей клавиатур и строк.
+    version: str
+    sizes: tuple[str, ...]
+    base_prices: Mapping[str, int]
+    styles: tuple[str, ...]
+    drawing_styles: frozenset[str]
+    extra_options: Mapping[str, int]
+    first_face_price: int
+    extra_face_price: int
+    max_faces: int
+    table: PriceTable
+
+    def drawing_price(self, faces: int) -> int:
+        # Стоимость отрисовки по числу лиц
+        if faces <= 0:
+            return 0
+        return self.first_face_price + (faces - 1) * self.extra_face_price
+
+
+def _price(value: Any, name: str) -> int:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f'Некорректная цена для {name!r}: {value!r}')
+    return value
+
+
+def _names(value: Any, name: str) -> tuple[str, ...]:
+    if not isinstance(value, list) or not all(
+        isinstance(item, str) and item for item in value
+    ):
+        raise ValueError(f'{name}: ожидается список строк')
+    if len(set(value)) != len(value):
+        raise ValueError(f'{name}: значения повторяются')
+    return tuple(value)
+
+
+def compile_pricing(data: Mapping[str, Any]) -> PricingSnapshot:
+    # Проверка прайса и сборка снимка. Ошибки — ValueError с описанием.
+    sizes = _names(data.get('sizes'), 'sizes')
+    styles = _names(data.get('styles'), 'styles')
+    drawing_styles = _names(data.get('drawing_styles', []), 'drawing_styles')
+    unknown = set(drawing_styles) - set(styles)
+    if unknown:
+        raise ValueError(f'drawing_styles: неизвестные стили {unknown}')
+
+    raw_base = data.get('base_prices')
+    raw_options = data.get('extra_options')
+    raw_drawing = data.get('drawing_price')
+    if not isinstance(raw_base, dict) or set(raw_base) != set(sizes):
+        raise ValueError('base_prices: нужна цена для каждого размера')
+    if not isinstance(raw_options, dict):
+        raise ValueError('extra_options: ожидается словарь')
+    if len(raw_options) > MAX_OPTIONS:
+        raise ValueError(f'extra_options: больше {MAX_OPTIONS} опций')
+    if not isinstance(raw_drawing, dict):
+        raise ValueError('drawing_price: ожидается словарь')
+
+    base_prices = {size: _price(raw_base[size], size) for size in sizes}
+    extra_options = {
+        opt: _price(price, opt) for opt, price in raw_options.items()
+    }
+    first_face = _price(raw_drawing.get('first_face'), 'first_face')
+    extra_face = _price(raw_drawing.get('extra_face'), 'extra_face')
+    max_faces = data.get('max_faces', MAX_FACES)
+    if not isinstance(max_faces, int) or not 1 <= max_faces <= 100:
+        raise ValueError(f'max_faces вне диапазона 1..100: {max_faces!r}')
+
+    def drawing_price(faces: int) -> int:
+        if faces <= 0:
+            return 0
+        return first_face + (faces - 1) * extra_face
+
+    table = PriceTable(
+        base_prices, sizes, styles, drawing_styles, extra_options,
+        drawing_price, max_faces
+    )
+    return PricingSnapshot(
+        version=table.version,
+        sizes=sizes,
+        base_prices=MappingProxyType(base_prices),
+        styles=styles,
+        drawing_styles=frozenset(drawing_styles),
+        extra_options=MappingProxyType(extra_options),
+        first_face_price=first_face,
+        extra_face_price=extra_face,
+        max_faces=max_faces,
+        table=table,
+    )
+
+
+def load_pricing(path: Path) -> PricingSnapshot:
+    # Чтение прайса из JSON-файла
+    with path.open(encoding='utf-8') as f:
+        return compile_pricing(json.load(f))
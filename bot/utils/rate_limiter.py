@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Any, Callable, Coroutine, Mapping
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты исходящих сообщений: меньше — раньше
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+# Сколько хранить корзин чатов, прежде чем убрать неактивные
+MAX_CHAT_BUCKETS = 10_000
+
+
+def is_message(endpoint: str) -> bool:
+    # Ограничения Telegram действуют на отправку сообщений; ответы на
+    # нажатия, редактирование и служебные методы не задерживаются
+    return endpoint.startswith(('send', 'forward', 'copy'))
+
+
+class TokenBucket:
+    # Корзина токенов: rate токенов в секунду, не больше capacity.
+    # Токенов может стать меньше нуля — так резервируется очередь.
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        # Через сколько секунд появится целый токен
+        self.refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+    def reserve(self, cost: float, now: float) -> float:
+        # Занять место в очереди; возвращает, сколько ждать своей очереди
+        delay = self.wait(now)
+        self.take(cost)
+        return delay
+
+    @property
+    def full(self) -> bool:
+        return self.tokens >= self.capacity
+
+
+class OutboundRateLimiter(BaseRateLimiter[int]):
+    # Все запросы бота к Bot API проходят здесь, поэтому обработчики
+    # просто ждут отправки, не заботясь об ограничениях Telegram:
+    # - общий лимит global_rate сообщений в секунду; ожидающие
+    #   сообщения выходят по приоритету, а внутри него — по очереди;
+    # - лимит чата chat_rate отправок в секунду, с запасом chat_burst
+    #   на несколько отправок подряд (альбом и тексты после него);
+    # - при RetryAfter отправка приостанавливается на указанное время
+    #   и запрос повторяется (не больше max_retries раз).
+    # Приоритет задаётся по чату (priorities) или через
+    # rate_limit_args методов бота.
+
+    __slots__ = (
+        'global_rate', 'chat_rate', 'chat_burst', 'max_retries',
+        'priorities', '_global', '_chats', '_waiters', '_order', '_pump',
+        '_paused_until', 'sent', 'delayed', 'waited', 'retries',
+    )
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        priorities: Mapping[int, int] | None = None,
+    ) -> None:
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.priorities = dict(priorities or {})
+        self._global: TokenBucket | None = None
+        self._chats: dict[int | str, TokenBucket] = {}
+        # Очередь на общий лимит: (приоритет, номер, стоимость, future)
+        self._waiters: list[
+            tuple[int, int, float, asyncio.Future[None]]
+        ] = []
+        self._order = itertools.count()
+        self._pump: asyncio.Task[None] | None = None
+        self._paused_until = 0.0
+        # Отправлено сообщений, из них задержано, суммарное ожидание (с)
+        # и повторы после RetryAfter
+        self.sent = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.retries = 0
+
+    async def initialize(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._global = TokenBucket(
+            self.global_rate, self.global_rate, loop.time()
+        )
+
+    async def shutdown(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+        for *_, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+        logger.info(f'[RATE] Статистика отправки: {self.stats()}')
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> Any:
+        chat_id = data.get('chat_id')
+        limited = is_message(endpoint) and chat_id is not None
+        if rate_limit_args is not None:
+            priority = rate_limit_args
+        else:
+            priority = self.priorities.get(chat_id, PRIORITY_NORMAL)
+        # Альбом в общем лимите — несколько сообщений, а в чате — одна
+        # отправка: иначе альбом из EXAMPLES_ALBUM_SIZE фото исчерпал бы
+        # запас чата, и следующие за ним сообщения ждали бы секундами
+        cost = len(data.get('media') or ()) or 1
+
+        for attempt in itertools.count():
+            if limited:
+                await self._acquire(chat_id, cost, priority)
+            else:
+                await self._wait_pause()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                self._pause(float(e.retry_after))
+                self.retries += 1
+                logger.warning(
+                    f'[RATE] {endpoint}: RetryAfter {e.retry_after} с, '
+                    f'повтор {attempt + 1}'
+                )
+
+    def _pause(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + delay)
+
+    async def _wait_pause(self) -> None:
+        delay = self._paused_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _acquire(
+        self, chat_id: int | str, cost: float, priority: int
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Сначала очередь своего чата, затем общий лимит
+        delay = self._chat_bucket(chat_id, started).reserve(1, started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        assert self._global is not None
+        now = loop.time()
+        self.sent += 1
+        if (
+            not self._waiters
+            and self._paused_until <= now
+            and not self._global.wait(now)
+        ):
+            self._global.take(cost)
+            if not delay:
+                return
+        else:
+            future: asyncio.Future[None] = loop.create_future()
+            heapq.heappush(
+                self._waiters, (priority, next(self._order), cost, future)
+            )
+            if self._pump is None or self._pump.done():
+                self._pump = asyncio.create_task(self._release_waiters())
+            await future
+        self.delayed += 1
+        self.waited += loop.time() - started
+
+    async def _release_waiters(self) -> None:
+        # Выпускает ожидающих по приоритету, как только позволяет лимит.
+        # После каждой паузы заново смотрит на начало очереди: за это
+        # время могло прийти более срочное сообщение.
+        assert self._global is not None
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            now = loop.time()
+            delay = max(self._paused_until - now, self._global.wait(now))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            *_, cost, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # ожидание отменено
+            self._global.take(cost)
+            future.set_result(None)
+
+    def _chat_bucket(self, chat_id: int | str, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                self._prune(now)
+            bucket = TokenBucket(self.chat_rate, self.chat_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        # Полная корзина ничем не отличается от новой
+        for chat_id, bucket in list(self._chats.items()):
+            bucket.refill(now)
+            if bucket.full:
+                del self._chats[chat_id]
+
+    def stats(self) -> dict[str, float]:
+        return {
+            'sent': self.sent,
+            'delayed': self.delayed,
+            'wait_avg_ms': round(
+                self.waited / self.delayed * 1000 if self.delayed else 0, 2
+            ),
+            'retries': self.retries,
+            'queued': len(self._waiters),
+        }
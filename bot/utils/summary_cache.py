@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from bot.config import SUMMARY_CACHE_SIZE
+
+
+class SummaryCache:
+    # LRU-кэш готовых сводок заказа. Ключ включает версию прайса: заказы,
+    # начатые по старому и по новому прайсу, кэшируются рядом и не
+    # вытесняют друг друга. Сводки версии, вытесненной из истории прайса,
+    # удаляются (drop_version).
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[tuple[str, Hashable], str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(
+        self, version: str, key: Hashable, render: Callable[[], str]
+    ) -> str:
+        key = (version, key)
+        text = self._items.get(key)
+        if text is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return text
+
+        self.misses += 1
+        text = render()
+        if self.max_items > 0:
+            if len(self._items) >= self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+            self._items[key] = text
+        return text
+
+    def drop_version(self, version: str) -> None:
+        # Версия прайса больше не используется заказами
+        stale = [key for key in self._items if key[0] == version]
+        for key in stale:
+            del self._items[key]
+        if stale:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {
+            'items': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 3) if requests else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+summary_cache = SummaryCache(SUMMARY_CACHE_SIZE)
@@ -0,0 +1,207 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.utils.pricing import MAX_FACES
+
+logger = logging.getLogger(__name__)
+
+# Поля, по которым можно узнать человека (удаляются везде).
+# first_name обязателен у User, поэтому заменяется заглушкой.
+PERSONAL_FIELDS = frozenset({
+    'last_name', 'username', 'title', 'bio',
+    'phone_number', 'language_code', 'is_premium',
+})
+FIRST_NAME = 'User'
+# Поля со свободным текстом пользователя
+TEXT_FIELDS = frozenset({'text', 'caption'})
+# Служебные поля, от которых обработчики не зависят
+DROP_FIELDS = frozenset({'entities', 'caption_entities'})
+
+
+class Record(NamedTuple):
+    # Запись журнала: время получения (unix, с) и обновление как dict
+    time: float
+    update: dict
+
+
+def open_log(path: Path, mode: str) -> IO[str]:
+    # Журнал в .gz пишется сжатым: дописывание создаёт новый поток gzip,
+    # а чтение склеивает потоки
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class TrafficRecorder:
+    # Запись входящих обновлений для воспроизведения нагрузки
+    # (benchmarks/replay.py). Одна строка JSON на обновление.
+    # id пользователей и чатов заменяются псевдонимами (одинаковыми в
+    # пределах запуска бота, чтобы сценарии пользователей сохранились),
+    # имена удаляются, свободный текст заменяется заглушкой той же
+    # длины. Тексты из keep_texts (кнопки, размеры, стили) и короткие
+    # числа (не длиннее max_digits цифр — число лиц) сохраняются — без
+    # них сценарий не воспроизвести. Длинные числа (телефоны, номера
+    # заказов) скрываются, как любой текст.
+    #
+    # Строки копятся в памяти и раз в flush_interval секунд (или по
+    # набору max_buffered строк) дописываются в файл в пуле потоков:
+    # медленный диск не задерживает обработку обновлений, а при аварийной
+    # остановке теряется не больше flush_interval секунд журнала.
+
+    def __init__(
+        self,
+        path: Path,
+        keep_texts: Iterable[str] = (),
+        max_digits: int = len(str(MAX_FACES)),
+        flush_interval: float = 1,
+        max_buffered: int = 1000,
+    ) -> None:
+        self.path = path
+        self.keep_texts = frozenset(keep_texts)
+        self.max_digits = max_digits
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.recorded = 0
+        self._salt = os.urandom(16)
+        self._file: IO[str] | None = None
+        self._lines: list[str] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def pseudonym(self, value: int) -> int:
+        # Стабильный псевдоним id: знак сохраняется (группы отрицательные)
+        digest = hashlib.blake2b(
+            str(abs(value)).encode(), key=self._salt, digest_size=5
+        ).digest()
+        alias = int.from_bytes(digest, 'big') + 1
+        return -alias if value < 0 else alias
+
+    def scrub_text(self, text: str) -> str:
+        if text in self.keep_texts:
+            return text
+        if text.isdigit() and len(text) <= self.max_digits:
+            return text
+        return '•' * len(text)
+
+    def anonymize(self, data: object) -> object:
+        # Обезличенная копия обновления (dict из Update.to_dict())
+        if isinstance(data, list):
+            return [self.anonymize(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+        # Пользователь или чат: есть id и имя либо тип чата
+        is_peer = 'id' in data and (
+            'first_name' in data or 'type' in data
+        )
+        result: dict = {}
+        for key, value in data.items():
+            if key in DROP_FIELDS:
+                continue
+            if key in PERSONAL_FIELDS:
+                continue
+            if key == 'first_name':
+                result[key] = FIRST_NAME
+            elif isinstance(value, int) and (
+                key == 'user_id' or (is_peer and key == 'id')
+            ):
+                result[key] = self.pseudonym(value)
+            elif key in TEXT_FIELDS and isinstance(value, str):
+                result[key] = self.scrub_text(value)
+            else:
+                result[key] = self.anonymize(value)
+        return result
+
+    def line(self, update: Update) -> str:
+        # Строка журнала: время получения и обезличенное обновление
+        return json.dumps(
+            [round(time.time(), 3), self.anonymize(update.to_dict())],
+            ensure_ascii=False,
+            separators=(',', ':'),
+        )
+
+    def _write(self, lines: list[str]) -> None:
+        # Дописывание строк в файл (в пуле потоков)
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open_log(self.path, 'a')
+            logger.info(f'[TRAFFIC] Запись обновлений в {self.path}')
+        self._file.write(''.join(lines))
+        self._file.flush()
+
+    async def record(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        # Обработчик TypeHandler(Update) в группе -1: видит все
+        # обновления и не мешает остальным обработчикам
+        try:
+            self._lines.append(self.line(update) + '\n')
+        except Exception:
+            logger.exception('[TRAFFIC] Ошибка записи обновления')
+            return
+        self.recorded += 1
+        if len(self._lines) >= self.max_buffered:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        elif self._flush_handle is None:
+            # Предыдущая запись ещё идёт — повторим позже
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+
+    async def _flush(self) -> None:
+        lines, self._lines = self._lines, []
+        if not lines:
+            return
+        try:
+            await asyncio.to_thread(self._write, lines)
+        except Exception:
+            logger.exception(
+                f'[TRAFFIC] Не удалось записать {len(lines)} обновлений'
+            )
+
+    async def close(self) -> None:
+        # Запись оставшихся строк и закрытие журнала при остановке бота
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._flush()
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+            logger.info(f'[TRAFFIC] Записано обновлений: {self.recorded}')
+
+
+def read_traffic(path: Path) -> Iterator[Record]:
+    # Чтение журнала TrafficRecorder; повреждённые строки (например,
+    # последняя при аварийной остановке) пропускаются
+    with open_log(path, 'r') as file:
+        for number, line in enumerate(file, 1):
+            try:
+                timestamp, update = json.loads(line)
+                yield Record(float(timestamp), update)
+            except (ValueError, TypeError):
+                logger.warning(
+                    f'[TRAFFIC] {path}:{number}: строка пропущена'
+                )
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Hashable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Сколько обновлений PTB может держать в обработке и ожидании
+# одновременно; сверх этого получение новых обновлений притормаживает
+MAX_PENDING = 10_000
+# Сколько последних времён ожидания хранить для перцентилей
+WAIT_SAMPLES = 1024
+
+
+class ChatLane:
+    # Очередь одного чата: замок, который обновления чата берут по
+    # очереди, и число обновлений чата в работе и ожидании
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+def lane_key(update: object) -> Hashable | None:
+    # Обновления одного чата (или пользователя, если чата нет)
+    # обрабатываются строго по очереди
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return ('user', update.effective_user.id)
+    return None
+
+
+def percentile(values: list[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    # Параллельная обработка обновлений разных чатов (не больше workers
+    # одновременно) и последовательная — внутри одного чата, чтобы
+    # состояние сценария пользователя (FlowEngine) не гонялось.
+    #
+    # Ограничение PTB (max_concurrent_updates) действует раньше
+    # do_process_update, поэтому оно сделано большим (MAX_PENDING),
+    # а число обработчиков ограничивается здесь — после очереди чата.
+    # Иначе обновления одного активного чата, ждущие своей очереди,
+    # занимали бы все места и останавливали остальные чаты.
+
+    __slots__ = (
+        'workers', '_workers', '_lanes', 'processed', 'active', 'waiting',
+        'max_waiting', '_chat_waits', '_worker_waits',
+    )
+
+    def __init__(self, workers: int) -> None:
+        if workers < 1:
+            raise ValueError('workers должно быть положительным')
+        super().__init__(MAX_PENDING)
+        self.workers = workers
+        self._workers = asyncio.BoundedSemaphore(workers)
+        self._lanes: dict[Hashable, ChatLane] = {}
+        self.processed = 0
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        # Ожидание очереди своего чата и свободного обработчика, мс
+        self._chat_waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._worker_waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        logger.info(f'[UPDATES] Статистика обработки: {self.stats()}')
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        key = lane_key(update)
+        queued = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        if key is None:
+            await self._run(coroutine, queued, queued)
+            return
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = ChatLane()
+        lane.pending += 1
+        try:
+            async with lane.lock:
+                await self._run(coroutine, queued, time.perf_counter())
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                del self._lanes[key]
+
+    async def _run(
+        self, coroutine: Awaitable[Any], queued: float, chat_ready: float
+    ) -> None:
+        started = 0.0
+        try:
+            async with self._workers:
+                started = time.perf_counter()
+                self.waiting -= 1
+                self._chat_waits.append((chat_ready - queued) * 1000)
+                self._worker_waits.append((started - chat_ready) * 1000)
+                self.active += 1
+                try:
+                    await coroutine
+                finally:
+                    self.active -= 1
+                    self.processed += 1
+        finally:
+            # Отменено, не дождавшись обработчика
+            if not started:
+                self.waiting -= 1
+
+    def stats(self) -> dict[str, float]:
+        # Глубина очереди и время ожидания (мс, по последним
+        # WAIT_SAMPLES обновлениям)
+        chat_waits = list(self._chat_waits)
+        worker_waits = list(self._worker_waits)
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'busy_chats': len(self._lanes),
+            'chat_wait_p50': round(percentile(chat_waits, 0.5), 2),
+            'chat_wait_p99': round(percentile(chat_waits, 0.99), 2),
+            'chat_wait_max': round(max(chat_waits, default=0), 2),
+            'worker_wait_p50': round(percentile(worker_waits, 0.5), 2),
+            'worker_wait_p99': round(percentile(worker_waits, 0.99), 2),
+        }
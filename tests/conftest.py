@@ -25,6 +25,7 @@ def fake_message(mock_user: User, mock_chat: Chat) -> Message:
     msg.chat = mock_chat
     msg.reply_text = AsyncMock()
     msg.reply_photo = AsyncMock()
+    msg.reply_media_group = AsyncMock(return_value=())
     return msg
 
 
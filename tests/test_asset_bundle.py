@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from bot.tools.pack_images import pack
+from bot.utils.asset_bundle import AssetBundle
+from bot.utils.image_catalog import ImageCatalog
+
+
+@pytest.fixture
+def bundle_path(tmp_path: Path) -> Path:
+    src = tmp_path / 'src'
+    styles = {'Dream Art': ('1.jpg', '2.jpg'), 'Digital Art': ('1.jpg',)}
+    for style, names in styles.items():
+        (src / style).mkdir(parents=True)
+        for name in names:
+            (src / style / name).write_bytes(f'{style}/{name}'.encode())
+    path = tmp_path / 'examples.bundle'
+    pack(src, path)
+    return path
+
+
+def test_bundle_roundtrip(bundle_path: Path) -> None:
+    ''' Изображения читаются из бандла без изменений. '''
+    bundle = AssetBundle(bundle_path)
+    bundle.open()
+
+    entries = bundle.entries('Dream Art')
+    assert entries is not None
+    assert [entry.name for entry in entries] == ['1.jpg', '2.jpg']
+
+    found = bundle.find(bundle.path_for(entries[1]))
+    assert found is not None
+    entry, view = found
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b'Dream Art/2.jpg'
+    assert len(entry.sha256) == 64
+
+
+def test_bundle_find_unknown(bundle_path: Path) -> None:
+    ''' Пути вне бандла и неизвестные файлы не находятся. '''
+    bundle = AssetBundle(bundle_path)
+    assert bundle.find(bundle_path / 'Dream Art' / '1.jpg') is None
+
+    bundle.open()
+    assert bundle.find(Path('/other') / 'Dream Art' / '1.jpg') is None
+    assert bundle.find(bundle_path / 'Dream Art' / '9.jpg') is None
+
+
+def test_catalog_uses_bundle(bundle_path: Path) -> None:
+    ''' Если бандл есть, индекс примеров строится по нему. '''
+    catalog = ImageCatalog(
+        ['Dream Art', 'Digital Art', 'Love is...'],
+        bundle=AssetBundle(bundle_path),
+    )
+    catalog.load()
+
+    assert catalog.root == bundle_path
+    assert catalog.counts() == {
+        'Dream Art': 2, 'Digital Art': 1, 'Love is...': None
+    }
@@ -0,0 +1,76 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from bot.tools.build_collages import build_collage, run
+
+
+def make_style(root: Path, style: str, count: int) -> None:
+    (root / style).mkdir(parents=True)
+    for i in range(count):
+        Image.new('RGB', (400, 300), (i * 40, 0, 0)).save(
+            root / style / f'{i}.jpg'
+        )
+
+
+def test_build_collages(tmp_path: Path) -> None:
+    ''' Коллаж — сетка превью; стили без изображений пропускаются. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_style(src, 'Dream Art', 4)
+
+    stats = run(src, dst, ['Dream Art', 'Digital Art'], workers=1)
+
+    assert stats.built == 1
+    assert not (dst / 'Digital Art.jpg').exists()
+    with Image.open(dst / 'Dream Art.jpg') as image:
+        assert image.size == (3 * 320, 2 * 320)
+
+
+def test_build_collages_only_on_source_change(tmp_path: Path) -> None:
+    ''' Коллаж пересобирается только при изменении набора исходников. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_style(src, 'Dream Art', 2)
+    run(src, dst, ['Dream Art'], workers=1)
+
+    stats = run(src, dst, ['Dream Art'], workers=1)
+    assert (stats.built, stats.skipped) == (0, 1)
+
+    Image.new('RGB', (400, 300), 'blue').save(src / 'Dream Art' / '5.jpg')
+    stats = run(src, dst, ['Dream Art'], workers=1)
+    assert (stats.built, stats.skipped) == (1, 0)
+
+
+def test_failed_rebuild_keeps_previous_collage(tmp_path: Path) -> None:
+    ''' Если коллаж не удалось пересобрать, прежний остаётся и не
+    считается удалённым. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_style(src, 'Dream Art', 2)
+    run(src, dst, ['Dream Art'], workers=1)
+    before = (dst / 'Dream Art.jpg').read_bytes()
+
+    (src / 'Dream Art' / '1.jpg').write_bytes(b'not an image')
+    stats = run(src, dst, ['Dream Art'], workers=1)
+
+    assert (stats.failed, stats.removed) == (1, 0)
+    assert (dst / 'Dream Art.jpg').read_bytes() == before
+    assert not (dst / 'Dream Art.tmp').exists()
+    # Следующий запуск снова пробует пересобрать
+    assert run(src, dst, ['Dream Art'], workers=1).failed == 1
+
+
+def test_failed_save_removes_temp_file(tmp_path: Path) -> None:
+    ''' Недописанный временный файл коллажа удаляется. '''
+    make_style(tmp_path, 'Dream Art', 1)
+    dst = tmp_path / 'dst' / 'Dream Art.jpg'
+
+    def disk_full(path: Path, *args, **kwargs) -> None:
+        Path(path).write_bytes(b'partial')
+        raise OSError('No space left on device')
+
+    with patch.object(Image.Image, 'save', side_effect=disk_full), \
+            pytest.raises(OSError):
+        build_collage([tmp_path / 'Dream Art' / '0.jpg'], dst)
+
+    assert list(dst.parent.iterdir()) == []
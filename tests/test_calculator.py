@@ -12,9 +12,7 @@ from bot.handlers.calculator import (
     start_calculator,
     style_chosen,
 )
-from bot.keyboards.calculator import (
-    option_keyboard, size_keyboard, style_keyboard
-)
+from bot.keyboards.calculator import calculator_keyboards
 from bot.states import (
     CHOOSING_FACE_COUNT,
     CHOOSING_OPTIONS,
@@ -22,6 +20,9 @@ from bot.states import (
     CHOOSING_STYLE,
 )
 from bot.utils.calculator import calculate_total, format_summary
+from bot.utils.price_store import price_store
+
+keyboards = calculator_keyboards(price_store.current())
 
 
 @pytest.mark.parametrize(
@@ -176,7 +177,7 @@ async def test_style_chosen_simple_style(
     reply.assert_called_once()
     args, kwargs = reply.call_args
     assert 'стиль выбран' in args[0].lower()
-    assert kwargs['reply_markup'] == option_keyboard
+    assert kwargs['reply_markup'] == keyboards.option
 
 
 @pytest.mark.asyncio
@@ -227,7 +228,28 @@ async def test_size_chosen_valid(
     reply.assert_called_once()
     args, kwargs = reply.call_args
     assert 'стиль портрета' in args[0].lower()
-    assert kwargs['reply_markup'].keyboard == style_keyboard.keyboard
+    assert kwargs['reply_markup'].keyboard == keyboards.style.keyboard
+
+
+@pytest.mark.asyncio
+async def test_stale_pricing_restarts_order(
+    fake_update: Update, fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Шаг заказа по вытесненной версии прайса не принимается: расчёт
+    начинается заново с уведомлением. '''
+    message = cast(Message, fake_update.message)
+    message.text = 'Dream Art'
+    user_data = cast(dict, fake_context.user_data)
+    user_data.update(pricing_version='evicted', size='30×40')
+
+    result = await style_chosen(fake_update, fake_context)
+
+    assert result == CHOOSING_SIZE
+    assert 'size' not in user_data and 'style' not in user_data
+    assert user_data['pricing_version'] == price_store.current().version
+    args, kwargs = cast(AsyncMock, message.reply_text).call_args
+    assert 'Прайс обновился' in args[0]
+    assert kwargs['reply_markup'] is keyboards.size
 
 
 @pytest.mark.asyncio
@@ -293,7 +315,7 @@ async def test_face_count_chosen_param(
 
     if should_call_keyboard:
         assert 'дополнительно' in args[0].lower()
-        assert kwargs['reply_markup'] == option_keyboard
+        assert kwargs['reply_markup'] == keyboards.option
     else:
         assert 'введите число' in args[0].lower()
 
@@ -405,7 +427,7 @@ async def test_start_calculator_sends_keyboard(
     # Проверим текст и клавиатуру
     args, kwargs = reply.call_args
     assert 'размер холста' in args[0].lower()
-    assert kwargs['reply_markup'].keyboard == size_keyboard.keyboard
+    assert kwargs['reply_markup'].keyboard == keyboards.size.keyboard
 
     # Проверим возврат состояния
     assert result == CHOOSING_SIZE
@@ -0,0 +1,201 @@
+import asyncio
+from typing import cast
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import Update
+from telegram.error import BadRequest
+from telegram.ext import Application, CallbackQueryHandler, ContextTypes
+
+from benchmarks.bench_e2e import (
+    INLINE_CALCULATOR,
+    REPLY_CALCULATOR,
+    Errors,
+    Step,
+    build_app,
+    update_data,
+)
+from bot.handlers.calculator_inline import (
+    STEP_DONE,
+    inline_calculator,
+    start_inline_calculator,
+)
+from bot.handlers.registry import register_handlers
+from bot.handlers.fsm import FlowEngine
+from bot.keyboards.main_menu import CALCULATOR_BUTTON
+from bot.utils.calculator import format_summary
+
+
+def make_query(data: str, message_id: int = 1) -> MagicMock:
+    query = MagicMock()
+    query.data = data
+    query.message.message_id = message_id
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    return query
+
+
+async def press(
+    context: ContextTypes.DEFAULT_TYPE, data: str, message_id: int = 1
+) -> MagicMock:
+    update = MagicMock(spec=Update)
+    update.callback_query = make_query(data, message_id)
+    await inline_calculator(cast(Update, update), context)
+    return update.callback_query
+
+
+@pytest.mark.asyncio
+async def test_inline_calculator_single_message(
+    fake_update: Update, fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Весь расчёт — одно сообщение, которое редактируется по шагам. '''
+    fake_update.message.text = '📄 Калькулятор стоимости'
+    fake_update.message.reply_text.return_value = MagicMock(message_id=1)
+    await start_inline_calculator(fake_update, fake_context)
+    user_data = cast(dict, fake_context.user_data)
+
+    await press(fake_context, 'calc:size:1')
+    query = await press(fake_context, 'calc:style:1')
+    text = query.edit_message_text.call_args.args[0]
+    assert '• Стиль: Dream Art' in text
+    assert 'Лиц' not in text.split('\n\n')[0]
+    query = await press(fake_context, 'calc:faces:2')
+    text = query.edit_message_text.call_args.args[0]
+    assert '💰 Сейчас: 3885 ₽' in text
+
+    await press(fake_context, 'calc:opt:2')
+    await press(fake_context, 'calc:opt:0')
+    await press(fake_context, 'calc:opt:0')
+    query = await press(fake_context, 'calc:done')
+
+    # Ответом на нажатие служит изменённое сообщение
+    query.answer.assert_not_awaited()
+    assert fake_update.message.reply_text.await_count == 1
+    assert user_data['calc_step'] == STEP_DONE
+    assert user_data['options'] == ['Багетная рама']
+    assert query.edit_message_text.call_args.args[0] == format_summary({
+        'size': '40×60',
+        'style': 'Dream Art',
+        'faces': 2,
+        'options': ['Багетная рама'],
+    })
+
+
+@pytest.mark.asyncio
+async def test_inline_calculator_back_and_skip_faces(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Для стиля без отрисовки шаг лиц пропускается и при возврате. '''
+    user_data = cast(dict, fake_context.user_data)
+    user_data.update(calc_message_id=1, calc_step='size')
+
+    await press(fake_context, 'calc:size:0')
+    await press(fake_context, 'calc:style:0')
+    assert (user_data['faces'], user_data['calc_step']) == (0, 'options')
+
+    await press(fake_context, 'calc:back')
+    assert user_data['calc_step'] == 'style'
+
+
+@pytest.mark.asyncio
+async def test_inline_calculator_ignores_stale_and_invalid(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Кнопки старого сообщения и чужого шага ничего не меняют. '''
+    user_data = cast(dict, fake_context.user_data)
+    user_data.update(calc_message_id=2, calc_step='size')
+
+    query = await press(fake_context, 'calc:size:0', message_id=1)
+    assert 'устарел' in query.answer.call_args.args[0]
+    query = await press(fake_context, 'calc:faces:3', message_id=2)
+    query.answer.assert_awaited_once()
+    query.edit_message_text.assert_not_awaited()
+    query = await press(fake_context, 'calc:size:99', message_id=2)
+    query.edit_message_text.assert_not_awaited()
+    assert 'size' not in user_data
+
+
+@pytest.mark.asyncio
+async def test_inline_calculator_stale_pricing(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Кнопка расчёта по вытесненной версии прайса не применяется:
+    расчёт начинается заново с уведомлением. '''
+    user_data = cast(dict, fake_context.user_data)
+    user_data.update(
+        calc_message_id=1, calc_step='style', size='30×40',
+        pricing_version='evicted',
+    )
+
+    query = await press(fake_context, 'calc:style:1')
+
+    assert 'Прайс обновился' in query.answer.call_args.args[0]
+    assert user_data['calc_step'] == 'size'
+    assert 'size' not in user_data and 'style' not in user_data
+    text = query.edit_message_text.call_args.args[0]
+    assert text.startswith('📐 Выберите размер')
+
+
+@pytest.mark.asyncio
+async def test_inline_calculator_not_modified(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Ошибка «message is not modified» не прерывает обработку,
+    а нажатие подтверждается answerCallbackQuery. '''
+    user_data = cast(dict, fake_context.user_data)
+    user_data.update(calc_message_id=1, calc_step='size')
+    update = MagicMock(spec=Update)
+    update.callback_query = make_query('calc:size:0')
+    update.callback_query.edit_message_text.side_effect = BadRequest(
+        'Message is not modified'
+    )
+
+    await inline_calculator(cast(Update, update), fake_context)
+    assert user_data['size'] == '30×40'
+    update.callback_query.answer.assert_awaited_once()
+
+
+def test_inline_mode_registers_callback(app: Application) -> None:
+    ''' В режиме inline регистрируется обработчик кнопок calc:. '''
+    register_handlers(app, calculator_mode='inline')
+    fsm = next(h for h in app.handlers[0] if isinstance(h, FlowEngine))
+    assert fsm.entries[CALCULATOR_BUTTON][1] is start_inline_calculator
+    assert any(
+        isinstance(h, CallbackQueryHandler) and h.callback is inline_calculator
+        for h in app.handlers[0]
+    )
+
+
+def api_calls(calculator_mode: str, steps: list[Step]) -> dict[str, int]:
+    # Запросы к Bot API за один заказ
+    errors = Errors()
+    app = build_app(calculator_mode, errors)
+
+    async def main() -> dict[str, int]:
+        async with app:
+            request = app.bot.request
+            before = dict(request.calls)
+            for number, step in enumerate(steps, 1):
+                await app.process_update(Update.de_json(
+                    update_data(number, 1000, step), app.bot
+                ))
+            return {
+                endpoint: count - before.get(endpoint, 0)
+                for endpoint, count in request.calls.items()
+                if count > before.get(endpoint, 0)
+            }
+
+    calls = asyncio.run(main())
+    errors.check()
+    return calls
+
+
+def test_inline_calculator_api_calls_per_order() -> None:
+    ''' Inline-калькулятор отправляет одно сообщение на заказ и делает
+    один запрос на нажатие; пошаговый — сообщение на каждый шаг. '''
+    reply = api_calls('reply', REPLY_CALCULATOR)
+    inline = api_calls('inline', INLINE_CALCULATOR)
+
+    assert reply == {'sendMessage': len(REPLY_CALCULATOR) + 1}
+    presses = len(INLINE_CALCULATOR) - 1
+    assert inline == {'sendMessage': 1, 'editMessageText': presses}
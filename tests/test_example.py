@@ -1,6 +1,6 @@
 from pathlib import Path
-from typing import cast
-from unittest.mock import AsyncMock, MagicMock, mock_open, patch
+from typing import Iterator, cast
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from telegram import Message, Update
@@ -8,11 +8,23 @@ from telegram.ext import ContextTypes, ConversationHandler
 
 from bot.handlers.examples import (
     CHOOSING_EXAMPLE_STYLE,
+    browse_examples,
+    prewarm_examples,
     send_example_images,
+    show_example_album,
     show_example_styles,
 )
 from bot.keyboards.examples import style_keyboard
 from bot.prices import STYLE_OPTIONS
+from bot.utils.file_id_cache import FileIdCache
+
+
+@pytest.fixture(autouse=True)
+def empty_file_id_cache(tmp_path: Path) -> Iterator[FileIdCache]:
+    # Свой пустой кэш file_id на каждый тест
+    cache = FileIdCache(tmp_path / 'file_ids.json')
+    with patch('bot.handlers.examples.file_id_cache', cache):
+        yield cache
 
 
 @pytest.mark.asyncio
@@ -45,18 +57,49 @@ async def test_send_example_images_valid(
 
     mock_images = [Path(f'img{i}.jpg') for i in range(1, 3)]
 
-    with patch('bot.handlers.examples.IMAGE_DIR', Path('/fake/dir')), \
-         patch('pathlib.Path.exists', return_value=True), \
-         patch('pathlib.Path.iterdir', return_value=mock_images), \
-         patch('builtins.open', mock_open(read_data=b'fake-image-bytes')), \
-         patch('bot.handlers.examples.InputFile', return_value=MagicMock()):
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = tuple(mock_images)
+        catalog.collage.return_value = None
+        result = await send_example_images(fake_update, fake_context)
+
+        assert result == ConversationHandler.END
+        album = cast(AsyncMock, message.reply_media_group)
+        album.assert_called_once()
+        args, kwargs = album.call_args
+        assert len(args[0]) == len(mock_images)
+        assert style in kwargs['caption']
+        cast(AsyncMock, message.reply_photo).assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_example_images_album_fallback(
+    fake_update: Update,
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест отправки по одному фото, если альбом не отправился. '''
+    style = STYLE_OPTIONS[0]
+    message = cast(Message, fake_update.message)
+    message.text = style
+    album = cast(AsyncMock, message.reply_media_group)
+    album.side_effect = Exception('Ошибка отправки альбома')
+
+    mock_images = [Path(f'img{i}.jpg') for i in range(1, 4)]
 
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = tuple(mock_images)
+        catalog.collage.return_value = None
         result = await send_example_images(fake_update, fake_context)
 
         assert result == ConversationHandler.END
         reply = cast(AsyncMock, message.reply_photo)
-        assert reply.call_count >= 1
         assert reply.call_count == len(mock_images)
+        # Подпись остаётся только у первого фото
+        captions = [call.kwargs['caption'] for call in reply.call_args_list]
+        assert captions[0] and captions[1:] == [None, None]
 
 
 @pytest.mark.asyncio
@@ -69,9 +112,9 @@ async def test_send_example_images_no_style_folder(
     message = cast(Message, fake_update.message)
     message.text = style
 
-    with patch('bot.handlers.examples.IMAGE_DIR', Path('/fake/dir')), \
-         patch('pathlib.Path.exists', return_value=False):
-
+    with patch('bot.handlers.examples.image_catalog') as catalog:
+        catalog.get.return_value = None
+        catalog.root = Path('/fake/dir')
         result = await send_example_images(fake_update, fake_context)
 
         assert result == ConversationHandler.END
@@ -96,3 +139,199 @@ async def test_send_example_images_invalid_style(
     reply.assert_called_once()
     args, _ = reply.call_args
     assert 'выберите стиль' in args[0].lower()
+
+
+@pytest.mark.asyncio
+async def test_send_example_images_uses_cached_file_id(
+    fake_update: Update,
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест повторной отправки по file_id без чтения файла. '''
+    style = STYLE_OPTIONS[0]
+    message = cast(Message, fake_update.message)
+    message.text = style
+
+    mock_images = [Path(f'img{i}.jpg') for i in range(1, 3)]
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.file_id_cache') as cache, \
+         patch('bot.handlers.examples.image_cache') as image_cache:
+        cache.get.return_value = 'CACHED_FILE_ID'
+        catalog.get.return_value = tuple(mock_images)
+        catalog.collage.return_value = None
+        result = await send_example_images(fake_update, fake_context)
+
+        assert result == ConversationHandler.END
+        image_cache.get.assert_not_called()
+        album = cast(AsyncMock, message.reply_media_group)
+        media = album.call_args.args[0]
+        assert [item.media for item in media] == ['CACHED_FILE_ID'] * 2
+
+
+@pytest.mark.asyncio
+async def test_send_example_images_offers_gallery(
+    fake_update: Update,
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест кнопки галереи, когда примеров больше, чем в альбоме. '''
+    style = STYLE_OPTIONS[1]
+    message = cast(Message, fake_update.message)
+    message.text = style
+
+    mock_images = [Path(f'img{i}.jpg') for i in range(1, 8)]
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.EXAMPLES_ALBUM_SIZE', 5), \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = tuple(mock_images)
+        catalog.collage.return_value = None
+        await send_example_images(fake_update, fake_context)
+
+    album = cast(AsyncMock, message.reply_media_group)
+    assert len(album.call_args.args[0]) == 5
+
+    reply = cast(AsyncMock, message.reply_text)
+    gallery_call = reply.call_args_list[0]
+    assert '5 из 7' in gallery_call.args[0]
+    button = gallery_call.kwargs['reply_markup'].inline_keyboard[0][0]
+    assert button.callback_data == 'gallery:1:0'
+
+
+def make_gallery_update(data: str, has_photo: bool) -> MagicMock:
+    query = MagicMock()
+    query.data = data
+    query.answer = AsyncMock()
+    query.edit_message_media = AsyncMock()
+    query.message.photo = ('photo',) if has_photo else ()
+    query.message.reply_photo = AsyncMock()
+    update = MagicMock()
+    update.callback_query = query
+    return update
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'data, expected_index',
+    [
+        ('gallery:1:1', 1),
+        ('gallery:1:3', 0),   # листание по кругу
+    ]
+)
+async def test_browse_examples_edits_message(
+    data: str,
+    expected_index: int,
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест листания галереи редактированием одного сообщения. '''
+    update = make_gallery_update(data, has_photo=True)
+    mock_images = [Path(f'img{i}.jpg') for i in range(3)]
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = tuple(mock_images)
+        await browse_examples(update, fake_context)
+
+    query = update.callback_query
+    query.answer.assert_awaited_once()
+    query.message.reply_photo.assert_not_called()
+    media = query.edit_message_media.call_args.args[0]
+    assert f'{expected_index + 1} из 3' in media.caption
+    cache.get.assert_awaited_once_with(mock_images[expected_index])
+
+
+@pytest.mark.asyncio
+async def test_browse_examples_opens_viewer(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест открытия галереи из текстового сообщения. '''
+    update = make_gallery_update('gallery:1:0', has_photo=False)
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = (Path('img0.jpg'), Path('img1.jpg'))
+        await browse_examples(update, fake_context)
+
+    query = update.callback_query
+    query.edit_message_media.assert_not_called()
+    reply = query.message.reply_photo
+    reply.assert_awaited_once()
+    assert '1 из 2' in reply.call_args.kwargs['caption']
+
+
+@pytest.mark.asyncio
+async def test_send_example_images_collage_first(
+    fake_update: Update,
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест отправки коллажа вместо альбома, если он собран. '''
+    style = STYLE_OPTIONS[1]
+    message = cast(Message, fake_update.message)
+    message.text = style
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'collage-bytes')
+        catalog.get.return_value = (Path('img1.jpg'), Path('img2.jpg'))
+        catalog.collage.return_value = Path(f'{style}.jpg')
+        result = await send_example_images(fake_update, fake_context)
+
+    assert result == ConversationHandler.END
+    cast(AsyncMock, message.reply_media_group).assert_not_called()
+    reply = cast(AsyncMock, message.reply_photo)
+    reply.assert_awaited_once()
+    assert style in reply.call_args.kwargs['caption']
+    keyboard = reply.call_args.kwargs['reply_markup'].inline_keyboard
+    assert keyboard[0][0].callback_data == 'album:1'
+
+
+@pytest.mark.asyncio
+async def test_show_example_album(
+    fake_context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    ''' Тест отправки альбома по кнопке под коллажем. '''
+    query = MagicMock()
+    query.data = 'album:1'
+    query.answer = AsyncMock()
+    query.message.reply_media_group = AsyncMock(return_value=())
+    update = MagicMock()
+    update.callback_query = query
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+        catalog.get.return_value = (Path('img1.jpg'), Path('img2.jpg'))
+        await show_example_album(update, fake_context)
+
+    query.answer.assert_awaited_once()
+    album = query.message.reply_media_group
+    album.assert_awaited_once()
+    assert len(album.call_args.args[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_prewarm_examples_uploads_uncached() -> None:
+    ''' Тест прогрева: загружаются только изображения без file_id. '''
+    paths = [Path('img1.jpg'), Path('img2.jpg'), Path('img3.jpg')]
+    bot = AsyncMock()
+    bot.send_photo.side_effect = [MagicMock(), Exception('Ошибка загрузки')]
+
+    with patch('bot.handlers.examples.image_catalog') as catalog, \
+         patch('bot.handlers.examples.file_id_cache') as file_ids, \
+         patch('bot.handlers.examples.image_cache') as cache:
+        catalog.all_paths.return_value = paths
+        file_ids.get.side_effect = lambda path: (
+            'CACHED' if path == paths[0] else None
+        )
+        cache.get = AsyncMock(return_value=b'fake-image-bytes')
+
+        result = await prewarm_examples(bot, -100, concurrency=2, rate=0)
+
+    assert result == (1, 1)
+    assert bot.send_photo.await_count == 2
+    assert bot.send_photo.call_args.args[0] == -100
+    file_ids.put.assert_called_once()
+    file_ids.schedule_save.assert_called_once()
+    file_ids.save.assert_not_called()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+import pytest
+from telegram import Bot, InputMediaPhoto
+from telegram.error import Conflict, RetryAfter
+
+from benchmarks.fake_api import FakeBotApi
+
+UPDATE = {'message': {
+    'message_id': 5, 'date': 0, 'text': 'Привет',
+    'chat': {'id': 42, 'type': 'private'},
+    'from': {'id': 42, 'is_bot': False, 'first_name': 'User'},
+}}
+
+
+def run_with_bot(
+    api: FakeBotApi, scenario: Callable[[Bot], Awaitable[None]]
+) -> None:
+    # Настоящий Bot PTB (httpx) против локального сервера
+    async def main() -> None:
+        port = await api.start()
+        bot = Bot('1:token', base_url=f'http://127.0.0.1:{port}/bot')
+        try:
+            async with bot:
+                await scenario(bot)
+        finally:
+            await api.stop()
+
+    asyncio.run(main())
+
+
+def test_send_methods_and_updates() -> None:
+    ''' Методы отправки отвечают как Telegram, getUpdates отдаёт
+    добавленные обновления. '''
+    api = FakeBotApi()
+
+    async def scenario(bot: Bot) -> None:
+        first = await bot.send_message(42, 'Раз')
+        second = await bot.send_message(42, 'Два')
+        assert (first.message_id, second.message_id) == (1, 2)
+        assert second.text == 'Два'
+
+        photo = await bot.send_photo(42, b'\xff\xd8jpeg', filename='1.jpg')
+        assert photo.photo[-1].file_id.startswith('local-')
+        album = await bot.send_media_group(42, [
+            InputMediaPhoto(b'a', filename='a.jpg'),
+            InputMediaPhoto(b'b', filename='b.jpg'),
+        ])
+        assert len(album) == 2
+
+        api.inject(UPDATE)
+        updates = await bot.get_updates(timeout=1)
+        assert [u.message.text for u in updates] == ['Привет']
+        assert await bot.get_updates(offset=updates[0].update_id + 1) == ()
+
+    run_with_bot(api, scenario)
+    assert api.calls['sendMessage'] == 2
+    assert api.uploaded > 0
+
+
+def test_retry_after_injection() -> None:
+    ''' При retry_rate=1 методы отправки отвечают 429 с retry_after. '''
+    api = FakeBotApi(retry_rate=1, retry_after=3)
+
+    async def scenario(bot: Bot) -> None:
+        with pytest.raises(RetryAfter) as error:
+            await bot.send_message(42, 'Раз')
+        assert error.value.retry_after == 3
+
+    run_with_bot(api, scenario)
+    assert api.errors == {429: 1}
+
+
+def test_upload_rate_limits_throughput() -> None:
+    ''' Загрузки делят канал заданной скорости. '''
+    api = FakeBotApi(upload_rate=200_000)
+
+    async def scenario(bot: Bot) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(
+            bot.send_photo(42, b'x' * 10_000, filename=f'{i}.jpg')
+            for i in range(4)
+        ))
+        # 4 × ~10 КБ при 200 КБ/с — не меньше 0,2 с
+        assert loop.time() - started >= 0.2
+
+    run_with_bot(api, scenario)
+
+
+def test_webhook_delivery() -> None:
+    ''' После setWebhook обновления приходят POST-запросом с секретом,
+    а getUpdates отвечает конфликтом. '''
+    api = FakeBotApi()
+    received: list[tuple[dict[str, str], bytes]] = []
+
+    async def receiver(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await reader.readline()
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers['content-length']))
+        received.append((headers, body))
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+        await writer.drain()
+        writer.close()
+
+    async def scenario(bot: Bot) -> None:
+        server = await asyncio.start_server(receiver, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            await bot.set_webhook(
+                f'http://127.0.0.1:{port}/hook', secret_token='s3cret'
+            )
+            api.inject(UPDATE)
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+            with pytest.raises(Conflict):
+                await bot.get_updates()
+            await bot.delete_webhook()
+        finally:
+            server.close()
+
+    run_with_bot(api, scenario)
+    headers, body = received[0]
+    assert headers['x-telegram-bot-api-secret-token'] == 's3cret'
+    assert json.loads(body)['message']['text'] == 'Привет'
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+from bot.utils.file_id_cache import FileIdCache
+
+
+def test_file_id_cache_roundtrip(tmp_path: Path) -> None:
+    ''' Сохранённый file_id переживает перезапуск (save/load). '''
+    image = tmp_path / '1.jpg'
+    image.write_bytes(b'image-bytes')
+    cache_path = tmp_path / 'file_ids.json'
+
+    cache = FileIdCache(cache_path)
+    cache.put(image, 'FILE_ID_1', sha256(b'image-bytes'))
+    cache.save()
+
+    restored = FileIdCache(cache_path)
+    restored.load()
+    assert restored.get(image) == 'FILE_ID_1'
+
+
+def test_file_id_cache_miss(tmp_path: Path) -> None:
+    ''' Для незагруженного или отсутствующего файла file_id нет. '''
+    cache = FileIdCache(tmp_path / 'file_ids.json')
+    cache.load()
+    assert cache.get(tmp_path / 'missing.jpg') is None
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_file_id_cache_invalidated_on_change(tmp_path: Path) -> None:
+    ''' Изменение содержимого файла сбрасывает file_id при сверке. '''
+    image = tmp_path / '1.jpg'
+    image.write_bytes(b'old')
+    cache = FileIdCache(tmp_path / 'file_ids.json')
+    cache.put(image, 'FILE_ID_1', sha256(b'old'))
+
+    image.write_bytes(b'new content')
+    cache.revalidate()
+    assert cache.get(image) is None
+    assert len(cache) == 0
+
+
+def test_file_id_cache_survives_touch(tmp_path: Path) -> None:
+    ''' Изменение mtime без изменения содержимого не сбрасывает file_id. '''
+    image = tmp_path / '1.jpg'
+    image.write_bytes(b'same')
+    cache = FileIdCache(tmp_path / 'file_ids.json')
+    cache.put(image, 'FILE_ID_1', sha256(b'same'))
+    cache.revalidate()
+
+    stat = image.stat()
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.revalidate()
+    assert cache.get(image) == 'FILE_ID_1'
+
+
+def test_file_id_cache_by_hash(tmp_path: Path) -> None:
+    ''' Для изображений из бандла file_id сверяется по переданному хэшу. '''
+    cache = FileIdCache(tmp_path / 'file_ids.json')
+    virtual = tmp_path / 'examples.bundle' / 'Dream Art' / '1.jpg'
+    cache.put(virtual, 'FILE_ID_1', sha256='a' * 64)
+
+    assert cache.get(virtual, sha256='a' * 64) == 'FILE_ID_1'
+    assert cache.get(virtual, sha256='b' * 64) is None
+    assert len(cache) == 0
+
+
+def test_file_id_cache_deferred_save(tmp_path: Path) -> None:
+    ''' Изменения записываются одной отложенной записью, а при остановке
+    (flush) — сразу. '''
+    cache_path = tmp_path / 'file_ids.json'
+    cache = FileIdCache(cache_path, save_delay=0.05)
+
+    async def main() -> None:
+        cache.put(tmp_path / '1.jpg', 'FILE_ID_1', 'a' * 64)
+        cache.schedule_save()
+        cache.put(tmp_path / '2.jpg', 'FILE_ID_2', 'b' * 64)
+        cache.schedule_save()
+        assert not cache_path.exists()
+        await asyncio.sleep(0.2)
+        assert cache_path.exists()
+
+        cache.put(tmp_path / '3.jpg', 'FILE_ID_3', 'c' * 64)
+        cache.schedule_save()
+        await cache.flush()
+
+    asyncio.run(main())
+    restored = FileIdCache(cache_path)
+    restored.load()
+    assert len(restored) == 3
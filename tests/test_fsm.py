@@ -0,0 +1,113 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import Chat, Message, MessageEntity, Update, User
+from telegram.ext import ConversationHandler
+
+from bot.handlers.fsm import Flow, FlowEngine
+
+
+def make_update(text: str, user_id: int = 1, command: bool = False) -> Update:
+    entities = (
+        [MessageEntity(MessageEntity.BOT_COMMAND, 0, len(text))]
+        if command else None
+    )
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type='private'),
+        from_user=User(id=user_id, is_bot=False, first_name='Test'),
+        text=text,
+        entities=entities,
+    )
+    return Update(update_id=1, message=message)
+
+
+@pytest.fixture
+def engine() -> FlowEngine:
+    return FlowEngine([
+        Flow('menu', 'Меню', AsyncMock(return_value=None)),
+        Flow(
+            'order', 'Заказ', AsyncMock(return_value=1),
+            {
+                1: AsyncMock(return_value=2),
+                2: AsyncMock(return_value=ConversationHandler.END),
+            },
+        ),
+        # Те же номера состояний в другом сценарии не конфликтуют
+        Flow(
+            'contact', 'Связь', AsyncMock(return_value=1),
+            {1: AsyncMock(return_value=None)},
+        ),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_fsm_runs_flow(engine: FlowEngine) -> None:
+    ''' Кнопка меню запускает сценарий, далее — таблица состояний. '''
+    context = MagicMock()
+
+    assert await engine.dispatch(make_update('Заказ'), context) == 1
+    assert await engine.dispatch(make_update('30×40'), context) == 2
+    assert engine.state_of(1) == ('order', 2)
+    await engine.dispatch(make_update('Готово'), context)
+
+    assert engine.records == {}
+    assert engine.check_update(make_update('текст')) is None
+
+
+@pytest.mark.asyncio
+async def test_fsm_menu_reenters(engine: FlowEngine) -> None:
+    ''' Кнопка меню срабатывает в любом состоянии и сбрасывает сценарий. '''
+    context = MagicMock()
+    await engine.dispatch(make_update('Заказ'), context)
+    await engine.dispatch(make_update('30×40'), context)
+
+    await engine.dispatch(make_update('Связь'), context)
+    assert engine.state_of(1) == ('contact', 1)
+
+    await engine.dispatch(make_update('Меню'), context)
+    assert engine.records == {}
+
+
+@pytest.mark.asyncio
+async def test_fsm_same_local_states(engine: FlowEngine) -> None:
+    ''' Одинаковые номера состояний разных сценариев ведут к своим
+    обработчикам. '''
+    context = MagicMock()
+    await engine.dispatch(make_update('Заказ'), context)
+    await engine.dispatch(make_update('Связь', user_id=2), context)
+
+    assert engine.records[1] != engine.records[2]
+    assert await engine.dispatch(make_update('текст'), context) == 2
+    # None из обработчика состояния оставляет текущее состояние
+    assert await engine.dispatch(make_update('текст', 2), context) is None
+    assert engine.state_of(2) == ('contact', 1)
+
+
+@pytest.mark.asyncio
+async def test_fsm_unknown_state_ends_flow(engine: FlowEngine) -> None:
+    ''' Состояние не из таблицы сценария завершает сценарий. '''
+    engine.flows[1].states[1].return_value = 7
+    context = MagicMock()
+    await engine.dispatch(make_update('Заказ'), context)
+
+    assert await engine.dispatch(make_update('30×40'), context) == 7
+    assert engine.records == {}
+
+
+def test_fsm_skips_commands_and_other_users(engine: FlowEngine) -> None:
+    ''' Команды не обрабатываются, состояние у каждого пользователя своё. '''
+    engine.records[1] = engine.codes[1][1]
+
+    assert engine.check_update(make_update('/start', command=True)) is None
+    assert engine.check_update(make_update('30×40', user_id=2)) is None
+    assert engine.check_update(make_update('30×40')) is not None
+
+
+def test_fsm_rejects_duplicate_entry() -> None:
+    ''' Одна кнопка меню не может запускать два сценария. '''
+    handler = AsyncMock(return_value=None)
+    with pytest.raises(ValueError):
+        FlowEngine([Flow('a', 'Меню', handler), Flow('b', 'Меню', handler)])
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable
+
+import pytest
+from telegram import Bot
+from telegram.error import TimedOut
+
+from benchmarks.fake_api import FakeBotApi
+from bot.utils.http_pools import MeteredRequest, PoolConfig, RoutedRequest
+
+
+def run_with_pools(
+    api: FakeBotApi,
+    request: RoutedRequest,
+    scenario: Callable[[Bot], Awaitable[None]],
+) -> None:
+    async def main() -> None:
+        port = await api.start()
+        bot = Bot(
+            '1:token', base_url=f'http://127.0.0.1:{port}/bot',
+            request=request,
+        )
+        try:
+            async with bot:
+                await scenario(bot)
+        finally:
+            await api.stop()
+
+    asyncio.run(main())
+
+
+@pytest.mark.filterwarnings('error::telegram.warnings.PTBDeprecationWarning')
+def test_uploads_use_media_pool() -> None:
+    ''' Загрузки файлов идут через отдельный пул (с его write_timeout,
+    а не 20 с по умолчанию PTB), остальные вызовы — через обычный. '''
+    request = RoutedRequest(
+        MeteredRequest('regular', PoolConfig(size=4, keepalive=2)),
+        MeteredRequest('media', PoolConfig(size=2, keepalive=1)),
+    )
+
+    async def scenario(bot: Bot) -> None:
+        await bot.send_message(42, 'Привет')
+        await bot.send_photo(42, b'\xff\xd8jpeg', filename='1.jpg')
+        await bot.send_photo(42, 'local-1')
+
+    run_with_pools(FakeBotApi(), request, scenario)
+    stats = request.stats()
+    # getMe при запуске, sendMessage и фото по file_id
+    assert stats['regular']['requests'] == 3
+    assert stats['media']['requests'] == 1
+    assert stats['regular']['in_flight'] == 0
+
+
+def test_pool_exhaustion_is_counted() -> None:
+    ''' Запросы, заставшие пул занятым, учитываются, а не дождавшиеся
+    соединения завершаются TimedOut. '''
+    regular = MeteredRequest(
+        'regular', PoolConfig(size=1, keepalive=1, pool_timeout=0.05)
+    )
+    request = RoutedRequest(
+        regular, MeteredRequest('media', PoolConfig(size=1, keepalive=1))
+    )
+
+    async def scenario(bot: Bot) -> None:
+        results = await asyncio.gather(
+            *(bot.send_message(42, str(i)) for i in range(3)),
+            return_exceptions=True,
+        )
+        assert any(isinstance(r, TimedOut) for r in results)
+
+    run_with_pools(FakeBotApi(latency=0.2), request, scenario)
+    stats = regular.stats()
+    assert stats['peak'] == 3
+    assert stats['waited'] == 2
+    assert stats['pool_timeouts'] >= 1
+
+
+
+def test_pool_reinitialized_after_shutdown() -> None:
+    ''' После остановки пул можно запустить снова. '''
+    request = MeteredRequest('regular', PoolConfig(size=2, keepalive=1))
+
+    async def main() -> None:
+        await request.shutdown()
+        await request.initialize()
+        await request.shutdown()
+
+    asyncio.run(main())
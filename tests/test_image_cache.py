@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from bot.utils.image_cache import ImageBytesCache
+
+
+@pytest.fixture
+def images(tmp_path: Path) -> list[Path]:
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'{i}.jpg'
+        path.write_bytes(bytes([i]) * 100)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_image_cache_hits_and_misses(images: list[Path]) -> None:
+    ''' Повторное чтение файла обслуживается из памяти. '''
+    cache = ImageBytesCache(max_bytes=1000)
+
+    assert await cache.get(images[0]) == bytes([0]) * 100
+    assert await cache.get(images[0]) == bytes([0]) * 100
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.size == 100
+
+
+@pytest.mark.asyncio
+async def test_image_cache_evicts_least_recently_used(
+    images: list[Path]
+) -> None:
+    ''' При превышении бюджета вытесняется давно не использованный файл. '''
+    cache = ImageBytesCache(max_bytes=200)
+    await cache.get(images[0])
+    await cache.get(images[1])
+    await cache.get(images[0])  # images[1] становится самым старым
+    await cache.get(images[2])
+
+    assert cache.evictions == 1
+    assert cache.size == 200
+    await cache.get(images[0])
+    assert cache.stats()['hits'] == 2
+
+
+@pytest.mark.asyncio
+async def test_image_cache_concurrent_reads(images: list[Path]) -> None:
+    ''' Одновременные запросы одного файла не дублируют чтение. '''
+    cache = ImageBytesCache(max_bytes=1000)
+    results = await asyncio.gather(*(cache.get(images[0]) for _ in range(5)))
+
+    assert len(set(results)) == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_image_cache_skips_oversized(images: list[Path]) -> None:
+    ''' Файл больше бюджета отдаётся, но не кэшируется. '''
+    cache = ImageBytesCache(max_bytes=50)
+    assert await cache.get(images[0]) == bytes([0]) * 100
+    assert len(cache) == 0
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from bot.utils.image_catalog import ImageCatalog
+
+
+@pytest.fixture
+def image_root(tmp_path: Path) -> Path:
+    style_dir = tmp_path / 'Dream Art'
+    style_dir.mkdir()
+    for name in ('3.jpg', '1.JPG', '2.png', 'notes.txt'):
+        (style_dir / name).write_bytes(b'x')
+    return tmp_path
+
+
+def make_catalog(root: Path, limit: int | None = None) -> ImageCatalog:
+    catalog = ImageCatalog(['Dream Art', 'Digital Art'], limit)
+    with patch('bot.utils.image_catalog.examples_root', return_value=root):
+        catalog.load()
+    return catalog
+
+
+def test_catalog_orders_filters_and_caps(image_root: Path) -> None:
+    ''' Индекс отсортирован, отфильтрован по расширению и ограничен. '''
+    catalog = make_catalog(image_root, limit=2)
+    images = catalog.get('Dream Art')
+    assert images is not None
+    assert [path.name for path in images] == ['1.JPG', '2.png']
+
+
+def test_catalog_reports_missing_folders(image_root: Path) -> None:
+    ''' Отсутствующие папки видны в counts сразу после загрузки. '''
+    catalog = make_catalog(image_root)
+    assert catalog.counts() == {'Dream Art': 3, 'Digital Art': None}
+    assert catalog.get('Digital Art') is None
+
+
+def test_catalog_refresh_on_change(image_root: Path) -> None:
+    ''' refresh перестраивает индекс только при изменении папок. '''
+    catalog = make_catalog(image_root)
+
+    with patch(
+        'bot.utils.image_catalog.examples_root', return_value=image_root
+    ):
+        assert catalog.refresh() is False
+
+        new_dir = image_root / 'Digital Art'
+        new_dir.mkdir()
+        (new_dir / '1.jpg').write_bytes(b'x')
+        stat = image_root.stat()
+        os.utime(image_root, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert catalog.refresh() is True
+
+    assert catalog.counts()['Digital Art'] == 1
+
+
+def test_catalog_refresh_on_file_overwrite(image_root: Path) -> None:
+    ''' Перезапись изображения под тем же именем замечается, хотя mtime
+    папки не меняется. '''
+    catalog = make_catalog(image_root)
+    style_dir = image_root / 'Dream Art'
+    dir_stat = style_dir.stat()
+
+    with patch(
+        'bot.utils.image_catalog.examples_root', return_value=image_root
+    ):
+        (style_dir / '1.JPG').write_bytes(b'new image')
+        os.utime(style_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+        assert catalog.refresh() is True
+        assert catalog.refresh() is False
+
+
+def test_catalog_indexes_collages(image_root: Path, tmp_path: Path) -> None:
+    ''' Собранные коллажи доступны без обращения к диску. '''
+    collage_dir = tmp_path / 'collages'
+    collage_dir.mkdir()
+    (collage_dir / 'Dream Art.jpg').write_bytes(b'x')
+
+    catalog = ImageCatalog(
+        ['Dream Art', 'Digital Art'], collage_dir=collage_dir
+    )
+    with patch(
+        'bot.utils.image_catalog.examples_root', return_value=image_root
+    ):
+        catalog.load()
+
+    assert catalog.collage('Dream Art') == collage_dir / 'Dream Art.jpg'
+    assert catalog.collage('Digital Art') is None
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from telegram import (
+    InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+)
+from telegram.ext import ExtBot
+
+from benchmarks.fake_request import FakeRequest
+from bot.keyboards.calculator import (
+    calculator_keyboards,
+    inline_options_keyboard,
+)
+from bot.keyboards.examples import gallery_keyboard
+from bot.keyboards.main_menu import main_menu
+from bot.keyboards.registry import (
+    KeyboardRegistry,
+    PreparedMarkupBot,
+    keyboard_registry,
+)
+from bot.utils.price_store import price_store
+
+
+def test_calculator_keyboards_built_once() -> None:
+    ''' Клавиатуры калькулятора собираются и сериализуются один раз на
+    версию прайса. '''
+    pricing = price_store.current()
+    keyboards = calculator_keyboards(pricing)
+
+    assert keyboards is calculator_keyboards(pricing)
+    assert isinstance(keyboards.size, ReplyKeyboardMarkup)
+    assert keyboards.size.keyboard[0][0].text == pricing.sizes[0]
+    assert keyboard_registry.payload(keyboards.size) == json.dumps(
+        keyboards.size.to_dict()
+    )
+
+
+def test_inline_keyboards_cached() -> None:
+    ''' Inline-клавиатуры кэшируются по своим параметрам. '''
+    pricing = price_store.current()
+    options = inline_options_keyboard(pricing, 0b1)
+
+    assert options is inline_options_keyboard(pricing, 0b1)
+    assert options is not inline_options_keyboard(pricing, 0b10)
+    assert isinstance(gallery_keyboard(0, 1, 5), InlineKeyboardMarkup)
+    assert gallery_keyboard(0, 1, 5) is gallery_keyboard(0, 1, 5)
+
+
+class CapturingRequest(FakeRequest):
+    # Запоминает JSON-параметры каждого запроса
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[dict[str, str]] = []
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        if request_data is not None:
+            self.sent.append(request_data.json_parameters)
+        return await super().do_request(url, method, request_data, **kwargs)
+
+
+def send_with(bot: ExtBot, markup: object) -> str:
+    async def main() -> None:
+        async with bot:
+            await bot.send_message(1, 'Текст', reply_markup=markup)
+
+    asyncio.run(main())
+    return bot.request.sent[-1]['reply_markup']
+
+
+def test_registered_keyboard_sent_as_prepared_json() -> None:
+    ''' Зарегистрированная клавиатура уходит готовым JSON, без
+    повторной сериализации, и запрос совпадает с тем, что собрал бы
+    обычный бот PTB. '''
+    keyboard = calculator_keyboards(price_store.current()).option
+    expected = send_with(
+        ExtBot('1:token', request=CapturingRequest()), keyboard
+    )
+    hits = keyboard_registry.hits
+
+    with patch.object(
+        ReplyKeyboardMarkup, 'to_dict', side_effect=AssertionError
+    ):
+        sent = send_with(
+            PreparedMarkupBot('1:token', request=CapturingRequest()),
+            keyboard,
+        )
+
+    assert sent == expected
+    assert keyboard_registry.hits == hits + 1
+
+
+def test_unregistered_keyboard_serialized_by_ptb() -> None:
+    ''' Клавиатура не из реестра отправляется как обычно; реестр
+    вытесняет давно не отправленные клавиатуры. '''
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton('Кнопка', callback_data='x')
+    ]])
+    registry = KeyboardRegistry(1)
+    registry.prepare(main_menu)
+
+    sent = send_with(
+        PreparedMarkupBot('1:token', request=CapturingRequest()), keyboard
+    )
+
+    assert json.loads(sent) == keyboard.to_dict()
+    assert registry.payload(keyboard) is None
+    assert registry.payload(main_menu) == json.dumps(main_menu.to_dict())
+    registry.prepare(keyboard)
+    assert registry.payload(main_menu) is None
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from PIL import Image
+
+from bot.tools.optimize_images import MANIFEST_NAME, READY_NAME, run
+
+
+def make_image(path: Path, size: tuple[int, int], color: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'  # Make
+    Image.new('RGB', size, color).save(path, 'JPEG', exif=exif)
+
+
+def test_optimize_images_resizes_and_strips_metadata(tmp_path: Path) -> None:
+    ''' Изображения уменьшаются до max_side и теряют EXIF. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_image(src / 'Dream Art' / '1.jpg', (3000, 2000), 'red')
+    make_image(src / 'Dream Art' / '2.jpg', (800, 600), 'blue')
+
+    stats = run(src, dst, max_side=1280, quality=80, workers=1)
+
+    assert stats.processed == 2
+    assert (dst / MANIFEST_NAME).exists()
+    with Image.open(dst / 'Dream Art' / '1.jpg') as image:
+        assert max(image.size) == 1280
+        assert not image.getexif()
+    with Image.open(dst / 'Dream Art' / '2.jpg') as image:
+        assert image.size == (800, 600)
+
+
+def test_optimize_images_incremental(tmp_path: Path) -> None:
+    ''' Повторный запуск обрабатывает только изменённые файлы. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_image(src / 'Dream Art' / '1.jpg', (100, 100), 'red')
+    make_image(src / 'Dream Art' / '2.jpg', (100, 100), 'blue')
+    run(src, dst, workers=1)
+
+    stats = run(src, dst, workers=1)
+    assert (stats.processed, stats.skipped) == (0, 2)
+
+    make_image(src / 'Dream Art' / '1.jpg', (100, 100), 'green')
+    (src / 'Dream Art' / '2.jpg').unlink()
+    stats = run(src, dst, workers=1)
+    assert (stats.processed, stats.skipped, stats.removed) == (1, 0, 1)
+    assert not (dst / 'Dream Art' / '2.jpg').exists()
+
+
+def test_optimize_images_keeps_output_on_failure(tmp_path: Path) -> None:
+    ''' Неудачная повторная обработка оставляет прежний результат, а файл
+    без результата снимает метку полного набора. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_image(src / 'Dream Art' / '1.jpg', (100, 100), 'red')
+    run(src, dst, workers=1)
+    assert (dst / READY_NAME).exists()
+
+    (src / 'Dream Art' / '1.jpg').write_bytes(b'not an image')
+    stats = run(src, dst, workers=1)
+    assert (stats.failed, stats.missing) == (1, 0)
+    assert (dst / 'Dream Art' / '1.jpg').exists()
+    assert (dst / READY_NAME).exists()
+
+    (src / 'Dream Art' / '2.jpg').write_bytes(b'not an image')
+    stats = run(src, dst, workers=1)
+    assert (stats.failed, stats.missing) == (2, 1)
+    assert (dst / 'Dream Art' / '1.jpg').exists()
+    assert not (dst / READY_NAME).exists()
+
+
+def test_optimize_images_same_stem(tmp_path: Path) -> None:
+    ''' a.jpg и a.png в одной папке не перезаписывают друг друга. '''
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    make_image(src / 'Dream Art' / 'a.jpg', (100, 100), 'red')
+    Image.new('RGB', (100, 100), 'blue').save(src / 'Dream Art' / 'a.png')
+
+    stats = run(src, dst, workers=1)
+    assert stats.processed == 2
+    assert (dst / 'Dream Art' / 'a.jpg').exists()
+    assert (dst / 'Dream Art' / 'a.png.jpg').exists()
+    assert run(src, dst, workers=1).skipped == 2
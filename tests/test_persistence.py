@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from telegram import Update
+
+from benchmarks.bench_e2e import (
+    REPLY_CALCULATOR,
+    Errors,
+    build_app,
+    update_data,
+)
+from bot.handlers.calculator import CHOOSING_FACE_COUNT, CHOOSING_STYLE
+from bot.handlers.fsm import FlowEngine
+from bot.handlers.registry import build_fsm
+from bot.utils.persistence import SQLitePersistence
+
+USER_ID = 1000
+
+
+def run_steps(db_path: Path, steps: list, first_id: int) -> FlowEngine:
+    # Один «запуск» бота: шаги калькулятора и остановка с записью
+    persistence = SQLitePersistence(db_path, update_interval=60)
+    errors = Errors()
+    app = build_app('reply', errors, persistence=persistence)
+    fsm = next(h for h in app.handlers[0] if isinstance(h, FlowEngine))
+
+    async def main() -> None:
+        async with app:
+            for number, step in enumerate(steps, first_id):
+                await app.process_update(Update.de_json(
+                    update_data(number, USER_ID, step), app.bot
+                ))
+            # Запись только при остановке: интервал не истёк
+            assert persistence.batches == 0
+
+    asyncio.run(main())
+    errors.check()
+    return fsm
+
+
+def test_order_survives_restart(tmp_path: Path) -> None:
+    ''' Начатый заказ и шаг калькулятора восстанавливаются после
+    перезапуска. '''
+    db_path = tmp_path / 'state.sqlite3'
+    fsm = run_steps(db_path, REPLY_CALCULATOR[:2], 1)
+    assert fsm.state_of(USER_ID) == ('calculator', CHOOSING_STYLE)
+
+    restored = build_fsm('reply')
+    SQLitePersistence(db_path).attach(restored)
+    assert restored.state_of(USER_ID) == ('calculator', CHOOSING_STYLE)
+
+    # Стиль после перезапуска: размер из прошлого запуска на месте
+    fsm = run_steps(db_path, REPLY_CALCULATOR[2:3], 3)
+    assert fsm.state_of(USER_ID) == ('calculator', CHOOSING_FACE_COUNT)
+    data = asyncio.run(lazy_user_data(db_path))
+    assert data['size'] == '40×60'
+    assert data['style'] == 'Dream Art'
+
+
+async def lazy_user_data(db_path: Path) -> dict:
+    # Два одновременных обновления пользователя: база читается один раз,
+    # оба видят прочитанные данные
+    persistence = SQLitePersistence(db_path)
+    assert await persistence.get_user_data() == {}
+    user_data: dict = {}
+    with patch.object(
+        SQLitePersistence, '_load_user', autospec=True,
+        side_effect=SQLitePersistence._load_user,
+    ) as load_user:
+        await asyncio.gather(
+            persistence.refresh_user_data(USER_ID, user_data),
+            persistence.refresh_user_data(USER_ID, user_data),
+        )
+    load_user.assert_called_once()
+    return user_data
+
+
+def test_finished_flow_is_removed(tmp_path: Path) -> None:
+    ''' Завершённый сценарий не восстанавливается. '''
+    db_path = tmp_path / 'state.sqlite3'
+    run_steps(db_path, REPLY_CALCULATOR, 1)
+    restored = build_fsm('reply')
+    SQLitePersistence(db_path).attach(restored)
+    assert restored.state_of(USER_ID) is None
+
+
+def test_state_survives_reordered_flows(tmp_path: Path) -> None:
+    ''' Шаг сценария восстанавливается, даже если порядок сценариев
+    изменился между запусками. '''
+    db_path = tmp_path / 'state.sqlite3'
+    run_steps(db_path, REPLY_CALCULATOR[:2], 1)
+
+    reordered = FlowEngine(build_fsm('reply').flows[::-1])
+    SQLitePersistence(db_path).attach(reordered)
+    assert reordered.state_of(USER_ID) == ('calculator', CHOOSING_STYLE)
+
+
+def locked(
+    persistence: SQLitePersistence, users: dict, states: dict, flows: dict
+) -> None:
+    # Пока пакет пишется, приходят более новые данные пользователя
+    persistence._users[USER_ID] = {'size': 'new'}
+    raise sqlite3.OperationalError('database is locked')
+
+
+def test_failed_write_is_kept(tmp_path: Path) -> None:
+    ''' Пакет, который не удалось записать, возвращается в очередь
+    и не затирает более новые изменения; flush сообщает об ошибке. '''
+    db_path = tmp_path / 'state.sqlite3'
+
+    async def main() -> None:
+        persistence = SQLitePersistence(db_path)
+        with patch.object(
+            SQLitePersistence, '_write', autospec=True, side_effect=locked
+        ):
+            await persistence.update_user_data(USER_ID, {'size': 'old'})
+            await persistence.update_user_data(USER_ID + 1, {'size': 'x'})
+            await persistence._write_task
+        assert persistence.batches == 0
+        await persistence.flush()
+
+        persistence = SQLitePersistence(db_path)
+        await persistence.update_user_data(USER_ID, {'size': 'lost'})
+        with patch.object(
+            SQLitePersistence, '_write', autospec=True, side_effect=locked
+        ), pytest.raises(sqlite3.OperationalError):
+            await persistence.flush()
+
+    asyncio.run(main())
+    persistence = SQLitePersistence(db_path)
+    assert persistence._load_user(USER_ID) == {'size': 'new'}
+    assert persistence._load_user(USER_ID + 1) == {'size': 'x'}
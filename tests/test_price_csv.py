@@ -0,0 +1,54 @@
+import csv
+import io
+
+from bot.tools.price_csv import price_list_rows, quote_csv, write_price_list
+from bot.utils.calculator import calculate_total_reference
+from bot.utils.price_store import price_store
+
+pricing = price_store.current()
+
+
+def test_quote_csv_streams_chunks() -> None:
+    ''' CSV рассчитывается порциями, столбцы сохраняются. '''
+    src = io.StringIO(
+        'lead,size,style,faces,options\n'
+        '1,40×60,Digital Art,2,Багетная рама\n'
+        '2,30×40,Просто фото на холсте,0,\n'
+        '3,30×40,Dream Art,12,Фактурный гель;Лак\n'
+        '4,30×40,Dream Art,много,\n'
+    )
+    dst = io.StringIO()
+
+    stats = quote_csv(src, dst, pricing, chunk_size=2)
+
+    rows = list(csv.DictReader(io.StringIO(dst.getvalue())))
+    assert [row['lead'] for row in rows] == ['1', '2', '3', '4']
+    assert [row['total'] for row in rows] == [
+        str(2085 + 1800 + 840),
+        '1545',
+        str(calculate_total_reference({
+            'size': '30×40', 'style': 'Dream Art', 'faces': 12,
+            'options': ['Фактурный гель', 'Лак'],
+        })[0]),
+        '',
+    ]
+    assert (stats.rows, stats.table, stats.reference, stats.failed) == (
+        4, 2, 1, 1
+    )
+
+
+def test_price_list_matches_reference() -> None:
+    ''' Прайс-лист содержит только допустимые заказы с эталонными итогами. '''
+    dst = io.StringIO()
+    count = write_price_list(dst, pricing)
+    rows = list(price_list_rows(pricing))
+    assert count == len(rows)
+    # Порции не влияют на результат
+    assert list(price_list_rows(pricing, chunk_size=7)) == rows
+
+    for row in rows:
+        assert (row['faces'] > 0) == (row['style'] in pricing.drawing_styles)
+        options = row['options'].split(';') if row['options'] else []
+        assert row['total'] == calculate_total_reference(
+            dict(row, options=options)
+        )[0]
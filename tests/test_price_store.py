@@ -0,0 +1,125 @@
+import asyncio
+import copy
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from bot.prices import DEFAULT_PRICING
+from bot.utils.calculator import calculate_total
+from bot.utils.price_store import PriceStore
+from bot.utils.pricing import compile_pricing
+
+
+def write_prices(path: Path, base_price: int) -> None:
+    data = copy.deepcopy(DEFAULT_PRICING)
+    data['base_prices']['30×40'] = base_price
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    # mtime должен измениться даже при быстрой перезаписи
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_price_store_keeps_order_version(tmp_path: Path) -> None:
+    ''' Начатый заказ досчитывается по прайсу, с которым начался. '''
+    path = tmp_path / 'prices.json'
+    store = PriceStore(path)
+    write_prices(path, 1000)
+    assert store.load() is True
+    old = store.current()
+
+    write_prices(path, 2000)
+    assert store.refresh() is True
+    assert store.refresh() is False
+
+    assert store.get(old.version) is old
+    assert store.get(None) is store.current()
+    assert store.get('unknown') is store.current()
+    assert old.table.quote('30×40', 'Просто фото на холсте', 0, []) == 1000
+    assert store.current().table.quote(
+        '30×40', 'Просто фото на холсте', 0, []
+    ) == 2000
+
+
+def test_price_store_reports_evicted_versions(tmp_path: Path) -> None:
+    ''' Версии, вытесненные из истории прайса, передаются в on_evict. '''
+    path = tmp_path / 'prices.json'
+    store = PriceStore(path, keep=2)
+    evicted: list[str] = []
+    store.on_evict = evicted.append
+    first = store.current().version
+
+    write_prices(path, 1000)
+    store.load()
+    assert evicted == []
+    write_prices(path, 2000)
+    store.load()
+    assert evicted == [first]
+
+
+def test_price_store_ignores_broken_file(tmp_path: Path) -> None:
+    ''' Некорректный файл не заменяет действующий прайс. '''
+    path = tmp_path / 'prices.json'
+    store = PriceStore(path)
+    current = store.current()
+
+    path.write_text('{"sizes": ["30×40"]}', encoding='utf-8')
+    assert store.load() is False
+    path.write_text('not json', encoding='utf-8')
+    assert store.load() is False
+    assert store.current() is current
+
+
+@pytest.mark.parametrize(
+    'change',
+    [
+        {'drawing_styles': ['???']},
+        {'base_prices': {'30×40': 1}},
+        {'extra_options': {'Рама': -1}},
+        {'sizes': ['30×40', '30×40']},
+    ]
+)
+def test_compile_pricing_validates(change: dict) -> None:
+    ''' Ошибки в прайсе обнаруживаются до подмены снимка. '''
+    with pytest.raises(ValueError):
+        compile_pricing({**DEFAULT_PRICING, **change})
+
+
+@pytest.mark.asyncio
+async def test_price_store_reload_on_request(tmp_path: Path) -> None:
+    ''' request_reload (SIGHUP) перечитывает файл без ожидания. '''
+    path = tmp_path / 'prices.json'
+    store = PriceStore(path)
+    write_prices(path, 1000)
+    task = asyncio.create_task(store.watch(interval=3600))
+
+    store.request_reload()
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if store.current().base_prices['30×40'] == 1000:
+            break
+    task.cancel()
+
+    assert store.current().base_prices['30×40'] == 1000
+
+
+def test_calculate_total_uses_order_version(tmp_path: Path) -> None:
+    ''' Итог заказа считается по версии прайса из user_data. '''
+    path = tmp_path / 'prices.json'
+    store = PriceStore(path)
+    write_prices(path, 1000)
+    store.load()
+    order = {
+        'size': '30×40',
+        'style': 'Просто фото на холсте',
+        'faces': 0,
+        'options': [],
+        'pricing_version': store.current().version,
+    }
+
+    with patch('bot.utils.calculator.price_store', store):
+        write_prices(path, 2000)
+        store.load()
+        assert calculate_total(order)[0] == 1000
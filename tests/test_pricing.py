@@ -0,0 +1,126 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from bot.prices import AVAILABLE_SIZES, EXTRA_OPTIONS, STYLE_OPTIONS
+from bot.utils.calculator import (
+    calculate_total,
+    calculate_total_reference,
+    quote,
+)
+from bot.utils.price_store import price_store
+
+price_table = price_store.current().table
+
+
+def all_orders():
+    options = list(EXTRA_OPTIONS)
+    subsets = [
+        list(subset)
+        for count in range(len(options) + 1)
+        for subset in combinations(options, count)
+    ]
+    for size in AVAILABLE_SIZES:
+        for style in STYLE_OPTIONS:
+            for faces in range(price_table.max_faces + 1):
+                for subset in subsets:
+                    yield {
+                        'size': size,
+                        'style': style,
+                        'faces': faces,
+                        'options': subset,
+                    }
+
+
+def test_price_table_covers_all_orders() -> None:
+    ''' Таблица содержит все комбинации размеров, стилей, лиц и опций. '''
+    assert len(price_table) == 4 * 6 * 11 * 16
+
+
+def test_calculate_total_matches_reference() -> None:
+    ''' Табличный расчёт совпадает с эталонным для всех заказов. '''
+    for order in all_orders():
+        assert calculate_total(order) == calculate_total_reference(order)
+        reordered = dict(order, options=order['options'][::-1])
+        assert (
+            calculate_total(reordered)
+            == calculate_total_reference(reordered)
+        )
+
+
+def test_calculate_total_repeated_order() -> None:
+    ''' Повторный заказ берётся из кэша, а изменение возвращённых строк
+    не портит кэш. '''
+    order = {
+        'size': '40×60', 'style': 'Dream Art', 'faces': 2,
+        'options': ['Багетная рама'],
+    }
+    total, lines = calculate_total(order)
+    lines.append('лишняя строка')
+    assert calculate_total(order) == calculate_total_reference(order)
+    assert calculate_total(dict(order))[0] == total
+
+
+@pytest.mark.parametrize(
+    'order',
+    [
+        {'size': '100×100', 'style': 'Dream Art', 'faces': 1},
+        {'size': '30×40', 'style': '???', 'faces': 1},
+        {'size': '30×40', 'style': 'Dream Art', 'faces': 12},
+        {
+            'size': '30×40',
+            'style': 'Dream Art',
+            'faces': 1,
+            'options': ['Фактурный гель', 'Фактурный гель'],
+        },
+        {'size': '30×40', 'options': ['Несуществующее']},
+        {},
+    ]
+)
+def test_calculate_total_outside_table(order: dict) -> None:
+    ''' Заказы вне таблицы считаются эталонным способом. '''
+    assert price_table.quote(
+        order.get('size', ''),
+        order.get('style', ''),
+        order.get('faces', 0),
+        order.get('options', []),
+    ) is None
+    assert calculate_total(order) == calculate_total_reference(order)
+
+
+def test_quote() -> None:
+    ''' quote возвращает итог заказа по строковым значениям. '''
+    assert quote('40×60', 'Digital Art', 2, ['Багетная рама']) == (
+        2085 + 1800 + 840
+    )
+    assert quote('30×40', 'Просто фото на холсте', 0, []) == 1545
+    assert quote('30×40', 'Dream Art', 12, []) == 1545 + 1200 + 11 * 600
+
+
+def test_quote_codes_matches_calculate_total() -> None:
+    ''' Векторный расчёт по столбцам кодов (ndarray) совпадает
+    с calculate_total. '''
+    orders = [
+        order for order in all_orders()
+        if len(set(order['options'])) == len(order['options'])
+    ]
+    totals = price_table.quote_codes(
+        np.array([price_table.size_ids[order['size']] for order in orders]),
+        np.array([price_table.style_ids[order['style']] for order in orders]),
+        np.array([order['faces'] for order in orders]),
+        np.array([price_table.mask(order['options']) for order in orders]),
+    )
+    assert isinstance(totals, np.ndarray)
+    assert totals.tolist() == [
+        calculate_total(order)[0] for order in orders
+    ]
+
+
+def test_quote_codes_rejects_bad_codes() -> None:
+    ''' Коды вне таблицы и столбцы разной длины отклоняются. '''
+    with pytest.raises(ValueError):
+        price_table.quote_codes([0], [0], [price_table.max_faces + 1], [0])
+    with pytest.raises(ValueError):
+        price_table.quote_codes([0, 1], [0], [0], [0])
+    assert len(price_table.quote_codes([], [], [], [])) == 0
@@ -0,0 +1,156 @@
+import asyncio
+from typing import Any
+
+import pytest
+from telegram.error import RetryAfter
+
+from bot.config import EXAMPLES_ALBUM_SIZE
+from bot.utils.rate_limiter import (
+    PRIORITY_HIGH,
+    OutboundRateLimiter,
+    TokenBucket,
+)
+
+ADMIN = 1
+
+
+def send(
+    limiter: OutboundRateLimiter,
+    chat_id: int,
+    sent: list[int],
+    endpoint: str = 'sendMessage',
+) -> Any:
+    # Запрос через ограничитель, как его делает ExtBot
+    async def callback() -> bool:
+        sent.append(chat_id)
+        return True
+
+    return limiter.process_request(
+        callback, (), {}, endpoint, {'chat_id': chat_id}, None
+    )
+
+
+def test_token_bucket_reserves_queue() -> None:
+    ''' Корзина пропускает запас сразу, а дальше — по одному в 1/rate. '''
+    bucket = TokenBucket(rate=2, capacity=2, now=0)
+    assert bucket.reserve(1, 0) == 0
+    assert bucket.reserve(1, 0) == 0
+    assert bucket.reserve(1, 0) == pytest.approx(0.5)
+    assert bucket.reserve(1, 0) == pytest.approx(1.0)
+    assert bucket.wait(10) == 0
+
+
+def test_chat_rate_spreads_messages() -> None:
+    ''' Сообщения в один чат сверх запаса ждут своей очереди, другие чаты
+    и редактирование не задерживаются. '''
+    limiter = OutboundRateLimiter(chat_rate=20, chat_burst=1)
+    sent: list[int] = []
+
+    async def main() -> float:
+        loop = asyncio.get_running_loop()
+        await limiter.initialize()
+        started = loop.time()
+        await asyncio.gather(
+            *(send(limiter, 5, sent) for _ in range(4)),
+            send(limiter, 6, sent),
+            send(limiter, 5, sent, 'editMessageText'),
+        )
+        elapsed = loop.time() - started
+        await limiter.shutdown()
+        return elapsed
+
+    elapsed = asyncio.run(main())
+    # 4 сообщения при 20 в секунду без запаса — не меньше 0,15 с
+    assert elapsed >= 0.14
+    assert sent[:3] == [5, 6, 5]
+    assert limiter.stats()['delayed'] == 3
+
+
+def test_priority_chat_goes_first() -> None:
+    ''' При исчерпанном общем лимите сообщение менеджеру обгоняет
+    ожидающие. '''
+    limiter = OutboundRateLimiter(
+        global_rate=20, chat_rate=100, chat_burst=100,
+        priorities={ADMIN: PRIORITY_HIGH},
+    )
+    sent: list[int] = []
+
+    async def main() -> None:
+        await limiter.initialize()
+        # Первые 20 — запас общего лимита, остальные ждут
+        tasks = [
+            asyncio.create_task(send(limiter, chat_id, sent))
+            for chat_id in range(100, 125)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(send(limiter, ADMIN, sent)))
+        await asyncio.gather(*tasks)
+        await limiter.shutdown()
+
+    asyncio.run(main())
+    assert sent[20] == ADMIN
+
+
+def test_retry_after_is_retried() -> None:
+    ''' RetryAfter повторяется автоматически, но не больше max_retries
+    раз. '''
+    limiter = OutboundRateLimiter(chat_rate=100, max_retries=2)
+    calls = 0
+
+    async def flaky(failures: int) -> bool:
+        nonlocal calls
+        calls += 1
+        if calls <= failures:
+            raise RetryAfter(0)
+        return True
+
+    async def request(failures: int) -> Any:
+        return await limiter.process_request(
+            flaky, (failures,), {}, 'sendMessage', {'chat_id': 5}, None
+        )
+
+    async def main() -> None:
+        nonlocal calls
+        await limiter.initialize()
+        assert await request(2) is True
+        assert calls == 3
+        calls = 0
+        with pytest.raises(RetryAfter):
+            await request(3)
+        await limiter.shutdown()
+
+    asyncio.run(main())
+    assert limiter.stats()['retries'] == 4
+
+
+def test_album_then_text_is_not_delayed() -> None:
+    ''' Альбом из EXAMPLES_ALBUM_SIZE фото и два текста после него
+    укладываются в запас чата по умолчанию. '''
+    limiter = OutboundRateLimiter()
+    sent: list[str] = []
+
+    async def callback(endpoint: str) -> bool:
+        sent.append(endpoint)
+        return True
+
+    def request(endpoint: str, data: dict) -> Any:
+        return limiter.process_request(
+            callback, (endpoint,), {}, endpoint, {'chat_id': 5, **data}, None
+        )
+
+    async def main() -> float:
+        loop = asyncio.get_running_loop()
+        await limiter.initialize()
+        started = loop.time()
+        await request(
+            'sendMediaGroup', {'media': [object()] * EXAMPLES_ALBUM_SIZE}
+        )
+        await request('sendMessage', {'text': 'Показаны 5 из 12'})
+        await request('sendMessage', {'text': 'Главное меню'})
+        elapsed = loop.time() - started
+        await limiter.shutdown()
+        return elapsed
+
+    assert asyncio.run(main()) < 0.1
+    assert sent == ['sendMediaGroup', 'sendMessage', 'sendMessage']
+    assert limiter.stats()['delayed'] == 0
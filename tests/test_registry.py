@@ -6,8 +6,22 @@ from bot.handlers.calculator import (
     CHOOSING_OPTIONS,
     CHOOSING_SIZE,
     CHOOSING_STYLE,
+    start_calculator,
 )
+from bot.handlers.contact import WAITING_FOR_MESSAGE
+from bot.handlers.examples import CHOOSING_EXAMPLE_STYLE
 from bot.handlers.registry import register_handlers
+from bot.handlers.fsm import FlowEngine
+from bot.keyboards.common import MAIN_MENU_BUTTON
+from bot.keyboards.main_menu import (
+    CALCULATOR_BUTTON,
+    CONTACT_BUTTON,
+    EXAMPLES_BUTTON,
+)
+
+
+def get_fsm(app: Application) -> FlowEngine:
+    return next(h for h in app.handlers[0] if isinstance(h, FlowEngine))
 
 
 def test_register_handlers_runs_without_error(app: Application) -> None:
@@ -25,37 +39,45 @@ def test_handlers_registered(app: Application) -> None:
     Проверяет, что после регистрации хендлеров они действительно добавлены.
     """
     register_handlers(app)
-    assert len(app.handlers[0]) >= 4  # start + 3 FSM-хендлера
+    assert len(app.handlers[0]) >= 4  # команды + FSM + inline-кнопки
 
 
-def test_contains_command_and_conversation_handlers(app: Application) -> None:
+def test_contains_command_handlers_and_fsm(app: Application) -> None:
     """
     Проверяет, что среди зарегистрированных хендлеров есть
-    CommandHandler и ConversationHandler.
+    CommandHandler и единый FlowEngine вместо ConversationHandler.
     """
     register_handlers(app)
     types = {type(h) for h in app.handlers[0]}
     assert CommandHandler in types
-    assert ConversationHandler in types
+    assert FlowEngine in types
+    assert ConversationHandler not in types
 
 
-def test_calculator_conversation_states(app: Application) -> None:
+def test_fsm_flows_and_states(app: Application) -> None:
     """
-    Проверяет, что FSM калькулятора содержит нужные состояния.
+    Проверяет, что FSM знает все кнопки меню и состояния сценариев.
     """
-    register_handlers(app)
-    calc_conv = next(
-        (
-            h for h in app.handlers[0]
-            if isinstance(h, ConversationHandler)
-            and any(ep.callback.__name__ == 'start_calculator' for ep in (
-                h.entry_points
-            ))
-        ),
-        None
-    )
-    assert calc_conv is not None
-    assert CHOOSING_SIZE in calc_conv.states
-    assert CHOOSING_STYLE in calc_conv.states
-    assert CHOOSING_FACE_COUNT in calc_conv.states
-    assert CHOOSING_OPTIONS in calc_conv.states
+    register_handlers(app, calculator_mode='reply')
+    fsm = get_fsm(app)
+    assert set(fsm.entries) == {
+        MAIN_MENU_BUTTON, CALCULATOR_BUTTON, EXAMPLES_BUTTON, CONTACT_BUTTON
+    }
+    assert fsm.entries[CALCULATOR_BUTTON][1] is start_calculator
+    flows = {flow.name: flow for flow in fsm.flows}
+    assert set(flows['calculator'].states) == {
+        CHOOSING_SIZE, CHOOSING_STYLE, CHOOSING_FACE_COUNT, CHOOSING_OPTIONS
+    }
+    assert CHOOSING_EXAMPLE_STYLE in flows['examples'].states
+    assert WAITING_FOR_MESSAGE in flows['contact'].states
+
+
+def test_fsm_codes_are_unique(app: Application) -> None:
+    """
+    Проверяет, что коды состояний всех сценариев различны, даже если
+    локальные номера состояний совпадают.
+    """
+    register_handlers(app, calculator_mode='reply')
+    fsm = get_fsm(app)
+    codes = [code for table in fsm.codes for code in table.values()]
+    assert len(codes) == len(set(codes)) == len(fsm.handlers)
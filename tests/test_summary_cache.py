@@ -0,0 +1,55 @@
+from bot.utils.calculator import format_summary, render_summary
+from bot.utils.summary_cache import SummaryCache
+
+
+def test_summary_cache_lru() -> None:
+    ''' Повторная сводка берётся из кэша, старые записи вытесняются. '''
+    cache = SummaryCache(max_items=2)
+    renders = []
+
+    def render(text: str):
+        return lambda: renders.append(text) or text
+
+    assert cache.get('v1', 1, render('a')) == 'a'
+    assert cache.get('v1', 1, render('a')) == 'a'
+    cache.get('v1', 2, render('b'))
+    cache.get('v1', 3, render('c'))
+    cache.get('v1', 1, render('a'))
+
+    assert renders == ['a', 'b', 'c', 'a']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['evictions'] == 2
+
+
+def test_summary_cache_keeps_versions_apart() -> None:
+    ''' Сводки разных версий прайса хранятся рядом и не сбрасывают друг
+    друга; вытесненная версия удаляется. '''
+    cache = SummaryCache(max_items=10)
+    cache.get('v1', 1, lambda: 'старая цена')
+
+    assert cache.get('v2', 1, lambda: 'новая цена') == 'новая цена'
+    assert cache.get('v1', 1, lambda: 'заново') == 'старая цена'
+    assert cache.get('v2', 1, lambda: 'заново') == 'новая цена'
+    assert cache.stats()['hits'] == 2
+
+    cache.drop_version('v1')
+    assert cache.invalidations == 1
+    assert len(cache) == 1
+
+
+def test_format_summary_normalizes_order() -> None:
+    ''' Порядок опций и лица у стиля без отрисовки не влияют на сводку. '''
+    order = {
+        'size': '30×40',
+        'style': 'Просто фото на холсте',
+        'faces': 0,
+        'options': ['Фактурный гель', 'Подарочная упаковка'],
+    }
+    reordered = dict(
+        order, faces=3, options=['Подарочная упаковка', 'Фактурный гель']
+    )
+
+    assert format_summary(order) == format_summary(reordered)
+    assert format_summary(reordered) == render_summary(
+        dict(order, options=['Подарочная упаковка', 'Фактурный гель'])
+    )
@@ -0,0 +1,114 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from telegram import Bot, Update
+
+from bot.keyboards.main_menu import CONTACT_BUTTON
+from bot.utils.traffic_log import TrafficRecorder, read_traffic
+
+
+def update_data(user_id: int, text: str) -> dict:
+    user = {
+        'id': user_id, 'is_bot': False, 'first_name': 'Иван',
+        'last_name': 'Петров', 'username': 'ivan', 'language_code': 'ru',
+    }
+    return {'update_id': 1, 'message': {
+        'message_id': 1, 'date': 0, 'text': text, 'from': user,
+        'chat': {'id': user_id, 'type': 'private', 'first_name': 'Иван'},
+    }}
+
+
+def record_all(recorder: TrafficRecorder, updates: list[Update]) -> None:
+    # Запись обновлений и остановка, как в работе бота
+    async def main() -> None:
+        for update in updates:
+            await recorder.record(update, MagicMock())
+        await recorder.close()
+
+    asyncio.run(main())
+
+
+def test_anonymize_hides_person_and_keeps_flow() -> None:
+    ''' Имена удаляются, id заменяются одинаково, кнопки сохраняются. '''
+    recorder = TrafficRecorder(Path('unused'), keep_texts={'Готово'})
+
+    first = recorder.anonymize(update_data(42, 'Мой телефон +7 900'))
+    second = recorder.anonymize(update_data(42, 'Готово'))
+    message = first['message']
+
+    assert message['from']['id'] == message['chat']['id'] != 42
+    assert second['message']['from']['id'] == message['from']['id']
+    assert message['from']['first_name'] == 'User'
+    assert 'username' not in message['from']
+    assert 'last_name' not in message['from']
+    assert message['text'] == '•' * len('Мой телефон +7 900')
+    assert second['message']['text'] == 'Готово'
+    assert recorder.scrub_text('3') == '3'
+
+
+def test_record_and_read_gzip_log(tmp_path: Path) -> None:
+    ''' Записанный журнал читается и разбирается обратно в Update. '''
+    path = tmp_path / 'traffic.jsonl.gz'
+    recorder = TrafficRecorder(path, keep_texts={'40×60'})
+    bot = Bot('1:token')
+    record_all(recorder, [
+        Update.de_json(update_data(7, text), bot)
+        for text in ('40×60', 'привет')
+    ])
+
+    records = list(read_traffic(path))
+    assert len(records) == 2
+    assert records[0].time <= records[1].time
+    replayed = Update.de_json(records[0].update, bot)
+    assert replayed.message.text == '40×60'
+    assert replayed.message.from_user.first_name == 'User'
+
+
+def test_read_skips_broken_lines(tmp_path: Path) -> None:
+    ''' Оборванная последняя строка журнала пропускается. '''
+    path = tmp_path / 'traffic.jsonl'
+    path.write_text(
+        '[1.0,{"update_id":1}]\n[2.0,{"update_i', encoding='utf-8'
+    )
+
+    records = list(read_traffic(path))
+    assert [record.time for record in records] == [1.0]
+
+
+def test_phone_number_in_contact_flow_is_hidden(tmp_path: Path) -> None:
+    ''' Телефон, введённый в сценарии связи с менеджером, не попадает в
+    журнал, а кнопка сценария и короткие числа сохраняются. '''
+    path = tmp_path / 'traffic.jsonl'
+    recorder = TrafficRecorder(path, keep_texts={CONTACT_BUTTON})
+    bot = Bot('1:token')
+    record_all(recorder, [
+        Update.de_json(update_data(7, text), bot)
+        for text in (CONTACT_BUTTON, '89161234567', '3')
+    ])
+
+    texts = [r.update['message']['text'] for r in read_traffic(path)]
+    assert texts == [CONTACT_BUTTON, '•' * 11, '3']
+    assert '89161234567' not in path.read_text(encoding='utf-8')
+
+
+def test_lines_written_in_background(tmp_path: Path) -> None:
+    ''' Обработчик только копит строки; в файл они попадают через
+    flush_interval, не дожидаясь остановки. '''
+    path = tmp_path / 'traffic.jsonl'
+    recorder = TrafficRecorder(path, flush_interval=0.01)
+    bot = Bot('1:token')
+
+    async def main() -> None:
+        await recorder.record(
+            Update.de_json(update_data(7, 'привет'), bot), MagicMock()
+        )
+        assert not path.exists()
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if path.exists() and path.read_text(encoding='utf-8'):
+                break
+        assert len(list(read_traffic(path))) == 1
+        await recorder.close()
+
+    asyncio.run(main())
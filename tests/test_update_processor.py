@@ -0,0 +1,85 @@
+import asyncio
+
+from telegram import Update
+
+from bot.utils.update_processor import ChatOrderedUpdateProcessor
+
+
+def chat_update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json({'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': 0, 'text': 'Привет',
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'User'},
+    }}, None)
+
+
+def run_updates(
+    processor: ChatOrderedUpdateProcessor,
+    updates: list[Update],
+    delay: float,
+) -> list[tuple[str, int]]:
+    # Каждое обновление «обрабатывается» delay секунд; возвращает
+    # журнал начала и конца обработки
+    events: list[tuple[str, int]] = []
+
+    async def handle(update: Update) -> None:
+        events.append(('start', update.update_id))
+        await asyncio.sleep(delay)
+        events.append(('end', update.update_id))
+
+    async def main() -> None:
+        async with processor:
+            # Как Application: задача на каждое обновление
+            await asyncio.gather(*(
+                asyncio.create_task(
+                    processor.process_update(update, handle(update))
+                )
+                for update in updates
+            ))
+
+    asyncio.run(main())
+    return events
+
+
+def test_same_chat_updates_are_sequential() -> None:
+    ''' Обновления одного чата обрабатываются по очереди в порядке
+    поступления. '''
+    processor = ChatOrderedUpdateProcessor(4)
+    events = run_updates(
+        processor, [chat_update(i, 42) for i in range(1, 4)], 0.01
+    )
+    assert events == [
+        ('start', 1), ('end', 1), ('start', 2), ('end', 2),
+        ('start', 3), ('end', 3),
+    ]
+    assert processor.stats()['processed'] == 3
+    assert processor.stats()['busy_chats'] == 0
+
+
+def test_chats_run_concurrently_up_to_workers() -> None:
+    ''' Разные чаты обрабатываются параллельно, но не больше workers
+    одновременно. '''
+    processor = ChatOrderedUpdateProcessor(2)
+    events = run_updates(
+        processor, [chat_update(i, i) for i in range(1, 4)], 0.02
+    )
+    assert events[:2] == [('start', 1), ('start', 2)]
+    # Третий чат ждёт свободного обработчика
+    assert events.index(('start', 3)) > events.index(('end', 1))
+    stats = processor.stats()
+    # Ждал только третий
+    assert stats['max_waiting'] == 1
+    assert stats['worker_wait_p99'] > 0
+
+
+def test_busy_chat_does_not_block_others() -> None:
+    ''' Очередь одного чата не занимает обработчики: другой чат
+    обрабатывается, пока первый ждёт своей очереди. '''
+    processor = ChatOrderedUpdateProcessor(2)
+    updates = [chat_update(i, 42) for i in range(1, 5)]
+    updates.append(chat_update(5, 7))
+    events = run_updates(processor, updates, 0.01)
+    assert events.index(('start', 5)) < events.index(('end', 1))
+    stats = processor.stats()
+    assert stats['chat_wait_max'] > 0
+    assert stats['waiting'] == stats['active'] == 0